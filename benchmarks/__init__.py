@@ -0,0 +1,71 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Keystroke throughput benchmarks.
+
+The benchmarks start Qtmacs, open a buffer of a given size in an
+applet, and feed the key sequences of the scenarios in
+``benchmarks.scenarios`` through ``qteEmulateKeypresses``. For
+every scenario they report the number of keys per second, the
+latency of the individual macros, and the number of log records
+Qtmacs created (the latter also for its startup). Every combination
+of applet and buffer size runs in a separate process to obtain its
+peak memory usage (RSS).
+
+Run all benchmarks from the Qtmacs root directory with::
+
+    python3 -m benchmarks
+
+or restrict them and save the results for later comparison::
+
+    python3 -m benchmarks --applets SciEditor --sizes 1K,1M --json out.json
+
+Qt 4 requires an X server. If no display is available then the
+benchmark processes run in a virtual one with ``xvfb-run`` (which
+must be installed).
+
+The log record counts ('logs' column, ``log_records`` and
+``log_records_startup`` in the JSON file) show the logging overhead,
+eg. of the macro registrations (see ``qteQuietRegistration``).
+They hardly depend on the buffer size, which is why the smallest
+buffer suffices to compare two revisions::
+
+    git checkout <old revision>
+    python3 -m benchmarks --sizes 1K --json before.json
+    git checkout <new revision>
+    python3 -m benchmarks --sizes 1K --json after.json
+
+The layout operations in windows with deep split trees have their own
+benchmark (see ``benchmarks/layout.py``)::
+
+    python3 -m benchmarks.layout
+
+"""
+
+import os
+import shutil
+
+
+def displayCommand(cmd):
+    """
+    Return the command line ``cmd`` wrapped in ``xvfb-run`` if there
+    is no display (and ``xvfb-run`` exists).
+    """
+    if ('DISPLAY' in os.environ) or (shutil.which('xvfb-run') is None):
+        return cmd
+    return ['xvfb-run', '--auto-servernum'] + cmd
@@ -0,0 +1,144 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Command line interface of the benchmarks (see ``benchmarks/__init__.py``).
+
+Every combination of applet and buffer size runs in a child process
+(started with the hidden ``--child`` option) that prints its results
+as JSON to stdout.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+import benchmarks
+
+
+def runChild(appletName, sizeName, scenarioNames):
+    """
+    Run the benchmark for one applet and buffer size in this process
+    and print the results as JSON.
+    """
+    # Only import Qt/Qtmacs in the child processes.
+    import benchmarks.harness
+    result = benchmarks.harness.runBenchmark(
+        appletName, sizeName, scenarioNames)
+    print(json.dumps(result))
+    sys.stdout.flush()
+
+    # Skip the (possibly slow) teardown of Qtmacs.
+    os._exit(0)
+
+
+def spawnChild(appletName, sizeName, scenarioNames):
+    """
+    Run the benchmark for one applet and buffer size in a new process
+    and return its results, or **None** if it failed.
+    """
+    cmd = [sys.executable, '-m', 'benchmarks',
+           '--child', appletName, sizeName]
+    if scenarioNames is not None:
+        cmd += ['--scenarios', ','.join(scenarioNames)]
+    cmd = benchmarks.displayCommand(cmd)
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    proc = subprocess.Popen(cmd, cwd=root, stdout=subprocess.PIPE,
+                            universal_newlines=True)
+    out, _ = proc.communicate()
+    if proc.returncode != 0:
+        return None
+
+    # Qtmacs may print to stdout as well, so only parse the last line.
+    lines = out.strip().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        return None
+
+
+def printResults(results):
+    """
+    Print a table of the throughput and the slowest macros.
+    """
+    line = '{:<12} {:>5} {:<14} {:>7} {:>10} {:>9} {:>9} {:>6}'
+    print(line.format('applet', 'size', 'scenario', 'keys', 'keys/s',
+                      'p95 [ms]', 'max [ms]', 'logs'))
+    for res in results:
+        print('{} {}: {} log records at startup, opened in {:.2f}s, '
+              'peak RSS {:.1f} MB'.format(
+                  res['applet'], res['size'], res['log_records_startup'],
+                  res['open_s'], res['peak_rss_kb'] / 1024))
+        for name, scen in sorted(res['scenarios'].items()):
+            # Report the latency of the slowest macro in the scenario.
+            macros = list(scen['macros'].values())
+            p95 = max([_['p95_ms'] for _ in macros] + [0])
+            worst = max([_['max_ms'] for _ in macros] + [0])
+            print(line.format(res['applet'], res['size'], name,
+                              scen['keys'],
+                              '{:.0f}'.format(scen['keys_per_second']),
+                              '{:.2f}'.format(p95), '{:.2f}'.format(worst),
+                              scen['log_records']))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python3 -m benchmarks',
+        description='Keystroke throughput benchmarks of Qtmacs.')
+    parser.add_argument('--applets', default='SciEditor,RichEditor',
+                        help='comma separated list of applets')
+    parser.add_argument('--sizes', default='1K,1M,50M',
+                        help='comma separated list of buffer sizes')
+    parser.add_argument('--scenarios', default=None,
+                        help='comma separated list of scenarios '
+                             '(default: all)')
+    parser.add_argument('--json', metavar='FILE', default=None,
+                        help='save the results to FILE')
+    parser.add_argument('--child', nargs=2, metavar=('APPLET', 'SIZE'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenarios is None:
+        scenarioNames = None
+    else:
+        scenarioNames = args.scenarios.split(',')
+
+    if args.child is not None:
+        runChild(args.child[0], args.child[1], scenarioNames)
+        return
+
+    results = []
+    for appletName in args.applets.split(','):
+        for sizeName in args.sizes.split(','):
+            res = spawnChild(appletName, sizeName, scenarioNames)
+            if res is None:
+                print('Benchmark {} {} failed.'.format(appletName, sizeName),
+                      file=sys.stderr)
+                continue
+            results.append(res)
+
+    printResults(results)
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if len(results) == 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Run the benchmark scenarios inside a Qtmacs instance.
+
+``QtmacsBenchmark`` starts Qtmacs, opens a buffer, and runs the
+scenarios; ``runBenchmark`` does the same for one applet and buffer
+size and returns the results as a dictionary (see ``__main__.py``).
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import resource
+import tempfile
+
+from PyQt4 import QtCore, QtGui
+
+# Add the `qtmacs` package to Python's search path.
+path, _ = os.path.split(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(path, '..')))
+import qtmacs.auxiliary
+import qtmacs.qtmacsmain
+import qtmacs.qte_global as qte_global
+import benchmarks.scenarios
+
+# Shorthands
+QtmacsKeysequence = qtmacs.auxiliary.QtmacsKeysequence
+
+# Buffer sizes (in bytes) selectable by name.
+bufferSizes = {'1K': 2**10, '1M': 2**20, '50M': 50 * 2**20}
+
+
+def makeBuffer(fileName, size):
+    """
+    Write ``size`` bytes of Python like source code to ``fileName``.
+    """
+    block = ''.join('def function_{0}(self, bar):\n'
+                    '    # Return the sum of bar and {0}.\n'
+                    '    return bar + {0}\n\n'.format(_) for _ in range(100))
+    block = block.encode('utf-8')
+    with open(fileName, 'wb') as f:
+        for _ in range(size // len(block)):
+            f.write(block)
+        f.write(block[:size % len(block)])
+
+
+def peakRSS():
+    """
+    Return the peak memory usage of this process in kilobytes.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # Mac OS reports bytes, not kilobytes.
+        usage //= 1024
+    return usage
+
+
+class LogCounter(logging.Handler):
+    """
+    Count the log records without formatting them.
+    """
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+class QtmacsBenchmark(QtCore.QObject):
+    """
+    Start a Qtmacs instance and run scenarios in it.
+
+    |Args|
+
+    * ``tmpDir`` (**str**): directory for the buffer files and the
+      journals.
+
+    |Raises|
+
+    * **None**
+    """
+    def __init__(self, tmpDir):
+        super().__init__()
+        self.tmpDir = tmpDir
+        self.qtApp = QtGui.QApplication.instance()
+        if self.qtApp is None:
+            self.qtApp = QtGui.QApplication(sys.argv)
+
+        # Count the log records Qtmacs creates, starting with those
+        # during its startup.
+        self.logCounter = LogCounter()
+        logging.getLogger('qtmacs').addHandler(self.logCounter)
+        self.qteMain = qtmacs.qtmacsmain.QtmacsMain()
+
+        # Do not write journals into the home directory of the user.
+        qte_global.journal_dir = os.path.join(tmpDir, 'journal')
+
+        # Measure the execution time of every macro.
+        self.latencies = {}
+        self._macroStart = None
+        self.qteMain.qtesigMacroStart.connect(self.macroStarted)
+        self.qteMain.qtesigMacroFinished.connect(self.macroFinished)
+        self.qteMain.qtesigMacroError.connect(self.macroFinished)
+        self.waitIdle()
+
+    def macroStarted(self, msgObj):
+        self._macroStart = time.perf_counter()
+
+    def macroFinished(self, msgObj):
+        if self._macroStart is None:
+            return
+        macroName = msgObj.data[0]
+        duration = time.perf_counter() - self._macroStart
+        self.latencies.setdefault(macroName, []).append(duration)
+        self._macroStart = None
+
+    def waitIdle(self):
+        """
+        Process events until all emulated keys and macros are done.
+        """
+        while self.qteMain.qteIsBusy():
+            self.qtApp.processEvents(QtCore.QEventLoop.AllEvents, 50)
+        self.qtApp.processEvents()
+
+    def openBuffer(self, appletName, size):
+        """
+        Open a file with ``size`` bytes in a new ``appletName`` applet
+        and return the time it took in seconds.
+        """
+        fileName = os.path.join(self.tmpDir, 'buffer_{}.py'.format(size))
+        if not os.path.exists(fileName):
+            makeBuffer(fileName, size)
+
+        start = time.perf_counter()
+        app = self.qteMain.qteNewApplet(appletName, fileName)
+        if app is None:
+            raise RuntimeError('Cannot create a {} applet'.format(appletName))
+        self.qteMain.qteMakeAppletActive(app)
+
+        # The SciEditor loads large files in the background and is
+        # read-only until it is done.
+        sci = getattr(app, 'qteScintilla', None)
+        while (sci is not None) and sci.isReadOnly():
+            self.qtApp.processEvents(QtCore.QEventLoop.AllEvents, 50)
+        self.waitIdle()
+        return time.perf_counter() - start
+
+    def runScenario(self, scenario):
+        """
+        Emulate all steps of ``scenario`` and return the number of
+        keys, the duration, the macro latencies, and the number of log
+        records.
+        """
+        self.latencies = {}
+        numKeys, duration = 0, 0
+        numLogs = self.logCounter.count
+        for keys in scenario.steps:
+            numKeys += len(QtmacsKeysequence(keys).toQtKeylist())
+            start = time.perf_counter()
+            self.qteMain.qteEmulateKeypresses(keys)
+            self.waitIdle()
+            duration += time.perf_counter() - start
+        numLogs = self.logCounter.count - numLogs
+        return numKeys, duration, self.latencies, numLogs
+
+
+def summarise(latencies):
+    """
+    Return the count, mean, median, 95th percentile, and maximum
+    (in milliseconds) of every macro in ``latencies``.
+    """
+    out = {}
+    for macroName, values in latencies.items():
+        values = sorted(values)
+        num = len(values)
+        out[macroName] = {
+            'count': num,
+            'mean_ms': 1000 * sum(values) / num,
+            'p50_ms': 1000 * values[num // 2],
+            'p95_ms': 1000 * values[min(num - 1, int(0.95 * num))],
+            'max_ms': 1000 * values[-1]}
+    return out
+
+
+def runBenchmark(appletName, sizeName, scenarioNames=None):
+    """
+    Run all scenarios for ``appletName`` with a buffer of size
+    ``sizeName`` (eg. '1M') and return the results.
+
+    |Args|
+
+    * ``appletName`` (**str**): applet to benchmark.
+    * ``sizeName`` (**str**): key in ``bufferSizes``.
+    * ``scenarioNames`` (**list**): scenarios to run (default: all
+      that support the applet).
+
+    |Returns|
+
+    * **dict**: benchmark results.
+
+    |Raises|
+
+    * **RuntimeError** if the applet cannot be created.
+    """
+    tmpDir = tempfile.mkdtemp(prefix='qtmacs_benchmark_')
+    try:
+        bench = QtmacsBenchmark(tmpDir)
+        result = {'applet': appletName, 'size': sizeName, 'scenarios': {}}
+        result['log_records_startup'] = bench.logCounter.count
+        result['open_s'] = bench.openBuffer(appletName,
+                                            bufferSizes[sizeName])
+        for scenario in benchmarks.scenarios.scenarios:
+            if appletName not in scenario.applets:
+                continue
+            if (scenarioNames is not None) and \
+               (scenario.name not in scenarioNames):
+                continue
+            numKeys, duration, latencies, numLogs = bench.runScenario(
+                scenario)
+            result['scenarios'][scenario.name] = {
+                'keys': numKeys,
+                'seconds': duration,
+                'log_records': numLogs,
+                'keys_per_second': numKeys / max(duration, 1e-9),
+                'macros': summarise(latencies)}
+        result['peak_rss_kb'] = peakRSS()
+        return result
+    finally:
+        shutil.rmtree(tmpDir, ignore_errors=True)
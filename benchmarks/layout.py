@@ -0,0 +1,225 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Benchmark the layout operations in windows with deep split trees.
+
+For every depth the benchmark repeatedly splits the active applet
+until the window contains a nested hierarchy of that many splitters,
+and then measures how long it takes to split, replace, remove, and
+kill the applet at the bottom of the hierarchy. Every depth runs in a
+separate process because Qtmacs can only be started once per process.
+
+Run the benchmark from the Qtmacs root directory with::
+
+    python3 -m benchmarks.layout
+
+or select the depths and save the results::
+
+    python3 -m benchmarks.layout --depths 1,16,256 --json layout.json
+
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import benchmarks
+
+# The layout operations to measure.
+operations = ('split', 'replace', 'remove', 'kill')
+
+
+def buildTree(bench, appletName, depth):
+    """
+    Split the active applet ``depth`` times and return the applet at
+    the bottom of the resulting splitter hierarchy.
+    """
+    qteMain = bench.qteMain
+    window = qteMain._qteWindowList[0]
+    app = qteMain.qteNewApplet(appletName)
+    qteMain.qteMakeAppletActive(app)
+    for ii in range(depth):
+        # Alternate the orientation to obtain the usual tiles.
+        newApp = qteMain.qteNewApplet(appletName)
+        qteMain.qteSplitApplet(newApp, ii % 2 == 0, window)
+        qteMain.qteMakeAppletActive(newApp)
+        bench.waitIdle()
+    return qteMain.qteNextApplet(numSkip=0, windowObj=window)
+
+
+def runLayoutBenchmark(appletName, depth, repeat):
+    """
+    Build a split tree with ``depth`` levels and return the time of
+    every layout operation in milliseconds.
+
+    |Args|
+
+    * ``appletName`` (**str**): applet to tile.
+    * ``depth`` (**int**): number of nested splitters.
+    * ``repeat`` (**int**): number of times to run every operation.
+
+    |Returns|
+
+    * **dict**: benchmark results.
+
+    |Raises|
+
+    * **RuntimeError** if the applet cannot be created.
+    """
+    # Only import Qt/Qtmacs in the child processes.
+    import benchmarks.harness
+
+    tmpDir = tempfile.mkdtemp(prefix='qtmacs_benchmark_')
+    try:
+        bench = benchmarks.harness.QtmacsBenchmark(tmpDir)
+        buildTime, latencies = _runOperations(bench, appletName, depth,
+                                              repeat)
+    finally:
+        shutil.rmtree(tmpDir, ignore_errors=True)
+
+    result = {'applet': appletName, 'depth': depth,
+              'build_ms': 1000 * buildTime}
+    result['operations'] = benchmarks.harness.summarise(latencies)
+    return result
+
+
+def _runOperations(bench, appletName, depth, repeat):
+    """
+    Build the split tree and return the time it took (in seconds) and
+    the latencies of all layout operations.
+    """
+    qteMain = bench.qteMain
+    window = qteMain._qteWindowList[0]
+
+    start = time.perf_counter()
+    bottom = buildTree(bench, appletName, depth)
+    if bottom is None:
+        raise RuntimeError('Cannot create a {} applet'.format(appletName))
+    buildTime = time.perf_counter() - start
+
+    def timed(name, fun, *args):
+        start = time.perf_counter()
+        fun(*args)
+        latencies[name].append(time.perf_counter() - start)
+
+    latencies = {_: [] for _ in operations}
+    for _ in range(repeat):
+        # Split the bottom applet and remove the new applet again.
+        newApp = qteMain.qteNewApplet(appletName)
+        qteMain.qteMakeAppletActive(bottom)
+        timed('split', qteMain.qteSplitApplet, newApp, True, window)
+        bench.waitIdle()
+        timed('remove', qteMain.qteRemoveAppletFromLayout, newApp)
+        bench.waitIdle()
+
+        # Swap the bottom applet with the (now invisible) new applet
+        # and back.
+        timed('replace', qteMain.qteReplaceAppletInLayout,
+              newApp, bottom, window)
+        bench.waitIdle()
+        qteMain.qteReplaceAppletInLayout(bottom, newApp, window)
+        bench.waitIdle()
+
+        # Kill the new applet once it is at the bottom of the
+        # hierarchy. Qtmacs then shows the previous invisible applet
+        # in its place, which becomes the new bottom applet.
+        qteMain.qteReplaceAppletInLayout(newApp, bottom, window)
+        qteMain.qteMakeAppletActive(newApp)
+        bench.waitIdle()
+        timed('kill', qteMain.qteKillApplet, newApp.qteAppletID())
+        bench.waitIdle()
+        bottom = qteMain.qteNextApplet(numSkip=0, windowObj=window)
+    return buildTime, latencies
+
+
+def spawnChild(appletName, depth, repeat):
+    """
+    Run the benchmark for one depth in a new process and return its
+    results, or **None** if it failed.
+    """
+    cmd = [sys.executable, '-m', 'benchmarks.layout', '--applet', appletName,
+           '--repeat', str(repeat), '--child', str(depth)]
+    cmd = benchmarks.displayCommand(cmd)
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    proc = subprocess.Popen(cmd, cwd=root, stdout=subprocess.PIPE,
+                            universal_newlines=True)
+    out, _ = proc.communicate()
+    if proc.returncode != 0:
+        return None
+
+    # Qtmacs may print to stdout as well, so only parse the last line.
+    lines = out.strip().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python3 -m benchmarks.layout',
+        description='Layout benchmarks of Qtmacs with deep split trees.')
+    parser.add_argument('--applet', default='RichEditor',
+                        help='applet to tile')
+    parser.add_argument('--depths', default='1,4,16,64,256',
+                        help='comma separated list of split tree depths')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='number of times to run every operation')
+    parser.add_argument('--json', metavar='FILE', default=None,
+                        help='save the results to FILE')
+    parser.add_argument('--child', type=int, metavar='DEPTH',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        result = runLayoutBenchmark(args.applet, args.child, args.repeat)
+        print(json.dumps(result))
+        sys.stdout.flush()
+
+        # Skip the (possibly slow) teardown of Qtmacs.
+        os._exit(0)
+
+    results = []
+    line = '{:>6} {:>10}' + ' {:>12}' * len(operations)
+    print(line.format('depth', 'build [ms]',
+                      *['{} [ms]'.format(_) for _ in operations]))
+    for depth in args.depths.split(','):
+        res = spawnChild(args.applet, int(depth), args.repeat)
+        if res is None:
+            print('Benchmark for depth {} failed.'.format(depth),
+                  file=sys.stderr)
+            continue
+        results.append(res)
+        means = ['{:.3f}'.format(res['operations'][_]['mean_ms'])
+                 for _ in operations]
+        print(line.format(res['depth'], '{:.0f}'.format(res['build_ms']),
+                          *means))
+
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if len(results) == 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Key sequences for the benchmarks.
+
+Every scenario is a ``Scenario`` instance with a list of steps. Each
+step is a key sequence in the usual Qtmacs notation (eg. '<ctrl>+x
+<ctrl>+s') and is emulated only once all keys of the previous step
+were processed. This matters for <ctrl>+g, which discards all
+emulated keys that are still queued.
+"""
+
+
+def typeText(text):
+    """
+    Return the key sequence that types ``text``.
+
+    Spaces and newlines are converted to '<space>' and '<return>'.
+
+    |Args|
+
+    * ``text`` (**str**): text without '<', '>', '+', and ':'
+      characters (these have a special meaning in key sequences).
+
+    |Returns|
+
+    * **str**: key sequence.
+
+    |Raises|
+
+    * **None**
+    """
+    keys = []
+    for char in text:
+        if char == ' ':
+            keys.append('<space>')
+        elif char == '\n':
+            keys.append('<return>')
+        else:
+            keys.append(char)
+    return ' '.join(keys)
+
+
+class Scenario(object):
+    """
+    A named list of key sequences.
+
+    |Args|
+
+    * ``name`` (**str**): name of the scenario.
+    * ``applets`` (**tuple**): names of the applets that support
+      the key bindings used in ``steps``.
+    * ``steps`` (**list**): key sequences to emulate one after the
+      other.
+
+    |Raises|
+
+    * **None**
+    """
+    def __init__(self, name, applets, steps):
+        self.name = name
+        self.applets = applets
+        self.steps = steps
+
+
+# Applets with the QTextEdit- and QScintilla based key bindings.
+_editors = ('SciEditor', 'RichEditor')
+
+# Select a rectangle spanning five lines and eight columns, kill it,
+# and yank it back.
+_rectangle = ('<ctrl>+<space> ' + '<ctrl>+n ' * 5 + '<ctrl>+f ' * 8 +
+              '<ctrl>+x <ctrl>+r <ctrl>+x <ctrl>+y')
+
+scenarios = [
+    Scenario('typing', _editors,
+             [typeText('def foo(bar)\n    return bar * 2\n\n')] * 20),
+    Scenario('navigation', _editors,
+             ['<ctrl>+n ' * 50 + '<ctrl>+f ' * 50 + '<alt>+f ' * 20 +
+              '<ctrl>+p ' * 50 + '<ctrl>+v ' * 10 + '<alt>+v ' * 10 +
+              '<alt>+> <alt>+<'] * 5),
+    Scenario('kill_yank', _editors,
+             ['<ctrl>+k <ctrl>+k <ctrl>+y <ctrl>+n'] * 50),
+    Scenario('rectangle', ('SciEditor',),
+             ['<alt>+<', _rectangle] * 10),
+    Scenario('search', ('SciEditor',),
+             ['<alt>+< <ctrl>+s ' + typeText('return') +
+              ' <ctrl>+s' * 20 + ' <return>'] * 5),
+    Scenario('query_replace', ('SciEditor',),
+             ['<alt>+< <alt>+% ' + typeText('bar') + ' <return> ' +
+              typeText('baz') + ' <return> !', '<ctrl>+g']),
+    Scenario('mini_applet', _editors,
+             ['<alt>+x ' + typeText('desc') + ' <tab>', '<ctrl>+g'] * 10),
+]
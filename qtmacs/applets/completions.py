@@ -0,0 +1,203 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+List the possible completions of a mini applet query.
+
+The completions are displayed with a ``QListView`` which only renders
+the visible rows, and at most ``Completions.maxRows`` of them are
+materialised in the model. The list is filtered as the user refines
+the input; if the new input extends the previous one, only the
+previous matches are filtered again.
+
+.. note: This applet is registered automatically at startup, and
+   the mini applet queries in ``qtmacs.miniapplets`` use it to
+   display their completions.
+
+As with every applet, do **not** use::
+
+    from qtmacs.applets.completions import Completions
+
+"""
+
+import qtmacs.type_check
+
+from PyQt4 import QtCore, QtGui
+from qtmacs.base_applet import QtmacsApplet
+
+# Shorthands:
+type_check = qtmacs.type_check.type_check
+
+
+class CompletionsModel(QtCore.QAbstractListModel):
+    """
+    Read-only list model for the rows of the ``Completions`` applet.
+    """
+    def __init__(self):
+        super().__init__()
+        self._qteRows = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._qteRows)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if (role != QtCore.Qt.DisplayRole) or not index.isValid():
+            return None
+        return self._qteRows[index.row()]
+
+    def qteSetRows(self, rows):
+        """
+        Replace all rows with ``rows`` (a list of strings).
+        """
+        self.beginResetModel()
+        self._qteRows = rows
+        self.endResetModel()
+
+
+class Completions(QtmacsApplet):
+    """
+    Display the completions of a mini applet query.
+
+    |Args|
+
+    * ``appletID`` (**str**): unique ID used by ``QtmacsMain`` to
+      distinguish applets.
+    """
+    # Maximum number of rows in the model.
+    maxRows = 5000
+
+    def __init__(self, appletID):
+        # Initialise the base class.
+        super().__init__(appletID)
+
+        # The list view (with one row per completion) and a label to
+        # display the number of matches. Uniform row heights allow
+        # the view to lay out only the visible rows.
+        self.qteModel = CompletionsModel()
+        self.qteList = self.qteAddWidget(QtGui.QListView(self))
+        self.qteList.setModel(self.qteModel)
+        self.qteList.setUniformItemSizes(True)
+        self.qteList.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.qteStatus = self.qteAddWidget(QtGui.QLabel(self),
+                                           isFocusable=False)
+        vbox = QtGui.QVBoxLayout()
+        vbox.addWidget(self.qteList)
+        vbox.addWidget(self.qteStatus)
+        self.setLayout(vbox)
+
+        # All candidates, the current filter, the candidates that
+        # pass it, and whether these are all (or only the first
+        # ``maxRows``) candidates that pass it.
+        self._qteCandidates = []
+        self._qteFilter = None
+        self._qteMatches = []
+        self._qteComplete = True
+
+    @type_check
+    def qteSetCompletions(self, candidates, userInput: str=''):
+        """
+        Display all ``candidates`` that contain ``userInput``.
+
+        |Args|
+
+        * ``candidates`` (**list**): list of strings.
+        * ``userInput`` (**str**): the current user input.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        self._qteCandidates = list(candidates)
+        self._qteFilter = None
+        self.qteFilter(userInput)
+
+    @type_check
+    def qteFilter(self, userInput: str):
+        """
+        Display only the candidates that contain ``userInput``.
+
+        |Args|
+
+        * ``userInput`` (**str**): the current user input.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        if userInput == self._qteFilter:
+            return
+
+        # If the previous filter was a prefix of this one, and all its
+        # matches are known, then only these must be searched.
+        if ((self._qteFilter is not None) and self._qteComplete and
+                userInput.startswith(self._qteFilter)):
+            source = self._qteMatches
+        else:
+            source = self._qteCandidates
+
+        matches, complete = [], True
+        for cand in source:
+            if userInput in cand:
+                if len(matches) == self.maxRows:
+                    complete = False
+                    break
+                matches.append(cand)
+
+        self._qteFilter = userInput
+        self._qteMatches = matches
+        self._qteComplete = complete
+        self.qteModel.qteSetRows(matches)
+
+        # Update the status label.
+        if complete:
+            msg = '{} completions'.format(len(matches))
+        else:
+            msg = 'First {} completions'.format(len(matches))
+        self.qteStatus.setText(msg)
+
+    @type_check
+    def qteSetCurrentRow(self, row: int):
+        """
+        Select the completion in ``row`` and scroll it into view.
+
+        |Args|
+
+        * ``row`` (**int**): row number.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        index = self.qteModel.index(row, 0)
+        if not index.isValid():
+            return
+        self.qteList.setCurrentIndex(index)
+        self.qteList.scrollTo(index)
@@ -0,0 +1,662 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+A read-only viewer for files that are too large for ``QtmacsScintilla``.
+
+The file is memory mapped instead of loaded, and a background thread
+builds a sparse index that stores the line number and byte offset of
+only one line per ``LineIndex.blockSize`` bytes. The widget only
+decodes and renders the lines that are currently visible. The memory
+consumption is therefore dominated by the (small) index and does
+not depend on how much of the file was viewed.
+
+The applet supports the usual navigation macros (next/previous line,
+scrolling, beginning/end of document) and a literal forward search
+with <ctrl>+s. The search scans ``LargeFileViewer.searchChunkSize``
+bytes per event loop iteration to keep the GUI responsive.
+
+The find-file macro opens a file with this applet if no other applet
+is registered for its type and it is at least
+``qte_global.findFile_largeSize`` bytes large.
+
+As with every applet, do **not** use::
+
+    from qtmacs.applets.large_file_viewer import LargeFileViewer
+
+"""
+
+import mmap
+import array
+import bisect
+import qtmacs.miniapplets.base_query
+
+from PyQt4 import QtCore, QtGui
+from qtmacs.base_applet import QtmacsApplet
+from qtmacs.base_macro import QtmacsMacro
+
+# Shorthands:
+MiniAppletBaseQuery = qtmacs.miniapplets.base_query.MiniAppletBaseQuery
+
+
+class LineIndex(object):
+    """
+    Sparse line index of a memory mapped file.
+
+    The index contains one checkpoint for (roughly) every
+    ``blockSize`` bytes, namely the line number and byte offset of
+    the first line that starts inside that block. All other lines
+    are found by scanning forward from the closest checkpoint, which
+    is never more than one block away.
+
+    Lines are separated by '\\n'; a trailing '\\r' is stripped when
+    the line is decoded.
+
+    |Args|
+
+    * ``mm`` (**mmap**): the memory mapped file (may be **None** for
+      an empty file).
+    """
+    # Distance between two checkpoints in bytes.
+    blockSize = 2 ** 16
+
+    # Lines longer than this are truncated when displayed.
+    maxLineBytes = 2 ** 12
+
+    def __init__(self, mm):
+        self.mm = mm
+        self.size = 0 if mm is None else len(mm)
+
+        # The checkpoints: line number and offset of the line start.
+        self.lineNos = array.array('Q', [0])
+        self.offsets = array.array('Q', [0])
+
+        # Number of lines indexed so far, and whether the entire
+        # file was indexed.
+        self.numLines = 1
+        self.complete = (self.size == 0)
+
+    def qteAddCheckpoints(self, lineNos, offsets, numLines, complete):
+        """
+        Add the checkpoints found by the ``LineIndexWorker``.
+        """
+        self.lineNos.extend(lineNos)
+        self.offsets.extend(offsets)
+        self.numLines = numLines
+        self.complete = complete
+
+    def lineOffset(self, line):
+        """
+        Return the byte offset of ``line`` or **None** if it does not
+        exist.
+        """
+        if (line < 0) or (line >= self.numLines):
+            return None
+
+        # Start at the closest checkpoint and skip the remaining lines.
+        # If the target line is the one right before the next
+        # checkpoint then it may be arbitrarily long, and the
+        # checkpoint marks its end.
+        k = bisect.bisect_right(self.lineNos, line) - 1
+        cur, pos = self.lineNos[k], self.offsets[k]
+        if k + 1 < len(self.lineNos):
+            nextLine, nextPos = self.lineNos[k + 1], self.offsets[k + 1]
+        else:
+            nextLine, nextPos = None, self.size
+        find = self.mm.find
+        while cur < line:
+            if cur + 1 == nextLine:
+                return nextPos
+            pos = find(b'\n', pos, nextPos)
+            if pos < 0:
+                return None
+            pos += 1
+            cur += 1
+        return pos
+
+    def lineOfOffset(self, pos):
+        """
+        Return the number of the line that contains byte ``pos``.
+        """
+        k = bisect.bisect_right(self.offsets, pos) - 1
+        line, start = self.lineNos[k], self.offsets[k]
+
+        # Count the line breaks between the checkpoint and ``pos`` in
+        # blocks to keep the memory footprint small (``pos`` may lie
+        # far beyond the last checkpoint while the index is built).
+        while start < pos:
+            stop = min(pos, start + self.blockSize)
+            line += self.mm[start:stop].count(b'\n')
+            start = stop
+        return line
+
+    def lines(self, first, num):
+        """
+        Return up to ``num`` decoded lines starting at line ``first``.
+        """
+        pos = self.lineOffset(first)
+        if pos is None:
+            return []
+
+        mm, out = self.mm, []
+        while (len(out) < num) and (first + len(out) < self.numLines):
+            stop = mm.find(b'\n', pos, pos + self.maxLineBytes)
+            if stop < 0:
+                # Either the last line or an overly long one. The next
+                # line starts either within one block, or else at the
+                # first checkpoint after ``pos`` since every line that
+                # starts in a block produces a checkpoint.
+                data = mm[pos:pos + self.maxLineBytes]
+                stop = mm.find(b'\n', pos + len(data), pos + self.blockSize)
+                if stop < 0:
+                    k = bisect.bisect_right(self.offsets, pos)
+                    if k < len(self.offsets):
+                        stop = self.offsets[k] - 1
+            else:
+                data = mm[pos:stop]
+            out.append(data.rstrip(b'\r').decode('utf-8', 'replace'))
+            if stop < 0:
+                break
+            pos = stop + 1
+        return out
+
+
+class LineIndexWorker(QtCore.QObject):
+    """
+    Build the checkpoints of a ``LineIndex`` in a separate thread.
+
+    The checkpoints are delivered in batches via ``sigCheckpoints``,
+    and the GUI thread adds them to the index.
+    """
+    # Number of blocks to scan before reporting the progress.
+    blocksPerBatch = 64
+
+    # Arguments: memory map, block size.
+    sigStart = QtCore.pyqtSignal(object, int)
+
+    # Arguments: line numbers, offsets, lines so far, done flag.
+    sigCheckpoints = QtCore.pyqtSignal(object, object, int, bool)
+
+    def __init__(self):
+        super().__init__()
+        self.sigStart.connect(self.build)
+        self.abort = False
+
+    @QtCore.pyqtSlot(object, int)
+    def build(self, mm, blockSize):
+        size = len(mm)
+        lineNos, offsets = array.array('Q'), array.array('Q')
+
+        # Invariant: ``numBreaks`` is the number of line breaks
+        # before ``pos``.
+        pos = blockSize
+        numBreaks = mm[:blockSize].count(b'\n')
+        lastOffset = 0
+        batch = 0
+        while (pos < size) and not self.abort:
+            # Find the first line that starts inside the current
+            # block (if any). The search must not run past the block
+            # because a single long line would otherwise scan the
+            # rest of the file for every block it spans.
+            nl = mm.find(b'\n', pos - 1, pos + blockSize - 1)
+            if (nl >= 0) and (nl + 1 > lastOffset):
+                lastOffset = nl + 1
+                lineNo = numBreaks if nl == pos - 1 else numBreaks + 1
+                lineNos.append(lineNo)
+                offsets.append(nl + 1)
+
+            # Count the line breaks in the current block.
+            numBreaks += mm[pos:pos + blockSize].count(b'\n')
+            pos += blockSize
+
+            # Hand the checkpoints found so far to the GUI thread.
+            batch += 1
+            if batch == self.blocksPerBatch:
+                self.sigCheckpoints.emit(lineNos, offsets,
+                                         numBreaks + 1, False)
+                lineNos, offsets = array.array('Q'), array.array('Q')
+                batch = 0
+
+        if not self.abort:
+            self.sigCheckpoints.emit(lineNos, offsets, numBreaks + 1, True)
+
+
+class LargeFileView(QtGui.QAbstractScrollArea):
+    """
+    Render the visible lines of a ``LineIndex``.
+
+    The vertical scroll bar counts lines, not pixels.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFont(QtGui.QFont('courier new'))
+        self.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+
+        self.qteIndex = LineIndex(None)
+        self.topLine = 0
+        self.cursorLine = 0
+
+    def qteSetIndex(self, index):
+        """
+        Display the file described by the ``LineIndex`` ``index``.
+        """
+        self.qteIndex = index
+        self.topLine = self.cursorLine = 0
+        self.qteIndexChanged()
+
+    def qteIndexChanged(self):
+        """
+        Adjust the scroll bar after new checkpoints were added.
+        """
+        num = self.qteVisibleLines()
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(0, self.qteIndex.numLines - num))
+        bar.setPageStep(num)
+        self.viewport().update()
+
+    def qteVisibleLines(self):
+        """
+        Return the number of lines that fit into the viewport.
+        """
+        height = self.fontMetrics().lineSpacing()
+        return max(1, self.viewport().height() // height)
+
+    def qteSetCursorLine(self, line):
+        """
+        Move the cursor to ``line`` and scroll it into view if necessary.
+        """
+        line = max(0, min(line, self.qteIndex.numLines - 1))
+        self.cursorLine = line
+        num = self.qteVisibleLines()
+        if line < self.topLine:
+            self.verticalScrollBar().setValue(line)
+        elif line >= self.topLine + num:
+            self.verticalScrollBar().setValue(line - num + 1)
+        self.viewport().update()
+
+    def scrollContentsBy(self, dx, dy):
+        self.topLine = self.verticalScrollBar().value()
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.qteIndexChanged()
+
+    def paintEvent(self, event):
+        if self.qteIndex.mm is None:
+            return
+
+        painter = QtGui.QPainter(self.viewport())
+        metrics = self.fontMetrics()
+        height = metrics.lineSpacing()
+        width = self.viewport().width()
+        num = self.qteVisibleLines() + 1
+
+        for ii, text in enumerate(self.qteIndex.lines(self.topLine, num)):
+            y = ii * height
+            if self.topLine + ii == self.cursorLine:
+                rect = QtCore.QRect(0, y, width, height)
+                painter.fillRect(rect, self.palette().highlight())
+            painter.drawText(2, y + metrics.ascent(), text)
+        painter.end()
+
+
+class LargeFileViewer(QtmacsApplet):
+    """
+    Memory mapped, read-only file viewer.
+
+    |Args|
+
+    * ``appletID`` (**str**): unique ID used by ``QtmacsMain`` to
+      distinguish applets.
+    """
+    # Number of bytes to search per event loop iteration.
+    searchChunkSize = 2 ** 24
+
+    def __init__(self, appletID):
+        # Initialise the base classes.
+        super().__init__(appletID)
+
+        # Initialise the file handle and file name.
+        self.file = self.fileName = None
+        self._qteMMap = None
+
+        # Add the view and put it into a layout.
+        self.qteView = self.qteAddWidget(LargeFileView(self))
+        vbox = QtGui.QVBoxLayout()
+        vbox.addWidget(self.qteView)
+        self.setLayout(vbox)
+
+        # Build the index in a separate thread.
+        self._qteWorker = LineIndexWorker()
+        self._qteThread = QtCore.QThread()
+        self._qteWorker.moveToThread(self._qteThread)
+        self._qteWorker.sigCheckpoints.connect(
+            self.qteAddCheckpoints, type=QtCore.Qt.QueuedConnection)
+        self._qteThread.start()
+
+        # The search in progress (a generator, see ``_qteSearchChunks``)
+        # and the timer that advances it whenever the GUI is idle.
+        self._qteSearch = None
+        self._qteSearchText = None
+        self._qteSearchTimer = QtCore.QTimer()
+        self._qteSearchTimer.timeout.connect(self._qteSearchStep)
+
+        # Register the navigation macros and bind them to the view.
+        macro_list = ((NextLine, '<ctrl>+n'),
+                      (NextLine, '<down>'),
+                      (PreviousLine, '<ctrl>+p'),
+                      (PreviousLine, '<up>'),
+                      (ScrollDown, '<ctrl>+v'),
+                      (ScrollUp, '<alt>+v'),
+                      (EndOfDocument, '<alt>+>'),
+                      (BeginningOfDocument, '<alt>+<'),
+                      (SearchForward, '<ctrl>+s'),
+                      )
+        for macroCls, keysequence in macro_list:
+            name = self.qteMain.qteRegisterMacro(macroCls)
+            self.qteMain.qteBindKeyWidget(keysequence, name, self.qteView)
+
+        self.loadFile(appletID)
+
+    def loadFile(self, fileName):
+        """
+        Memory map ``fileName`` and start indexing it.
+        """
+        self.file = QtCore.QFile(fileName)
+        if not self.file.exists():
+            msg = "File <b>{}</b> does not exist".format(self.qteAppletID())
+            self.qteLogger.info(msg)
+            return
+        self.fileName = fileName
+
+        # Map the file. This fails for empty files, which are simply
+        # displayed as such.
+        try:
+            with open(fileName, 'rb') as handle:
+                self._qteMMap = mmap.mmap(handle.fileno(), 0,
+                                          access=mmap.ACCESS_READ)
+        except ValueError:
+            self._qteMMap = None
+        except OSError as err:
+            msg = 'Cannot map <b>{}</b>: {}'.format(fileName, err)
+            self.qteLogger.error(msg)
+            return
+
+        self.qteView.qteSetIndex(LineIndex(self._qteMMap))
+        if self._qteMMap is not None:
+            self._qteWorker.sigStart.emit(self._qteMMap, LineIndex.blockSize)
+
+    def qteAddCheckpoints(self, lineNos, offsets, numLines, complete):
+        """
+        Add a batch of checkpoints from the worker to the index.
+        """
+        index = self.qteView.qteIndex
+        index.qteAddCheckpoints(lineNos, offsets, numLines, complete)
+        self.qteView.qteIndexChanged()
+        if complete:
+            msg = 'Indexed <b>{}</b> lines of <b>{}</b>.'
+            self.qteMain.qteStatus(msg.format(numLines, self.fileName))
+
+    def qteSearch(self, text):
+        """
+        Search ``text`` after the cursor line and move the cursor to
+        the first match.
+
+        The file is searched in chunks while the GUI is idle, and the
+        search wraps around at the end of the file. A new search
+        cancels the previous one.
+
+        |Args|
+
+        * ``text`` (**str**): literal search string.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        wid = self.qteView
+        index = wid.qteIndex
+        if index.mm is None:
+            return
+
+        # Search from the start of the next line, and from the start
+        # of the file if nothing was found.
+        start = index.lineOffset(wid.cursorLine + 1)
+        if start is None:
+            start = index.size
+        needle = text.encode('utf-8')
+        self._qteSearch = self._qteSearchChunks(index.mm, needle, start)
+        self._qteSearchText = text
+        self._qteSearchTimer.start(0)
+        self.qteMain.qteStatus('Searching <b>{}</b>...'.format(text))
+
+    def _qteSearchChunks(self, mm, needle, start):
+        """
+        Generator that searches ``needle`` in ``mm`` one chunk at a
+        time, first from ``start`` to the end and then from the
+        beginning to ``start``.
+
+        Yields **None** after every chunk without a match, and finally
+        the offset of the match, or -1 if there is none.
+        """
+        # Consecutive chunks overlap to find matches on their border.
+        chunk = self.searchChunkSize
+        overlap = len(needle) - 1
+        for first, last in ((start, len(mm)), (0, start)):
+            for pos in range(first, last, chunk):
+                stop = min(last, pos + chunk + overlap)
+                match = mm.find(needle, pos, stop)
+                if match >= 0:
+                    yield match
+                    return
+                yield None
+        yield -1
+
+    def _qteSearchStep(self):
+        """
+        Search the next chunk and move the cursor to the match.
+        """
+        pos = next(self._qteSearch)
+        if pos is None:
+            return
+        self._qteSearchTimer.stop()
+        self._qteSearch = None
+
+        text = self._qteSearchText
+        if pos < 0:
+            msg = 'No match for <b>{}</b>.'.format(text)
+            self.qteMain.qteStatus(msg)
+            return
+
+        # Lines that were not yet indexed cannot be displayed.
+        index = self.qteView.qteIndex
+        line = index.lineOfOffset(pos)
+        if line >= index.numLines:
+            msg = 'Match in line <b>{}</b> is not yet indexed.'
+            self.qteMain.qteStatus(msg.format(line + 1))
+            return
+        self.qteView.qteSetCursorLine(line)
+        self.qteMain.qteStatus('')
+
+    def qteToBeKilled(self):
+        """
+        Stop the search, stop the indexing thread, and unmap the file.
+        """
+        self._qteSearchTimer.stop()
+        self._qteSearch = None
+        self._qteWorker.abort = True
+        self._qteThread.quit()
+        self._qteThread.wait()
+        if self._qteMMap is not None:
+            self._qteMMap.close()
+            self._qteMMap = None
+
+
+class NextLine(QtmacsMacro):
+    """
+    Move the cursor to the next line.
+
+    |Signature|
+
+    * *applet*: 'LargeFileViewer'
+    * *widget*: ``LargeFileView``
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('LargeFileViewer')
+        self.qteSetWidgetSignature('LargeFileView')
+
+    def qteRun(self):
+        self.qteWidget.qteSetCursorLine(self.qteWidget.cursorLine + 1)
+
+
+class PreviousLine(QtmacsMacro):
+    """
+    Move the cursor to the previous line.
+
+    |Signature|
+
+    * *applet*: 'LargeFileViewer'
+    * *widget*: ``LargeFileView``
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('LargeFileViewer')
+        self.qteSetWidgetSignature('LargeFileView')
+
+    def qteRun(self):
+        self.qteWidget.qteSetCursorLine(self.qteWidget.cursorLine - 1)
+
+
+class ScrollDown(QtmacsMacro):
+    """
+    Scroll down by approximately as much as is currently visible.
+
+    |Signature|
+
+    * *applet*: 'LargeFileViewer'
+    * *widget*: ``LargeFileView``
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('LargeFileViewer')
+        self.qteSetWidgetSignature('LargeFileView')
+
+    def qteRun(self):
+        # Move the visible portion down by 90% of the visible lines
+        # and place the cursor on the first visible line.
+        wid = self.qteWidget
+        bar = wid.verticalScrollBar()
+        bar.setValue(bar.value() + int(0.9 * wid.qteVisibleLines()))
+        wid.qteSetCursorLine(wid.topLine)
+
+
+class ScrollUp(QtmacsMacro):
+    """
+    Scroll up by approximately as much as is currently visible.
+
+    |Signature|
+
+    * *applet*: 'LargeFileViewer'
+    * *widget*: ``LargeFileView``
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('LargeFileViewer')
+        self.qteSetWidgetSignature('LargeFileView')
+
+    def qteRun(self):
+        wid = self.qteWidget
+        bar = wid.verticalScrollBar()
+        bar.setValue(bar.value() - int(0.9 * wid.qteVisibleLines()))
+        wid.qteSetCursorLine(wid.topLine)
+
+
+class EndOfDocument(QtmacsMacro):
+    """
+    Move the cursor to the last line indexed so far.
+
+    |Signature|
+
+    * *applet*: 'LargeFileViewer'
+    * *widget*: ``LargeFileView``
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('LargeFileViewer')
+        self.qteSetWidgetSignature('LargeFileView')
+
+    def qteRun(self):
+        self.qteWidget.qteSetCursorLine(self.qteWidget.qteIndex.numLines - 1)
+
+
+class BeginningOfDocument(QtmacsMacro):
+    """
+    Move the cursor to the first line.
+
+    |Signature|
+
+    * *applet*: 'LargeFileViewer'
+    * *widget*: ``LargeFileView``
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('LargeFileViewer')
+        self.qteSetWidgetSignature('LargeFileView')
+
+    def qteRun(self):
+        self.qteWidget.qteSetCursorLine(0)
+
+
+class SearchForward(QtmacsMacro):
+    """
+    Search the file for a literal string, starting after the cursor.
+
+    The search wraps around at the end of the file and runs in the
+    background (see ``LargeFileViewer.qteSearch``).
+
+    |Signature|
+
+    * *applet*: 'LargeFileViewer'
+    * *widget*: ``LargeFileView``
+    """
+    class Query(MiniAppletBaseQuery):
+        """
+        Query the search string and move the cursor to the next match.
+        """
+        def generateCompletions(self, entry):
+            return None
+
+        def inputCompleted(self, userInput):
+            if len(userInput) > 0:
+                self.qteApplet.qteSearch(userInput)
+
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('LargeFileViewer')
+        self.qteSetWidgetSignature('LargeFileView')
+        self.qteQueryHistory = []
+
+    def qteRun(self):
+        query = self.Query(self.qteApplet, self.qteWidget,
+                           prefix='Search:', history=self.qteQueryHistory)
+        self.qteMain.qteAddMiniApplet(query)
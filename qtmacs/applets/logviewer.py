@@ -28,13 +28,21 @@ and errors (red). If a stack trace is available it prints a formatted
 version of it that resembles the stack trace usually seen by the
 Python interpreter itself.
 
-This applet is based on ``QTextEdit`` and thus capable of interpreting
-HTML tags. For instance, calling::
+The messages may contain the HTML tags common in Qtmacs log messages
+but, for performance reasons, they are not rendered as HTML. Instead,
+the <b> and <br/> tags of warnings and errors are emulated with
+character formats, and all tags are removed from debug and info
+messages. For instance, calling::
 
-    qteMain.qteLogger.info('This is a <b>bold</b> statement')
+    qteMain.qteLogger.error('This is a <b>bold</b> statement')
 
 will result in the message \"This is a **bold** statement\".
 
+Only the most recent ``LogViewer.maxBlocks`` lines are displayed, and
+<ctrl>+c l cycles through the minimum log level to display. This only
+hides or reveals the lines that exist already, and does not render
+them again.
+
 .. note: This is (one of the few) modules that Qtmacs automatically
    registers and instantiates at startup.
 
@@ -45,15 +53,23 @@ As with every applet, do **not** use::
 """
 
 import re
+import html
 import logging
 import traceback
+import qtmacs.base_macro
 import qtmacs.base_applet
 import qtmacs.logging_handler
+import qtmacs.qte_global as qte_global
 import qtmacs.extensions.qtmacstextedit_widget
 from PyQt4 import QtCore, QtGui
 
 # Shorthands:
 QtmacsTextEdit = qtmacs.extensions.qtmacstextedit_widget.QtmacsTextEdit
+QtmacsMacro = qtmacs.base_macro.QtmacsMacro
+
+# HTML tags, and those that denote a line break.
+_tagRe = re.compile(r'(<[^>]*>)')
+_breakRe = re.compile(r'<br\s*/?>', re.IGNORECASE)
 
 
 class LogViewer(qtmacs.base_applet.QtmacsApplet):
@@ -70,6 +86,14 @@ class LogViewer(qtmacs.base_applet.QtmacsApplet):
     """
     sigLogReady = QtCore.pyqtSignal()
 
+    # Maximum number of lines (ie. text blocks) in the document. The
+    # oldest lines are removed first.
+    maxBlocks = 5000
+
+    # The log levels that <ctrl>+c l cycles through.
+    filterLevels = (logging.DEBUG, logging.INFO, logging.WARNING,
+                    logging.ERROR)
+
     def __init__(self, appletID):
         # Initialise the base class.
         super().__init__(appletID)
@@ -86,6 +110,10 @@ class LogViewer(qtmacs.base_applet.QtmacsApplet):
         # macros are compatible.
         self.qteSetAppletSignature('QTextEdit')
 
+        # Limit the size of the document. Qt removes the oldest text
+        # blocks automatically once the limit is exceeded.
+        self.qteText.document().setMaximumBlockCount(self.maxBlocks)
+
         # Make sure the cursor is at the end of the buffer. This will
         # ensure that subsequently added log entries remain visible, ie.
         # the QTextEdit will auto-scroll with the text.
@@ -96,7 +124,22 @@ class LogViewer(qtmacs.base_applet.QtmacsApplet):
                              'WARNING': 'Blue', 'ERROR': 'Red',
                              'CRITICAL': 'Purple'}
 
-        # Count the number of processed log records.
+        # Character formats for the message types, and for the stack
+        # traces (created on demand by ``qteCharFormat``).
+        self._qteCharFormats = {}
+
+        # Lines with a smaller log level are hidden. Every text block
+        # stores the level of its record as its user state.
+        self.qteMinLevel = logging.DEBUG
+
+        # The document is empty until the first line was inserted.
+        self._qteEmpty = True
+
+        # Cycle through the log levels with <ctrl>+c l.
+        name = self.qteMain.qteRegisterMacro(CycleLogLevel)
+        self.qteMain.qteBindKeyWidget('<ctrl>+c l', name, self.qteText)
+
+        # Sequence number of the next log record to process.
         self.qteLogCnt = 0
 
         # Format the output messages as "{INFO, WARNING,...} - message".
@@ -104,7 +147,8 @@ class LogViewer(qtmacs.base_applet.QtmacsApplet):
 
         # Instantiate a custom logging handler that uses Qt signals.
         self.logHandler = qtmacs.logging_handler.QtmacsLoggingHandler(
-            self.sigLogReady)
+            self.sigLogReady, capacity=qte_global.log_capacity,
+            spillFile=qte_global.log_spill_file)
         self.logHandler.setLevel(logging.DEBUG)
         self.logHandler.setFormatter(log_format)
 
@@ -124,74 +168,119 @@ class LogViewer(qtmacs.base_applet.QtmacsApplet):
         # Register shutdown handler.
         self.qteMain.qtesigCloseQtmacs.connect(self.qteToBeKilled)
 
+    def qteCharFormat(self, levelname, bold=False, fixed=False):
+        """
+        Return the (cached) character format for messages of type
+        ``levelname``.
+        """
+        key = (levelname, bold, fixed)
+        if key not in self._qteCharFormats:
+            fmt = QtGui.QTextCharFormat()
+            col = self.qteColorCode.get(levelname, 'Black')
+            fmt.setForeground(QtGui.QBrush(QtGui.QColor(col)))
+            if bold:
+                fmt.setFontWeight(QtGui.QFont.Bold)
+            if fixed:
+                fmt.setFontFamily('Monospace')
+            self._qteCharFormats[key] = fmt
+        return self._qteCharFormats[key]
+
     def qteFormatMessage(self, logRecord, numRepeat):
+        """
+        Return the lines of ``logRecord`` as a list of lists of
+        (text, char format) tuples.
+        """
         # Shorthand.
-        msg = logRecord.msg
+        msg = logRecord.getMessage()
+        levelname = logRecord.levelname
 
         # Bring up the log viewer automatically for any of the
         # following log levels.
-        if logRecord.levelname in ('ERROR', 'CRITICAL'):
+        if levelname in ('ERROR', 'CRITICAL'):
             self.qteAutoActivate = True
 
-        if logRecord.exc_info:
-            # If an error trace exists format it with the help of the
-            # traceback module. The result is a list of strings which
-            # end in a new line character.
-            tb_format = traceback.format_exception(*logRecord.exc_info)
-
-            # Join the list into a string and pre-pend some
-            # whitespaces to improve the readability in the message
-            # applet. Escape the '<' symbol with '&lt;'.
-            out = ''
-            for _ in tb_format:
-                out += '  ' + _.replace('<', '&lt;')
-
-            # Strip trailing white spaces and add the PRE tag to
-            # ensure that the text is displayed verbatim because the
-            # text edit widget interprets HTML.
-            out = out.strip('\n')
-            tb_format = '<HR><PRE>' + out + '</PRE><HR><br />'
-            del out
-        elif logRecord.stack_info:
-            # No error trace but a stack trace was provided. The stack
-            # trace is directly available as a string and there is no
-            # need for an extra formatting function from the traceback
-            # module. The string is split into lines to prefix them
-            # with some white space characters for better readability
-            # in the log.
-            stack = logRecord.stack_info.split('\n')
-
-            # Join the list into a string and pre-pend a some white
-            # spaces to improve the readability in the message
-            # applet. Escape the '<' symbol with '&lt;'. Also add the
-            # newline character removed by the split method above.
-            out = ''
-            for _ in stack:
-                out += '  ' + _.replace('<', '&lt;') + '\n'
-
-            # Strip trailing white spaces and add the PRE tag to
-            # ensure that the text is displayed verbatim because the
-            # text edit widget interprets HTML.
-            out = out.strip('\n')
-            tb_format = '<HR><PRE>' + out + '</PRE><HR><br />'
-            del out
-        else:
-            tb_format = '<br />'
-
-        # Add a line that specifies the number of repetitions.
+        # Add a note that specifies the number of repetitions.
         if numRepeat > 0:
-            rep_msg = ' -- (Repeated {} times)'.format(numRepeat)
+            msg += ' -- (Repeated {} times)'.format(numRepeat)
+
+        fmt = self.qteCharFormat(levelname)
+        if logRecord.levelno < logging.WARNING:
+            # Debug and info messages are plain text: remove all tags
+            # and replace the HTML entities.
+            msg = _breakRe.sub('\n', msg)
+            msg = html.unescape(_tagRe.sub('', msg))
+            lines = [[(_, fmt)] for _ in msg.split('\n')]
         else:
-            rep_msg = ""
-
-        # Pick the appropriate color for the message type.
-        try:
-            col = self.qteColorCode[logRecord.levelname]
-        except KeyError:
-            col = 'Black'
-
-        # Return the HTML formatted message.
-        return '<font color="{}">'.format(col) + msg + rep_msg + tb_format
+            # Emulate the <b> and <br/> tags of all other messages
+            # with character formats and line breaks, respectively.
+            fmtBold = self.qteCharFormat(levelname, bold=True)
+            lines = [[]]
+            bold = False
+            for part in _tagRe.split(msg):
+                tag = part.lower().replace(' ', '')
+                if tag == '<b>':
+                    bold = True
+                elif tag == '</b>':
+                    bold = False
+                elif _breakRe.match(part):
+                    lines.append([])
+                elif part.startswith('<'):
+                    continue
+                elif part != '':
+                    lines[-1].append((html.unescape(part),
+                                      fmtBold if bold else fmt))
+
+        # Add the error- or stack trace (if any) in a fixed width
+        # font, indented to improve its readability.
+        if logRecord.exc_info or logRecord.exc_text:
+            # The logging handler usually formatted the error trace
+            # already (see ``exc_text``).
+            if logRecord.exc_text:
+                trace = logRecord.exc_text
+            else:
+                trace = ''.join(traceback.format_exception(
+                    *logRecord.exc_info))
+        elif logRecord.stack_info:
+            trace = logRecord.stack_info
+        else:
+            trace = None
+        if trace is not None:
+            fmtFixed = self.qteCharFormat(levelname, fixed=True)
+            for line in trace.strip('\n').split('\n'):
+                lines.append([('  ' + line, fmtFixed)])
+        return lines
+
+    def qteFormatDropped(self, numDropped):
+        """
+        Return a note that ``numDropped`` log records were evicted
+        from the log buffer before they could be displayed.
+        """
+        msg = '{} log records were dropped'.format(numDropped)
+        spill = self.logHandler.spillHandler
+        if spill is not None:
+            msg += ' (see {})'.format(spill.baseFilename)
+        fmt = QtGui.QTextCharFormat()
+        fmt.setForeground(QtGui.QBrush(QtGui.QColor('Gray')))
+        fmt.setFontItalic(True)
+        return [[(msg + '.', fmt)]]
+
+    def qteInsertLines(self, cursor, lines, levelno):
+        """
+        Insert ``lines`` (see ``qteFormatMessage``) at ``cursor`` and
+        tag each line with ``levelno``.
+        """
+        for line in lines:
+            # Start a new text block for every line, except for the
+            # very first one in the document.
+            if self._qteEmpty:
+                self._qteEmpty = False
+            else:
+                cursor.insertBlock()
+            block = cursor.block()
+            block.setUserState(levelno)
+            block.setVisible(levelno >= self.qteMinLevel)
+            for text, fmt in line:
+                cursor.insertText(text, fmt)
 
     def qteUpdateLogSlot(self):
         """
@@ -199,14 +288,22 @@ class LogViewer(qtmacs.base_applet.QtmacsApplet):
         """
 
         # Fetch all log records that have arrived since the last
-        # fetch() call and update the record counter.
+        # fetch() call and update the record counter. Records that
+        # were evicted from the ring buffer in the meantime are lost.
+        numDropped = max(0, self.logHandler.firstSeq - self.qteLogCnt)
         log = self.logHandler.fetch(start=self.qteLogCnt)
-        self.qteLogCnt += len(log)
 
         # Return immediately if no log message is available (this case
         # should be impossible).
         if not len(log):
             return
+        self.qteLogCnt = log[-1].qteSeq + 1
+
+        # Only the last ``maxBlocks`` lines will remain in the
+        # document. Skip all records that would be removed right
+        # away anyway (records have at least one line each).
+        if len(log) > self.maxBlocks:
+            log = log[-self.maxBlocks:]
 
         # Remove all duplicate entries and count their repetitions.
         log_pruned = []
@@ -216,8 +313,10 @@ class LogViewer(qtmacs.base_applet.QtmacsApplet):
             # If the previous log message is identical to the current
             # one increase its repetition counter. If the two log
             # messages differ, add the last message to the output log
-            # and reset the repetition counter.
-            if last_entry.msg == cur_entry.msg:
+            # and reset the repetition counter. Messages with %-style
+            # arguments are only identical if their arguments are.
+            if (last_entry.msg == cur_entry.msg) and \
+               (last_entry.args == cur_entry.args):
                 num_rep += 1
             else:
                 log_pruned.append([last_entry, num_rep])
@@ -227,15 +326,19 @@ class LogViewer(qtmacs.base_applet.QtmacsApplet):
         # The very last entry must be added by hand.
         log_pruned.append([cur_entry, num_rep])
 
-        # Format the log entries (eg. color coding etc.)
-        log_formatted = ""
-        for cur_entry in log_pruned:
-            log_formatted += self.qteFormatMessage(cur_entry[0], cur_entry[1])
-            log_formatted + '\n'
-
-        # Insert the formatted text all at once as calls to insertHtml
-        # are expensive.
-        self.qteText.insertHtml(log_formatted)
+        # Append the log entries (eg. color coding etc.) to the end
+        # of the document. Group all changes into a single edit
+        # block to lay out the document only once.
+        cursor = QtGui.QTextCursor(self.qteText.document())
+        cursor.movePosition(QtGui.QTextCursor.End)
+        cursor.beginEditBlock()
+        if numDropped > 0:
+            self.qteInsertLines(cursor, self.qteFormatDropped(numDropped),
+                                logging.CRITICAL)
+        for cur_entry, num_rep in log_pruned:
+            lines = self.qteFormatMessage(cur_entry, num_rep)
+            self.qteInsertLines(cursor, lines, cur_entry.levelno)
+        cursor.endEditBlock()
         self.qteMoveToEndOfBuffer()
 
         # If the log contained an error (or something else of interest
@@ -245,6 +348,35 @@ class LogViewer(qtmacs.base_applet.QtmacsApplet):
             self.qteAutoActivate = False
             self.qteMain.qteMakeAppletActive(self)
 
+    def qteSetMinLevel(self, levelno):
+        """
+        Hide all lines with a log level below ``levelno``.
+
+        The lines are only hidden, not removed or re-formatted.
+
+        |Args|
+
+        * ``levelno`` (**int**): minimum log level (eg. logging.INFO).
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        self.qteMinLevel = levelno
+        doc = self.qteText.document()
+        block = doc.begin()
+        while block.isValid():
+            block.setVisible(block.userState() >= levelno)
+            block = block.next()
+
+        # Lay out the document again (the text itself is unchanged).
+        doc.markContentsDirty(0, doc.characterCount())
+        self.qteMoveToEndOfBuffer()
+
     def qteMoveToEndOfBuffer(self):
         """
         Move cursor to the end of the buffer to facilitate auto
@@ -268,3 +400,35 @@ class LogViewer(qtmacs.base_applet.QtmacsApplet):
             self.sigLogReady.disconnect(self.qteUpdateLogSlot)
         except Exception:
             pass
+
+
+class CycleLogLevel(QtmacsMacro):
+    """
+    Cycle through the minimum log level displayed in the LogViewer.
+
+    |Signature|
+
+    * *applet*: 'QTextEdit'
+    * *widget*: 'QtmacsTextEdit'
+
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('QTextEdit')
+        self.qteSetWidgetSignature('QtmacsTextEdit')
+
+    def qteRun(self):
+        # The macro is only bound in LogViewer applets.
+        app = self.qteApplet
+        if not isinstance(app, LogViewer):
+            return
+
+        # Select the next level and wrap around after the last one.
+        levels = app.filterLevels
+        if app.qteMinLevel in levels:
+            idx = (levels.index(app.qteMinLevel) + 1) % len(levels)
+        else:
+            idx = 0
+        app.qteSetMinLevel(levels[idx])
+        msg = 'Showing log messages from level {} upwards'
+        self.qteMain.qteStatus(msg.format(logging.getLevelName(levels[idx])))
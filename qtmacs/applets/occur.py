@@ -0,0 +1,424 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Search all ``QtmacsScintilla`` based applets for a regular expression.
+
+The ``occur-all-buffers`` macro (bound to ``<alt>+s o``) queries a
+regular expression, takes a snapshot of the text in every applet
+that contains a ``QtmacsScintilla`` widget, and scans these snapshots
+in parallel with a process pool (see ``qtmacs.occur_scan``). Every
+match is listed in the ``OccurResults`` applet as soon as the scan
+of the respective buffer has finished. Hitting <return> on a line activates the
+corresponding applet and places the cursor on the match.
+
+The text of hidden applets is read directly from their widget,
+ie. the applets are not made visible for the search. Applets of a
+restored session that were not shown yet (see ``QtmacsPlaceholder``)
+have no widget, which is why the worker processes read their file
+instead (provided they represent an applet in ``fileApplets``).
+
+As with every applet, do **not** use::
+
+    from qtmacs.applets.occur import OccurResults
+
+"""
+
+import re
+import zlib
+import functools
+import multiprocessing
+import concurrent.futures
+import concurrent.futures.process
+import qtmacs.session
+import qtmacs.occur_scan
+import qtmacs.qte_global as qte_global
+import qtmacs.miniapplets.base_query
+
+from PyQt4 import QtCore, QtGui
+from qtmacs.base_applet import QtmacsApplet
+from qtmacs.base_macro import QtmacsMacro
+from qtmacs.extensions.qtmacsscintilla_widget import QtmacsScintilla
+
+# Shorthands:
+MiniAppletBaseQuery = qtmacs.miniapplets.base_query.MiniAppletBaseQuery
+BrokenProcessPool = concurrent.futures.process.BrokenProcessPool
+QtmacsPlaceholder = qtmacs.session.QtmacsPlaceholder
+occurScan = qtmacs.occur_scan.occurScan
+
+# Applets whose ID is the name of the file they show in a
+# ``QtmacsScintilla`` widget. Placeholders for these applets are
+# searched by reading the file.
+fileApplets = ['SciEditor']
+
+# Process pool shared by all searches (created on demand).
+_occurPool = None
+
+
+def occurPool():
+    """
+    Return the process pool; create it if necessary.
+    """
+    global _occurPool
+    if _occurPool is None:
+        # Do not fork the (multi threaded) Qt process but start fresh
+        # interpreters for the workers.
+        context = multiprocessing.get_context('spawn')
+        _occurPool = concurrent.futures.ProcessPoolExecutor(
+            mp_context=context)
+
+        # Shut the pool down together with the application.
+        app = QtCore.QCoreApplication.instance()
+        app.aboutToQuit.connect(
+            functools.partial(_occurPool.shutdown, wait=False))
+    return _occurPool
+
+
+def resetOccurPool():
+    """
+    Discard the process pool, eg. because a worker died.
+
+    The next call to ``occurPool`` creates a new pool.
+    """
+    global _occurPool
+    if _occurPool is not None:
+        _occurPool.shutdown(wait=False)
+        _occurPool = None
+
+
+def scintillaWidget(appletObj):
+    """
+    Return the first ``QtmacsScintilla`` widget in ``appletObj``.
+
+    If the applet has no such widget then return **None**.
+    """
+    for wid in appletObj._qteAdmin.widgetList:
+        if isinstance(wid, QtmacsScintilla):
+            return wid
+    return None
+
+
+class OccurResults(QtmacsApplet):
+    """
+    List all lines in all buffers that match a regular expression.
+
+    |Args|
+
+    * ``appletID`` (**str**): unique ID used by ``QtmacsMain`` to
+      distinguish applets.
+    """
+    # Deliver the results from the process pool to the GUI thread.
+    sigHits = QtCore.pyqtSignal(object)
+
+    def __init__(self, appletID):
+        # Initialise the base class.
+        super().__init__(appletID)
+
+        # The list widget that displays one match per line.
+        self.qteList = self.qteAddWidget(QtGui.QListWidget(self))
+        vbox = QtGui.QVBoxLayout()
+        vbox.addWidget(self.qteList)
+        self.setLayout(vbox)
+
+        # The results arrive from the threads of the process pool
+        # and must therefore be delivered via the event loop.
+        self.sigHits.connect(self.qteAddHits, type=QtCore.Qt.QueuedConnection)
+
+        # ID of the current search, number of buffers still being
+        # searched, and the number of matches so far.
+        self._qteSearchID = 0
+        self._qtePending = 0
+        self._qteNumHits = 0
+
+        # Bind the navigation macros to the list widget.
+        register = self.qteMain.qteRegisterMacro
+        bind = self.qteMain.qteBindKeyWidget
+        name = register(JumpToOccurrence)
+        bind('<return>', name, self.qteList)
+        bind('<enter>', name, self.qteList)
+        name = register(NextOccurrence)
+        bind('<ctrl>+n', name, self.qteList)
+        bind('n', name, self.qteList)
+        name = register(PreviousOccurrence)
+        bind('<ctrl>+p', name, self.qteList)
+        bind('p', name, self.qteList)
+
+    @classmethod
+    def __qteRegisterAppletInit__(cls):
+        """
+        Register the ``occur-all-buffers`` macro and bind it globally.
+        """
+        qteMain = qte_global.qteMain
+        name = qteMain.qteRegisterMacro(OccurAllBuffers)
+        qteMain.qteBindKeyGlobal('<alt>+s o', name)
+
+    def qteSearch(self, pattern):
+        """
+        Search all ``QtmacsScintilla`` based applets for ``pattern``.
+
+        The results are added to the list as they arrive.
+        """
+        self._qteSearchID += 1
+        self._qtePending = 0
+        self._qteNumHits = 0
+        self.qteList.clear()
+
+        # Snapshot the text of all buffers. Python strings are
+        # immutable, which is why the user can continue editing
+        # while the worker processes scan them.
+        snapshots = []
+        for appletID in self.qteMain.qteGetAllAppletIDs():
+            appObj = self.qteMain.qteGetAppletHandle(appletID)
+
+            # Let the worker read the file of placeholders rather than
+            # creating their applet.
+            if isinstance(appObj, QtmacsPlaceholder):
+                if appObj.qtePlaceholderName in fileApplets:
+                    snapshots.append((appletID, None))
+                continue
+
+            wid = scintillaWidget(appObj)
+            if wid is None:
+                continue
+
+            # Search the compact state of hibernating applets instead
+            # of waking them up.
+            state = appObj.qteHibernationState()
+            if (state is not None) and ('text' in state):
+                text = zlib.decompress(state['text']).decode('utf-8')
+            else:
+                text = wid.qtePositionIndex().text()
+            snapshots.append((appletID, text))
+
+        if len(snapshots) == 0:
+            self.qteMain.qteStatus('No buffers to search.')
+            return
+
+        # Fall back to a sequential scan if the platform cannot
+        # provide a process pool.
+        try:
+            pool = occurPool()
+        except (ImportError, NotImplementedError, OSError):
+            pool = None
+            msg = 'Cannot create a process pool. Searching sequentially.'
+            self.qteLogger.warning(msg)
+
+        self._qtePending = len(snapshots)
+        for appletID, text in snapshots:
+            if pool is not None:
+                try:
+                    future = pool.submit(occurScan, appletID, text, pattern)
+                except (RuntimeError, BrokenProcessPool) as err:
+                    msg = ('The process pool failed (%s). Searching the'
+                           ' remaining buffers sequentially.')
+                    self.qteLogger.warning(msg, err)
+                    resetOccurPool()
+                    pool = None
+                else:
+                    callback = functools.partial(
+                        self._qteScanDone, self._qteSearchID, appletID)
+                    future.add_done_callback(callback)
+                    continue
+
+            _, hits = occurScan(appletID, text, pattern)
+            self.qteAddHits((self._qteSearchID, appletID, hits, None))
+
+    def _qteScanDone(self, searchID, appletID, future):
+        """
+        Forward the result of ``future`` to the GUI thread.
+
+        This method runs in a thread of the process pool, which is
+        why errors are only logged in ``qteAddHits``.
+        """
+        try:
+            _, hits = future.result()
+            error = None
+        except Exception as err:
+            hits, error = [], err
+        try:
+            self.sigHits.emit((searchID, appletID, hits, error))
+        except RuntimeError:
+            # The applet was killed in the meantime.
+            pass
+
+    def qteAddHits(self, data):
+        """
+        Add the matches found in one buffer to the list.
+        """
+        searchID, appletID, hits, error = data
+
+        # Replace the pool if one of its workers died.
+        if error is not None:
+            msg = 'Cannot search applet <b>%s</b>: %r'
+            self.qteLogger.error(msg, appletID, error)
+            if isinstance(error, BrokenProcessPool):
+                resetOccurPool()
+        if searchID != self._qteSearchID:
+            return
+
+        for line, col, text in hits:
+            label = '{}:{}:{}: {}'.format(appletID, line + 1, col + 1, text)
+            item = QtGui.QListWidgetItem(label)
+            item.setData(QtCore.Qt.UserRole, (appletID, line, col))
+            self.qteList.addItem(item)
+        self._qteNumHits += len(hits)
+
+        # Report the total once all buffers were searched.
+        self._qtePending -= 1
+        if self._qtePending == 0:
+            if self.qteList.currentRow() < 0 and self.qteList.count() > 0:
+                self.qteList.setCurrentRow(0)
+            msg = 'Found <b>{}</b> matches.'.format(self._qteNumHits)
+            self.qteMain.qteStatus(msg)
+
+    def qteJumpToOccurrence(self, appletID, line, col):
+        """
+        Activate the applet ``appletID`` and place the cursor at
+        ``line`` and ``col``.
+        """
+        appObj = self.qteMain.qteGetAppletHandle(appletID)
+        if appObj is None:
+            msg = 'Applet <b>{}</b> does not exist anymore.'.format(appletID)
+            self.qteMain.qteStatus(msg)
+            return
+
+        # Create the actual applet if it is still a placeholder.
+        appObj = self.qteMain.qteMaterialiseApplet(appObj)
+        wid = scintillaWidget(appObj)
+        self.qteMain.qteMakeAppletActive(appObj)
+        if wid is None:
+            return
+        appObj.qteMakeWidgetActive(wid)
+        wid.setCursorPosition(line, col)
+        wid.ensureLineVisible(line)
+
+
+class JumpToOccurrence(QtmacsMacro):
+    """
+    Jump to the match under the cursor.
+
+    |Signature|
+
+    * *applet*: 'OccurResults'
+    * *widget*: ``QListWidget``
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('OccurResults')
+        self.qteSetWidgetSignature('QListWidget')
+
+    def qteRun(self):
+        item = self.qteWidget.currentItem()
+        if item is None:
+            return
+        appletID, line, col = item.data(QtCore.Qt.UserRole)
+        self.qteApplet.qteJumpToOccurrence(appletID, line, col)
+
+
+class NextOccurrence(QtmacsMacro):
+    """
+    Move to the next match in the list.
+
+    |Signature|
+
+    * *applet*: 'OccurResults'
+    * *widget*: ``QListWidget``
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('OccurResults')
+        self.qteSetWidgetSignature('QListWidget')
+
+    def qteRun(self):
+        row = self.qteWidget.currentRow() + 1
+        if row < self.qteWidget.count():
+            self.qteWidget.setCurrentRow(row)
+
+
+class PreviousOccurrence(QtmacsMacro):
+    """
+    Move to the previous match in the list.
+
+    |Signature|
+
+    * *applet*: 'OccurResults'
+    * *widget*: ``QListWidget``
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('OccurResults')
+        self.qteSetWidgetSignature('QListWidget')
+
+    def qteRun(self):
+        row = self.qteWidget.currentRow() - 1
+        if row >= 0:
+            self.qteWidget.setCurrentRow(row)
+
+
+class OccurAllBuffers(QtmacsMacro):
+    """
+    Query a regular expression and list all its matches in all
+    ``QtmacsScintilla`` based applets.
+
+    |Signature|
+
+    * *applet*: '*'
+    * *widget*: '*'
+    """
+    class Query(MiniAppletBaseQuery):
+        """
+        Query the regular expression.
+        """
+        def generateCompletions(self, entry):
+            return None
+
+        def inputCompleted(self, userInput):
+            # Do nothing if the input is not a valid regular expression.
+            try:
+                re.compile(userInput)
+            except re.error:
+                msg = 'Invalid regular expression <b>{}</b>.'
+                self.qteMain.qteStatus(msg.format(userInput))
+                return
+
+            # Re-use the results applet if it already exists.
+            appletID = '**Occur**'
+            appObj = self.qteMain.qteGetAppletHandle(appletID)
+            if appObj is None:
+                appObj = self.qteMain.qteNewApplet('OccurResults', appletID)
+            if appObj is None:
+                return
+            self.qteMain.qteMakeAppletActive(appObj)
+            appObj.qteSearch(userInput)
+
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('*')
+        self.qteSetWidgetSignature('*')
+
+        # History of search patterns.
+        self.qteQueryHistory = []
+
+    def qteRun(self):
+        # Instantiate the query object to ask for the regular expression.
+        query = self.Query(self.qteApplet, self.qteWidget,
+                           prefix='Occur in all buffers (regexp):',
+                           history=self.qteQueryHistory)
+
+        # Install the query object as the mini applet and return
+        # control to the event loop.
+        self.qteMain.qteAddMiniApplet(query)
@@ -41,6 +41,14 @@ As with every applet, do **not** use::
 
 """
 
+import os
+import zlib
+import codecs
+import functools
+import contextlib
+import qtmacs.file_io
+import qtmacs.journal
+import qtmacs.file_watcher
 import qtmacs.type_check
 import qtmacs.qte_global as qte_global
 
@@ -49,6 +57,7 @@ from qtmacs.base_macro import QtmacsMacro
 from qtmacs.base_applet import QtmacsApplet
 from qtmacs.extensions.qtmacsscintilla_widget import QtmacsScintilla
 from qtmacs.auxiliary import QtmacsModeBar
+from qtmacs.exceptions import QtmacsOtherError
 
 # Import all the lexers currently supported by QScintilla as listed on
 # www.riverbankcomputing.co.uk/static/Docs/QScintilla2/classQsciLexer.html
@@ -64,6 +73,8 @@ from PyQt4.Qsci import QsciLexerVerilog, QsciLexerVHDL, QsciLexerYAML
 
 # Shorthands:
 type_check = qtmacs.type_check.type_check
+bom_codecs = qtmacs.file_io.bom_codecs
+detectEncoding = qtmacs.file_io.detectEncoding
 
 
 class CustomLexer(Qsci.QsciLexerPython):
@@ -96,7 +107,44 @@ lexer_type = {'py': QsciLexerPython,
               }
 
 
+def detectEolMode(head):
+    """
+    Return the most frequent end-of-line mode in ``head``.
+
+    If ``head`` contains no line terminator at all then return
+    **None**.
+
+    |Args|
+
+    * ``head`` (**str**): the first characters of the file.
+
+    |Returns|
+
+    * **QsciScintilla.EolMode**: EOL mode, or **None**.
+
+    |Raises|
+
+    * **None**
+    """
+    numDos = head.count('\r\n')
+    numUnix = head.count('\n') - numDos
+    numMac = head.count('\r') - numDos
+    if numDos == numUnix == numMac == 0:
+        return None
+    if numDos >= max(numUnix, numMac):
+        return QtmacsScintilla.EolWindows
+    elif numUnix >= numMac:
+        return QtmacsScintilla.EolUnix
+    else:
+        return QtmacsScintilla.EolMac
+
+
 class SciEditor(QtmacsApplet):
+    # Number of bytes read from disk and added to the widget at a
+    # time when loading a file. Files that are not larger than one
+    # chunk are loaded in one go, all others in the background.
+    loadChunkSize = 2 ** 20
+
     def __init__(self, appletID):
         # Initialise the base classes.
         super().__init__(appletID)
@@ -133,27 +181,38 @@ class SciEditor(QtmacsApplet):
             self.qteSavedState)
 
         # Query the end-of-line (EOL) mode and enforce it throughout
-        # the document.
-        eolmode = self.qteScintilla.eolMode()
-        self.qteScintilla.setEolMode(eolmode)
-
-        # Report the used EOL mode in the status buffer.
-        if eolmode == QtmacsScintilla.EolUnix:
-            self.qteMain.qteStatus('Using Unix EOL mode')
-            self._qteModeBar.qteChangeModeValue('EOL', 'Unix')
-        elif eolmode == QtmacsScintilla.EolWindows:
-            self.qteMain.qteStatus('Using Windows EOL mode')
-            self._qteModeBar.qteChangeModeValue('EOL', 'Dos')
-        elif eolmode == QtmacsScintilla.EolMac:
-            self.qteMain.qteStatus('Using Mac EOL mode')
-            self._qteModeBar.qteChangeModeValue('EOL', 'Mac')
-        else:
-            self.qteMain.qteStatus('Unknown EOL mode')
-            self._qteModeBar.qteChangeModeValue('EOL', 'Unknown')
+        # the document. The ``loadFile`` method overrides it with the
+        # mode found in the file.
+        self.qteSetEolMode(self.qteScintilla.eolMode())
 
         # Initialise the file handle and file name.
         self.file = self.fileName = None
 
+        # State of a file that is still being loaded in the
+        # background (see ``loadFile``).
+        self._qteLoadTimer = None
+        self._qteLoadHandle = None
+        self._qteLoadDecoder = None
+        self._qteLoadSize = self._qteLoadPos = 0
+        self.qteEncoding = 'utf-8'
+
+        # Undecodable bytes were replaced when the file was loaded,
+        # ie. saving the document would corrupt the file (see
+        # ``qteDecodingFailed``).
+        self.qteLossyDecoding = False
+
+        # Cursor position and first visible line to apply once the
+        # file is loaded (see ``qteRestoreSession``).
+        self._qteSessionCursor = None
+
+        # Size and last bytes of the file on disk as of the last time
+        # it was loaded, saved, or reloaded. They serve to detect
+        # whether the file was merely appended to.
+        self._qteDiskSize = 0
+        self._qteDiskTail = b''
+        self._qteTailDecoder = None
+        self._qteWatching = False
+
         # Load the file with name 'appletID'.
         self.loadFile(appletID)
 
@@ -206,6 +265,16 @@ class SciEditor(QtmacsApplet):
         tmp.insert(0, ('.*\.tex$', cls.__name__))
         tmp.insert(0, ('.*\.cpp$', cls.__name__))
 
+        # Register the macro to recover unsaved modifications, and
+        # point out if there is anything to recover.
+        qteMain = qte_global.qteMain
+        qteMain.qteRegisterMacro(RecoverBuffers)
+        num = len(qtmacs.journal.allJournals())
+        if num > 0:
+            msg = 'Found unsaved modifications for <b>{}</b> files. '
+            msg += 'Use <i>recover-buffers</i> to restore them.'
+            qteMain.qteLogger.warning(msg.format(num))
+
     def qteCursorPosChanged(self, line, col):
         # Update the line- and column number in the mode bar.
         msg = '({},{})'.format(line, col)
@@ -236,21 +305,608 @@ class SciEditor(QtmacsApplet):
         """
         self.qteScintilla.setModified(False)
 
-    def loadFile(self, fileName):
+    def qteSetEolMode(self, eolmode):
         """
-        Display the file ``fileName``.
+        Enforce ``eolmode`` and report it in the status bar.
         """
+        self.qteScintilla.setEolMode(eolmode)
+
+        # Report the used EOL mode in the status buffer.
+        if eolmode == QtmacsScintilla.EolUnix:
+            self.qteMain.qteStatus('Using Unix EOL mode')
+            self._qteModeBar.qteChangeModeValue('EOL', 'Unix')
+        elif eolmode == QtmacsScintilla.EolWindows:
+            self.qteMain.qteStatus('Using Windows EOL mode')
+            self._qteModeBar.qteChangeModeValue('EOL', 'Dos')
+        elif eolmode == QtmacsScintilla.EolMac:
+            self.qteMain.qteStatus('Using Mac EOL mode')
+            self._qteModeBar.qteChangeModeValue('EOL', 'Mac')
+        else:
+            self.qteMain.qteStatus('Unknown EOL mode')
+            self._qteModeBar.qteChangeModeValue('EOL', 'Unknown')
 
+    def loadFile(self, fileName, encoding=None, errors='strict'):
+        """
+        Display the file ``fileName``.
+
+        The file is read in chunks of ``loadChunkSize`` bytes and
+        appended to the widget with the native ``QsciScintilla``
+        methods, ie. neither the Qtmacs- nor the Scintilla undo
+        framework records anything. The encoding (unless specified
+        with ``encoding``) and the EOL mode are determined from the
+        first chunk. If a later chunk turns out to be invalid in that
+        encoding then ``qteDecodingFailed`` loads the file again.
+
+        If the file is larger than one chunk then the remaining
+        chunks are added from a timer event, ie. the GUI remains
+        responsive, and the progress is shown in the mode bar. The
+        widget is read-only until the file is complete.
+        """
         self.fileName = fileName
+
         # Assign QFile object with the current name.
         self.file = QtCore.QFile(fileName)
-        if self.file.exists():
-            # Load the file into the widget and reset the undo stack
-            # to delete the undo object create by the setText method.
-            # Without it, an undo operation would delete the content
-            # of the widget which is intuitive.
-            self.qteScintilla.setText(open(fileName).read())
-            self.qteScintilla.qteUndoStack.reset()
-        else:
+        if not self.file.exists():
             msg = "File <b>{}</b> does not exist".format(self.qteAppletID())
             self.qteLogger.info(msg)
+            self.qteStartJournal()
+            return
+
+        # Abort a previous load operation if it is still in progress.
+        self.qteStopLoading()
+
+        try:
+            handle = open(fileName, 'rb')
+            self._qteLoadSize = os.fstat(handle.fileno()).st_size
+            head = handle.read(self.loadChunkSize)
+        except OSError as err:
+            msg = 'Cannot open <b>{}</b>: {}'.format(fileName, err)
+            self.qteLogger.error(msg)
+            return
+        self._qteLoadPos = len(head)
+        self._qteLoadHandle = handle
+
+        # Determine the encoding and decode the file incrementally to
+        # correctly handle multi-byte characters that straddle two
+        # chunks. Undecodable bytes are only replaced if ``errors``
+        # explicitly asks for it, because otherwise saving the
+        # document would silently corrupt the file.
+        if encoding is None:
+            encoding = detectEncoding(head)
+        self.qteEncoding = encoding
+        self.qteLossyDecoding = (errors != 'strict')
+        decoder = codecs.getincrementaldecoder(self.qteEncoding)
+        self._qteLoadDecoder = decoder(errors=errors)
+        try:
+            text = self._qteLoadDecoder.decode(head, final=False)
+        except UnicodeDecodeError:
+            self.qteDecodingFailed()
+            return
+
+        # Adopt the EOL mode of the file (if it has any line breaks).
+        eolmode = detectEolMode(text)
+        if eolmode is not None:
+            self.qteSetEolMode(eolmode)
+
+        # The document is replaced (possibly by a reload, see
+        # ``qteDecodingFailed``), ie. the journal of its previous
+        # content is obsolete and must not record the load either.
+        # ``qteFinishLoading`` starts a new one.
+        SCI = self.qteScintilla
+        if SCI.qteJournal is not None:
+            SCI.qteJournal.qteClose()
+            SCI.qteJournal = None
+
+        # Bypass the undo framework of Scintilla while the file is
+        # loaded, and empty the widget with the native method (the
+        # overloaded ``setText`` would create an undo object with a
+        # copy of the entire document). Scintilla silently ignores
+        # the new text if the widget is still read-only from an
+        # aborted load.
+        SCI.SendScintilla(SCI.SCI_SETUNDOCOLLECTION, False)
+        SCI.setReadOnly(False)
+        Qsci.QsciScintilla.setText(SCI, text)
+
+        if self._qteLoadPos < self._qteLoadSize:
+            # Add the remaining chunks from a timer event to return
+            # control to the event loop in between.
+            SCI.setReadOnly(True)
+            self._qteLoadTimer = self.startTimer(0)
+            self.qteShowLoadProgress()
+        else:
+            self.qteFinishLoading()
+
+    def timerEvent(self, event):
+        """
+        Add the next chunk of the file that is being loaded.
+        """
+        if event.timerId() != self._qteLoadTimer:
+            super().timerEvent(event)
+            return
+
+        try:
+            data = self._qteLoadHandle.read(self.loadChunkSize)
+        except OSError as err:
+            msg = 'Error reading <b>{}</b>: {}'.format(self.fileName, err)
+            self.qteLogger.error(msg)
+            data = b''
+
+        self._qteLoadPos += len(data)
+        try:
+            text = self._qteLoadDecoder.decode(data, final=(len(data) == 0))
+        except UnicodeDecodeError:
+            self.qteDecodingFailed()
+            return
+        if len(text) > 0:
+            # Scintilla refuses to modify read-only documents.
+            SCI = self.qteScintilla
+            SCI.setReadOnly(False)
+            Qsci.QsciScintilla.append(SCI, text)
+            SCI.setReadOnly(True)
+
+        if len(data) == 0:
+            self.qteFinishLoading()
+        else:
+            self.qteShowLoadProgress()
+
+    def qteDecodingFailed(self):
+        """
+        Load the file again because it is not valid in the encoding
+        that was guessed from its first chunk.
+
+        Files without a byte order mark are loaded as Latin-1, which
+        maps every byte to a character and therefore writes the file
+        back unchanged. UTF-16/32 files are loaded with undecodable
+        bytes replaced, and the document remains read-only because
+        ``SaveFile`` would otherwise write the replacement characters
+        to disk.
+        """
+        if self.qteEncoding in ('utf-8', 'utf-8-sig'):
+            msg = '<b>{}</b> is not valid {}; loaded it as Latin-1.'
+            encoding, errors = 'latin-1', 'strict'
+        else:
+            msg = '<b>{}</b> is not valid {}; loaded it read-only.'
+            encoding, errors = self.qteEncoding, 'replace'
+        self.qteLogger.warning(msg.format(self.fileName, self.qteEncoding))
+        self.loadFile(self.fileName, encoding, errors)
+
+    def qteShowLoadProgress(self):
+        """
+        Show the fraction of the file loaded so far in the mode bar.
+        """
+        percent = 100 * self._qteLoadPos // max(1, self._qteLoadSize)
+        self._qteModeBar.qteChangeModeValue(
+            'OTHER', 'Loading {}%'.format(percent))
+
+    def qteStopLoading(self):
+        """
+        Stop the background loading of a file (if any).
+        """
+        if self._qteLoadTimer is not None:
+            self.killTimer(self._qteLoadTimer)
+            self._qteLoadTimer = None
+        if self._qteLoadHandle is not None:
+            self._qteLoadHandle.close()
+            self._qteLoadHandle = None
+
+    def qteFinishLoading(self):
+        """
+        Clean up after the file was loaded completely.
+        """
+        self.qteStopLoading()
+
+        # Re-enable the undo frameworks of Scintilla and Qtmacs, both
+        # starting with an empty history.
+        SCI = self.qteScintilla
+        SCI.SendScintilla(SCI.SCI_EMPTYUNDOBUFFER)
+        SCI.SendScintilla(SCI.SCI_SETUNDOCOLLECTION, True)
+        SCI.qteUndoStack.reset()
+
+        # Make the widget editable again (unless the file could not
+        # be decoded without loss) and declare the content pristine.
+        SCI.setReadOnly(self.qteLossyDecoding)
+        SCI.setModified(False)
+        self._qteModeBar.qteChangeModeValue('OTHER', '')
+        self.qteStartJournal()
+
+        # Move the cursor to where it was in the restored session.
+        if self._qteSessionCursor is not None:
+            line, col, firstLine = self._qteSessionCursor
+            SCI.setCursorPosition(line, col)
+            SCI.setFirstVisibleLine(firstLine)
+            self._qteSessionCursor = None
+
+        # Reload the file whenever it changes on disk.
+        self.qteRecordDiskState()
+        if not self._qteWatching:
+            qte_global.file_watcher.qteWatch(self.fileName,
+                                             self.qteFileChanged)
+            self._qteWatching = True
+
+    def qteStartJournal(self):
+        """
+        Record all modifications in a journal to recover them after
+        a crash.
+
+        No journal is started if one already exists for this file,
+        because it contains the unsaved modifications from an earlier
+        session that would otherwise be lost.
+        """
+        SCI = self.qteScintilla
+        if SCI.qteJournal is not None:
+            SCI.qteJournal.qteClose()
+            SCI.qteJournal = None
+
+        if os.path.exists(qtmacs.journal.journalName(self.fileName)):
+            msg = 'Unsaved modifications of <b>{}</b> exist. Use '
+            msg += '<i>recover-buffers</i> before editing this file.'
+            self.qteLogger.warning(msg.format(self.fileName))
+            return
+        SCI.qteJournal = qtmacs.journal.QtmacsJournal(
+            SCI, self.fileName, self.qteEncoding)
+
+    def qteRecordDiskState(self, data=None):
+        """
+        Remember the size and the last bytes of the file on disk.
+
+        If ``data`` is not **None** then it is the current file
+        content, otherwise the file is read.
+        """
+        # Number of trailing bytes that must match to consider a
+        # larger file as appended to.
+        numTail = 4096
+        try:
+            if data is None:
+                with open(self.fileName, 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    f.seek(max(0, size - numTail))
+                    tail = f.read(numTail)
+            else:
+                size, tail = len(data), data[-numTail:]
+        except OSError:
+            size, tail = 0, b''
+        self._qteDiskSize, self._qteDiskTail = size, tail
+        self.qteScintilla.qteDiskStat = self.qteDiskStat()
+        decoder = codecs.getincrementaldecoder(self.qteEncoding)
+        errors = 'replace' if self.qteLossyDecoding else 'strict'
+        self._qteTailDecoder = decoder(errors=errors)
+
+    def qteDiskStat(self):
+        """
+        Return the size and modification time of the file on disk.
+        """
+        try:
+            st = os.stat(self.fileName)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def qteFileChanged(self, fileName):
+        """
+        Bring the document up to date with the file on disk.
+
+        If the file only grew (eg. a log file) then the new part is
+        appended, otherwise the file is compared with the document in
+        a separate thread and ``qteApplyDiff`` applies the changed
+        hunks. Documents with unsaved modifications are left alone.
+
+        This method is called by ``qte_global.file_watcher``, and by
+        ``qteWakeUp`` to catch up with the changes that happened while
+        the applet was hibernating.
+        """
+        SCI = self.qteScintilla
+        if (self._qteLoadTimer is not None) or not os.path.exists(fileName):
+            return
+        if self.qteIsHibernating():
+            return
+
+        # Notifications caused by saving the document only require
+        # an update of the recorded file state.
+        if self.qteDiskStat() == SCI.qteDiskStat:
+            self.qteRecordDiskState()
+            return
+        if SCI.isModified():
+            msg = '<b>{}</b> changed on disk but the document has '
+            msg += 'unsaved modifications.'
+            self.qteLogger.warning(msg.format(fileName))
+            return
+
+        # Append the new part if the file merely grew. This is not
+        # possible for UTF-16/32 files because their decoder expects
+        # a byte order mark.
+        try:
+            with open(fileName, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                numTail = len(self._qteDiskTail)
+                f.seek(max(0, self._qteDiskSize - numTail))
+                isAppended = ((size > self._qteDiskSize) and
+                              (f.read(numTail) == self._qteDiskTail) and
+                              not self.qteEncoding.startswith('utf-16') and
+                              not self.qteEncoding.startswith('utf-32'))
+                if isAppended:
+                    data = f.read()
+        except OSError:
+            return
+
+        if isAppended:
+            try:
+                text = self._qteTailDecoder.decode(data, final=False)
+            except UnicodeDecodeError:
+                self.qteDecodingFailed()
+                return
+            if len(text) > 0:
+                with self._qteWritable():
+                    SCI.append(text)
+            self._qteDiskSize += len(data)
+            self._qteDiskTail = (self._qteDiskTail + data)[-4096:]
+            SCI.qteDiskStat = self.qteDiskStat()
+            self.qteSyncedWithDisk()
+            return
+
+        # Compute the difference in a separate thread and remember
+        # the document version it refers to.
+        version = SCI.qteVersion
+        callback = functools.partial(self.qteApplyDiff, version)
+        qte_global.file_watcher.qteDiff(SCI.text(), fileName,
+                                        self.qteEncoding, callback)
+
+    def qteApplyDiff(self, version, result):
+        """
+        Apply the hunks computed by ``qte_global.file_watcher``.
+
+        The hunks are applied from the bottom up with the undo safe
+        methods of ``QtmacsScintilla``, ie. the reload can be undone.
+        The cursor and all marks are moved to the corresponding lines
+        in the updated document.
+        """
+        SCI = self.qteScintilla
+        if isinstance(result, UnicodeDecodeError):
+            if not SCI.isModified():
+                self.qteDecodingFailed()
+            return
+        if isinstance(result, str):
+            msg = 'Cannot reload <b>{}</b>: {}'.format(self.fileName, result)
+            self.qteLogger.error(msg)
+            return
+
+        # Discard the result if the document was modified since the
+        # diff was started.
+        if SCI.isModified() or (SCI.qteVersion != version):
+            return
+        hunks, size, data = result
+
+        if len(hunks) > 0:
+            line, col = SCI.getCursorPosition()
+            with self._qteWritable():
+                for hunk in reversed(hunks):
+                    (startLine, startCol), (stopLine, stopCol) = hunk[4:6]
+                    text = hunk[6]
+                    if (startLine, startCol) == (stopLine, stopCol):
+                        SCI.insertAt(text, startLine, startCol)
+                        continue
+                    SCI.setSelection(startLine, startCol, stopLine, stopCol)
+                    if len(text) == 0:
+                        SCI.removeSelectedText()
+                    else:
+                        SCI.replaceSelectedText(text)
+
+            # Move the cursor and all marks along with their lines.
+            newLine = qtmacs.file_watcher.mapLine(line, hunks)
+            SCI.setCursorPosition(newLine, col)
+            for markerID, (mLine, mCol) in list(SCI.qteMarkers.items()):
+                SCI.qteMarkers[markerID] = (
+                    qtmacs.file_watcher.mapLine(mLine, hunks), mCol)
+            msg = 'Reloaded <b>{}</b> ({} hunks).'
+            self.qteMain.qteStatus(msg.format(self.fileName, len(hunks)))
+
+        self.qteRecordDiskState(data)
+        self.qteSyncedWithDisk()
+
+    def qteSyncedWithDisk(self):
+        """
+        Declare the document identical to the file on disk.
+        """
+        self.qteScintilla.setModified(False)
+        if self.qteScintilla.qteJournal is not None:
+            self.qteScintilla.qteJournal.qteRebase()
+
+    def qteHibernateState(self):
+        """
+        Save the document in compressed form and empty the widget.
+
+        The state contains the text, cursor position, first visible
+        line, lexer, the modification and read-only flags, and the
+        ``qteVersion`` of the widget. The marks and the Qtmacs undo
+        stack remain in the widget because they only store positions,
+        which remain valid since the text is later restored verbatim.
+        The native Scintilla undo buffer, the styling, and the lexer
+        are discarded. The widget itself stays alive, ie. hibernation
+        only releases the memory held by the document, its styling and
+        its lexer.
+
+        Documents that are still being loaded do not hibernate.
+        """
+        if self._qteLoadTimer is not None:
+            return None
+
+        SCI = self.qteScintilla
+        state = {
+            'text': zlib.compress(SCI.text().encode('utf-8')),
+            'cursor': SCI.getCursorPosition(),
+            'firstLine': SCI.firstVisibleLine(),
+            'lexer': getattr(SCI, 'qteLastLexer', None),
+            'modified': SCI.isModified(),
+            'readOnly': SCI.isReadOnly(),
+            'version': SCI.qteVersion,
+        }
+
+        # Empty the document without the undo frameworks and journal
+        # noticing, then drop the lexer and the position index. The
+        # widget remains read-only until it wakes up.
+        with self._qteNoJournal():
+            SCI.SendScintilla(SCI.SCI_SETUNDOCOLLECTION, False)
+            SCI.setReadOnly(False)
+            Qsci.QsciScintilla.setText(SCI, '')
+            SCI.SendScintilla(SCI.SCI_EMPTYUNDOBUFFER)
+            SCI.SendScintilla(SCI.SCI_SETUNDOCOLLECTION, True)
+            SCI.setReadOnly(True)
+        if state['lexer'] is not None:
+            SCI.qteSetLexer(None)
+        SCI.qtePositionIndex()
+        return state
+
+    def qteRestoreState(self, state):
+        """
+        Restore the document saved by ``qteHibernateState``.
+        """
+        SCI = self.qteScintilla
+        with self._qteNoJournal():
+            SCI.SendScintilla(SCI.SCI_SETUNDOCOLLECTION, False)
+            SCI.setReadOnly(False)
+            text = zlib.decompress(state['text']).decode('utf-8')
+            Qsci.QsciScintilla.setText(SCI, text)
+
+            # Emptying the undo buffer also declares the document
+            # unmodified. Scintilla has no way to set the modified
+            # flag directly, which is why an unsaved document receives
+            # an insertion and a deletion that cancel each other.
+            SCI.SendScintilla(SCI.SCI_EMPTYUNDOBUFFER)
+            SCI.SendScintilla(SCI.SCI_SETUNDOCOLLECTION, True)
+            if state['modified']:
+                SCI.SendScintilla(SCI.SCI_INSERTTEXT, 0, b' ')
+                SCI.SendScintilla(SCI.SCI_DELETERANGE, 0, 1)
+            SCI.setReadOnly(state['readOnly'])
+
+        # The text is the same as before the hibernation, which is why
+        # the version must be too (eg. a save that started before the
+        # hibernation and finishes after the wake up compares it).
+        SCI.qteVersion = state['version']
+        if state['lexer'] is not None:
+            SCI.qteSetLexer(state['lexer'])
+
+        # Restore the view and the mode bar.
+        SCI.setCursorPosition(*state['cursor'])
+        SCI.setFirstVisibleLine(state['firstLine'])
+        self.qteModificationChanged(SCI.isModified())
+
+    def qteWakeUp(self):
+        """
+        Restore the document and reload the file if it changed on
+        disk in the meantime.
+
+        The reload must wait until the applet no longer hibernates,
+        ie. it cannot happen in ``qteRestoreState``.
+        """
+        if not super().qteWakeUp():
+            return False
+        if self.fileName is not None:
+            self.qteFileChanged(self.fileName)
+        return True
+
+    def qteSessionState(self):
+        """
+        Return the cursor position, first visible line, and marks.
+        """
+        SCI = self.qteScintilla
+        state = self.qteHibernationState()
+        if state is None:
+            cursor, firstLine = SCI.getCursorPosition(), SCI.firstVisibleLine()
+        else:
+            cursor, firstLine = state['cursor'], state['firstLine']
+        markers = [[key, line, col]
+                   for key, (line, col) in SCI.qteMarkers.items()]
+        return {'cursor': cursor, 'firstLine': firstLine, 'markers': markers}
+
+    def qteRestoreSession(self, state):
+        """
+        Restore the state returned by ``qteSessionState``.
+        """
+        SCI = self.qteScintilla
+        for key, line, col in state.get('markers', []):
+            SCI.qteMarkers[key] = (line, col)
+        line, col = state.get('cursor', (0, 0))
+        firstLine = state.get('firstLine', 0)
+
+        # Apply the cursor once the file is loaded completely, or
+        # right away if it already is.
+        if self._qteLoadTimer is None:
+            SCI.setCursorPosition(line, col)
+            SCI.setFirstVisibleLine(firstLine)
+        else:
+            self._qteSessionCursor = (line, col, firstLine)
+
+    @contextlib.contextmanager
+    def _qteWritable(self):
+        """
+        Context manager to update a read-only document with the file
+        on disk (Scintilla silently ignores modifications otherwise).
+        """
+        SCI = self.qteScintilla
+        readOnly = SCI.isReadOnly()
+        SCI.setReadOnly(False)
+        try:
+            yield
+        finally:
+            SCI.setReadOnly(readOnly)
+
+    @contextlib.contextmanager
+    def _qteNoJournal(self):
+        """
+        Context manager to modify the document without recording the
+        modifications in the journal.
+        """
+        journal = self.qteScintilla.qteJournal
+        if journal is None:
+            yield
+            return
+        self.qteScintilla.SCN_MODIFIED.disconnect(journal.qteModified)
+        try:
+            yield
+        finally:
+            self.qteScintilla.SCN_MODIFIED.connect(journal.qteModified)
+
+    def qteToBeKilled(self):
+        """
+        Close the file if it is still being loaded, and delete the
+        journal because the modifications were deliberately discarded.
+        """
+        self.qteStopLoading()
+        if self.qteScintilla.qteJournal is not None:
+            self.qteScintilla.qteJournal.qteDelete()
+        if self._qteWatching:
+            qte_global.file_watcher.qteUnwatch(self.fileName,
+                                               self.qteFileChanged)
+
+
+class RecoverBuffers(QtmacsMacro):
+    """
+    Apply the unsaved modifications from all journals to the
+    respective files.
+
+    Journals for files that were changed on disk since the journal
+    was started are left untouched.
+
+    |Signature|
+
+    * *applet*: '*'
+    * *widget*: '*'
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('*')
+        self.qteSetWidgetSignature('*')
+
+    def qteRun(self):
+        numRecovered = 0
+        for journal in qtmacs.journal.allJournals():
+            try:
+                fileName = qtmacs.journal.recoverJournal(journal)
+            except (OSError, ValueError, KeyError, QtmacsOtherError) as err:
+                msg = 'Cannot recover <b>{}</b>: {}'.format(journal, err)
+                self.qteLogger.error(msg)
+                continue
+            numRecovered += 1
+            msg = 'Recovered <b>{}</b>.'.format(fileName)
+            self.qteLogger.info(msg)
+        msg = 'Recovered <b>{}</b> files.'.format(numRecovered)
+        self.qteMain.qteStatus(msg)
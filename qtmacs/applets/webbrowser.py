@@ -89,6 +89,31 @@ class WebBrowser(QtmacsApplet):
         self.fileName = fileName
         self.qteWeb.load(QtCore.QUrl(fileName))
 
+    def qteHibernateState(self):
+        """
+        Remember the URL and scroll position, and replace the page
+        with an empty one. The history is discarded.
+        """
+        frame = self.qteWeb.page().mainFrame()
+        state = {'url': self.qteWeb.url().toString(),
+                 'scroll': frame.scrollPosition()}
+        self.qteWeb.setHtml('')
+        self.qteWeb.history().clear()
+        QtWebKit.QWebSettings.clearMemoryCaches()
+        return state
+
+    def qteRestoreState(self, state):
+        """
+        Reload the page saved by ``qteHibernateState`` and scroll to
+        the previous position once it has loaded.
+        """
+        def restoreScroll(ok):
+            self.qteWeb.loadFinished.disconnect(restoreScroll)
+            self.qteWeb.page().mainFrame().setScrollPosition(state['scroll'])
+
+        self.qteWeb.loadFinished.connect(restoreScroll)
+        self.loadFile(state['url'])
+
 
 class ScrollDown(QtmacsMacro):
     """
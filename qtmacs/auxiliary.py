@@ -31,7 +31,11 @@ It is safe to use::
 
 """
 import re
+import os
+import sys
+import time
 import inspect
+import resource
 import qtmacs.type_check
 import qtmacs.qte_global as qte_global
 
@@ -117,6 +121,69 @@ class QtmacsVersionStructure(object):
         self.last_changed = None
 
 
+class QtmacsAppletDescriptor(object):
+    """
+    Placeholder for an applet whose module has not been imported yet.
+
+    |Args|
+
+    * ``appletName`` (**str**): name of the applet, which must also be
+      the name of the applet class in ``moduleName``.
+    * ``moduleName`` (**str**): absolute name of the module that
+      defines the applet (eg. 'qtmacs.applets.webbrowser').
+    * ``fileTypes`` (**tuple**): regular expressions of the file names
+      the applet can open (see ``qte_global.findFile_types``).
+
+    |Raises|
+
+    * **None**
+    """
+    def __init__(self, appletName, moduleName, fileTypes=()):
+        self.appletName = appletName
+        self.moduleName = moduleName
+        self.fileTypes = tuple(fileTypes)
+
+
+class QtmacsModuleRecord(object):
+    """
+    Registrations made by a module imported via ``qteImportModule``.
+
+    ``QtmacsMain`` fills this record while the module executes, and
+    uses it to replace or remove these registrations when the module
+    is reloaded.
+
+    |Args|
+
+    * ``module`` (**module**): the imported module.
+    * ``fileName`` (**str**): absolute file name of the module.
+
+    |Raises|
+
+    * **None**
+    """
+    def __init__(self, module, fileName):
+        self.module = module
+        self.fileName = fileName
+        self.mtime = os.path.getmtime(fileName)
+
+        # Internal macro names, ie. (macroName, appletSignature,
+        # widgetSignature) tuples.
+        self.macros = set()
+
+        # Names of applet classes and applet descriptors.
+        self.applets = set()
+
+        # List of (hookName, slot) tuples.
+        self.hooks = []
+
+        # Global key bindings. The keys are the ``toQtKeylist`` tuples
+        # and the values (QtmacsKeysequence, macroName) tuples.
+        self.keys = {}
+
+        # The record of the previous execution during a reload.
+        self.previous = None
+
+
 class QtmacsAdminStructure(object):
     """
     Container object carried by every applet and widget in the
@@ -202,6 +269,16 @@ class QtmacsAdminStructure(object):
         # the show() and hide() methods.
         self.parentWindow = None
 
+        # Handle to the ``QtmacsSplitter`` that holds the applet (or
+        # the splitter) in the window layout. This is always **None**
+        # if the applet is invisible, and is updated by the
+        # ``qteAddWidget`` and ``qteInsertWidget`` methods of the
+        # splitter, as well as the ``qteReparent`` method of the
+        # applet. Together, these handles form a parent index of the
+        # splitter tree that Qtmacs uses to find applets in the
+        # layout without traversing the entire tree.
+        self.parentSplitter = None
+
         # Visibility flag. This is usually the same as Qt's native
         # ``isVisible`` but whereas Qt does not actually update this
         # flag until the event loop had a chance to paint the applet,
@@ -212,6 +289,17 @@ class QtmacsAdminStructure(object):
         # which makes it impossible to track the visibility states.
         self.isVisible = False
 
+        # Time (see ``time.monotonic``) since when the applet is
+        # invisible, or **None** if it is visible. Applets start out
+        # invisible. The hibernation timer of ``QtmacsMain`` uses this
+        # field to find idle applets.
+        self.hiddenSince = time.monotonic()
+
+        # Compact state of a hibernating applet (see
+        # ``QtmacsApplet.qteHibernate``), or **None** if the applet
+        # is awake.
+        self.hibernationState = None
+
         # This is general purpose dictionary that macros can use to
         # store applet specific information.
         self.macroData = {}
@@ -1142,6 +1230,40 @@ def qteGetAppletFromWidget(widgetObj):
     return None
 
 
+def qteMemoryUsage():
+    """
+    Return the current memory usage (RSS) of Qtmacs in bytes.
+
+    On Linux the value comes from ``/proc/self/statm``. Elsewhere the
+    function returns the peak memory usage instead because the
+    ``resource`` module does not provide the current one.
+
+    |Args|
+
+    * **None**
+
+    |Returns|
+
+    * **int**: memory usage in bytes.
+
+    |Raises|
+
+    * **None**
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        pass
+
+    # Mac OS reports bytes, everyone else kilobytes.
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return usage
+    return usage * 1024
+
+
 class QtmacsModeBar(QtGui.QWidget):
     """
     Represent a list of modes, each represented by a ``QLabel``.
@@ -63,6 +63,7 @@ It is safe to use::
 """
 
 import sip
+import time
 import inspect
 import importlib
 import qtmacs.auxiliary
@@ -244,6 +245,17 @@ class QtmacsApplet(QtGui.QWidget):
         # Set the new parent.
         self.setParent(parent)
 
+        # Update the parent index of the layout if the new parent is
+        # a QtmacsSplitter.
+        try:
+            sig_ = parent._qteAdmin.widgetSignature
+        except AttributeError:
+            sig_ = None
+        if sig_ == '__QtmacsLayoutSplitter__':
+            self._qteAdmin.parentSplitter = parent
+        else:
+            self._qteAdmin.parentSplitter = None
+
         # If this parent has a Qtmacs structure then query it for the
         # parent window, otherwise set the parent to None.
         try:
@@ -368,7 +380,9 @@ class QtmacsApplet(QtGui.QWidget):
                 # apply default key-bindings, not to register the
                 # widget (the main purpose of this method).
                 try:
-                    mod.install_macros_and_bindings(widgetObj)
+                    context = '<b>{}</b> widget'.format(widgetObj.qteSignature)
+                    with self.qteMain.qteQuietRegistration(context):
+                        mod.install_macros_and_bindings(widgetObj)
                 except Exception:
                     msg = ('<b>install_macros_and_bindings</b> function'
                            ' in <b>{}</b> did not execute properly.')
@@ -872,6 +886,216 @@ class QtmacsApplet(QtGui.QWidget):
         """
         pass
 
+    def qteHibernate(self):
+        """
+        Replace the content of the invisible applet with a compact
+        state to release its memory.
+
+        Hibernation is opt-in: the applet must overload
+        ``qteHibernateState`` to return its compact state (and release
+        the memory of its widgets), and ``qteRestoreState`` to
+        rebuild the widgets from it. The ``show`` method wakes the
+        applet up automatically, ie. there is usually no need to call
+        ``qteWakeUp`` directly.
+
+        Text based applets should store their text as zlib
+        compressed UTF-8 under the 'text' key of the state, so that
+        macros can search it without waking the applet up (see
+        ``qteHibernationState``).
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **bool**: **True** if the applet is now hibernating.
+
+        |Raises|
+
+        * **None**
+        """
+        # Visible applets and those that are already hibernating are
+        # left alone.
+        if self._qteAdmin.isVisible or self.qteIsHibernating():
+            return False
+
+        # Ask the applet for its compact state. A value of **None**
+        # means it does not support hibernation (the default).
+        state = self.qteHibernateState()
+        if state is None:
+            return False
+        self._qteAdmin.hibernationState = state
+        return True
+
+    def qteWakeUp(self):
+        """
+        Rebuild the applet from the state saved by ``qteHibernate``.
+
+        The applet keeps hibernating, and thus retains its state, if
+        ``qteRestoreState`` raises an exception.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **bool**: **True** if the applet woke up.
+
+        |Raises|
+
+        * **None**
+        """
+        state = self._qteAdmin.hibernationState
+        if state is None:
+            return False
+
+        # Only discard the state once the applet was rebuilt from it,
+        # because it may be the only copy of the applet content.
+        try:
+            self.qteRestoreState(state)
+        except Exception:
+            msg = 'Applet <b>{}</b> could not wake up and keeps hibernating.'
+            self.qteLogger.exception(msg.format(self.qteAppletID()),
+                                     exc_info=True)
+            return False
+        self._qteAdmin.hibernationState = None
+        return True
+
+    def qteIsHibernating(self):
+        """
+        Return **True** if the applet is hibernating.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **bool**: hibernation status.
+
+        |Raises|
+
+        * **None**
+        """
+        return self._qteAdmin.hibernationState is not None
+
+    def qteHibernationState(self):
+        """
+        Return the compact state of the hibernating applet, or
+        **None** if it is awake.
+
+        The state must be treated as read-only.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **dict**: the state returned by ``qteHibernateState``.
+
+        |Raises|
+
+        * **None**
+        """
+        return self._qteAdmin.hibernationState
+
+    def qteHibernateState(self):
+        """
+        Return the compact state of the applet and release the memory
+        of its widgets.
+
+        This method is a stub and called by ``qteHibernate``. Applets
+        that support hibernation must overload it and return a
+        dictionary with everything ``qteRestoreState`` needs to
+        rebuild them, eg. the text, cursor position, and modification
+        flag of a document.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **dict**: compact state, or **None** if the applet does not
+          support hibernation.
+
+        |Raises|
+
+        * **None**
+        """
+        return None
+
+    def qteRestoreState(self, state):
+        """
+        Rebuild the applet from ``state``.
+
+        This method is a stub and called by ``qteWakeUp`` with the
+        value returned earlier by ``qteHibernateState``.
+
+        |Args|
+
+        * ``state`` (**dict**): the compact state of the applet.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        pass
+
+    def qteSessionState(self):
+        """
+        Return the state of the applet worth saving in the session.
+
+        This method is a stub and called by
+        ``QtmacsMain.qteSaveSession``. The session always records the
+        name and ID of the applet, which suffices to re-create it.
+        Applets can overload this method to return a (small) JSON
+        serialisable dictionary with additional information, eg. the
+        cursor position, which ``qteRestoreSession`` receives once the
+        applet was re-created.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **dict**: session state, or **None**.
+
+        |Raises|
+
+        * **None**
+        """
+        return None
+
+    def qteRestoreSession(self, state):
+        """
+        Restore the session ``state`` returned by ``qteSessionState``.
+
+        This method is a stub and called by ``QtmacsMain`` once the
+        applet was re-created from a session.
+
+        |Args|
+
+        * ``state`` (**dict**): the session state of the applet.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        pass
+
     @type_check
     def loadFile(self, fileName: str=None):
         """
@@ -959,6 +1183,10 @@ class QtmacsApplet(QtGui.QWidget):
             # the same window and thus have the same parent window.
             self._qteAdmin.parentWindow = self.parent().qteParentWindow()
 
+            # Rebuild the applet if it is hibernating.
+            self.qteWakeUp()
+            self._qteAdmin.hiddenSince = None
+
             # Update the Qtmacs internal visibility flag (used in the
             # focus manager to ensure that Qt and Qtmacs agree on
             # which applets are visible and which are not) and then
@@ -1015,6 +1243,7 @@ class QtmacsApplet(QtGui.QWidget):
             # **None**, and tell Qt to actually hide the widget as
             # soon as the event loop is in control again.
             self._qteAdmin.isVisible = False
+            self._qteAdmin.hiddenSince = time.monotonic()
             self.qteReparent(None)
             QtGui.QWidget.hide(self)
 
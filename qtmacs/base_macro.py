@@ -463,10 +463,12 @@ class QtmacsMacro(QtCore.QObject):
 
             # Irrespective of the error, log it, enable macro
             # processing (in case it got disabled), and trigger the
-            # error signal.
+            # error signal. The error is logged first to let log
+            # handlers associate it with the macro (see
+            # ``qtmacs.log_export``).
             self.qteMain.qteEnableMacroProcessing()
-            self.qteMain.qtesigMacroError.emit(msgObj)
             self.qteLogger.exception(msg, exc_info=True, stack_info=True)
+            self.qteMain.qtesigMacroError.emit(msgObj)
 
     def qteRun(self):
         """
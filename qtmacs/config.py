@@ -5,16 +5,24 @@ Global configuration file loaded from the constructor of ``QtmacsMain``.
 import qtmacs.qte_global as qte_global
 qteMain = qte_global.qteMain
 
-# Register the RichEditor applet.
-try:
-    import qtmacs.applets.richeditor
-    qteMain.qteRegisterApplet(qtmacs.applets.richeditor.RichEditor)
-except ImportError:
-    qteMain.qteLogger.info('RichEditor applet not loaded.')
+# Register the applets that are only imported (together with their
+# dependencies, eg. QtWebKit or Poppler) once the first instance is
+# created. The file types must match those in the respective
+# ``__qteRegisterAppletInit__`` methods.
+qteMain.qteRegisterAppletModule('RichEditor', 'qtmacs.applets.richeditor')
+qteMain.qteRegisterAppletModule('WebBrowser', 'qtmacs.applets.webbrowser',
+                                ['http://.*$'])
+qteMain.qteRegisterAppletModule('PDFReader', 'qtmacs.applets.pdf_reader',
+                                ['.*\.pdf$'])
+qteMain.qteRegisterAppletModule('Bash', 'qtmacs.applets.bash')
+qteMain.qteRegisterAppletModule('LargeFileViewer',
+                                'qtmacs.applets.large_file_viewer')
 
 errMsg = '<b>{}</b> applet not loaded.'
 
-# Register the SciEditor applet.
+# Register the SciEditor applet right away because it provides the
+# recover-buffers macro (and points out unsaved modifications from a
+# previous session).
 try:
     import qtmacs.applets.scieditor
     qteMain.qteRegisterApplet(qtmacs.applets.scieditor.SciEditor)
@@ -23,42 +31,16 @@ except ImportError:
     msg += ' Are you missing PyQt4.Qsci?'
     qteMain.qteLogger.info(msg)
 
-# Register the WebBrowser applet.
-try:
-    import qtmacs.applets.webbrowser
-    qteMain.qteRegisterApplet(qtmacs.applets.webbrowser.WebBrowser)
-except ImportError:
-    msg = errMsg.format('WebBrowser')
-    qteMain.qteLogger.info(msg)
-
-# Register the PDFReaderapplet. If this fails then most likely
-# because the Python bindings for Poppler could not be found.
-try:
-    import qtmacs.applets.pdf_reader
-    qteMain.qteRegisterApplet(qtmacs.applets.pdf_reader.PDFReader)
-except ImportError:
-    msg = errMsg.format('PDFReader')
-    msg += ' You may be missing <i>Python-Poppler?</i>.'
-    qteMain.qteLogger.info(msg)
-
-# Register the Bash applet. This may fail for various reasons,
-# most notably on systems without a Bash (eg. Windows), or when
-# 'pyte' is not installed.
+# Register the OccurResults applet (and thereby the
+# occur-all-buffers macro). It requires PyQt4.Qsci.
 try:
-    import qtmacs.applets.bash
-    qteMain.qteRegisterApplet(qtmacs.applets.bash.Bash)
+    import qtmacs.applets.occur
+    qteMain.qteRegisterApplet(qtmacs.applets.occur.OccurResults)
 except ImportError:
-    msg = errMsg.format('Bash')
-    msg += ' You may be missing <i>Pyte</i>?.'
+    msg = errMsg.format('OccurResults')
+    msg += ' Are you missing PyQt4.Qsci?'
     qteMain.qteLogger.info(msg)
 
-# Instantiate the WebBrowser applet and point it to the
-# documentation.
-url = 'http://olitheolix.github.com/qtmacs/titlepage.html'
-appObj = qteMain.qteNewApplet('WebBrowser', url)
-if appObj is not None:
-    qteMain.qteMakeAppletActive(appObj)
-
 # Instantiate the RichEditor applet with the special ID
 # **Startup Screen** to display Max (the Qtmacs logo)
 # and the GPL text.
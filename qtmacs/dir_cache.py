@@ -0,0 +1,284 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Provide ``QtmacsDirectoryCache`` to list directories for file name
+completion without hitting the file system on every keystroke.
+
+Every listing is stored as a sorted list of names, which is why
+all entries that start with a given prefix are found with two
+bisections. A ``QFileSystemWatcher`` evicts a listing as soon as the
+directory changes. Furthermore, whenever a directory is listed, its
+sub-directories and siblings (ie. the directories the user is most
+likely to enter next) are listed in a separate thread.
+
+At startup, Qtmacs creates one instance of ``QtmacsDirectoryCache``
+and places it into ``qte_global.dir_cache``.
+
+Usage example::
+
+    import qtmacs.qte_global as qte_global
+
+    # All entries in '/usr' that start with 'li'.
+    names = qte_global.dir_cache.qteCompletions('/usr', 'li')
+
+"""
+
+import os
+import bisect
+import collections
+import qtmacs.type_check
+
+from PyQt4 import QtCore
+
+# Shorthands:
+type_check = qtmacs.type_check.type_check
+
+
+def listDirectory(path):
+    """
+    Return the sorted names and the set of sub-directories in ``path``.
+
+    Hidden entries are omitted, but the parent directory '..' is
+    included (except for the root directory). Directories are
+    determined after following symbolic links.
+
+    |Args|
+
+    * ``path`` (**str**): absolute path of directory.
+
+    |Returns|
+
+    * **tuple**: (sorted list of names, set of directory names).
+
+    |Raises|
+
+    * **OSError** if the directory cannot be read.
+    """
+    names, dirs = [], set()
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.name.startswith('.'):
+                continue
+            names.append(entry.name)
+            try:
+                if entry.is_dir():
+                    dirs.add(entry.name)
+            except OSError:
+                pass
+    if os.path.dirname(path) != path:
+        names.append('..')
+        dirs.add('..')
+    names.sort()
+    return names, dirs
+
+
+class DirectoryListWorker(QtCore.QObject):
+    """
+    List directories in a separate thread.
+
+    Requests with an outdated ``generation`` (ie. the user has
+    moved on to another directory in the meantime) are skipped.
+    """
+    # Arguments: generation, list of paths.
+    sigStart = QtCore.pyqtSignal(int, object)
+
+    # Arguments: path, sorted names, set of directories, modification
+    # time of the directory before it was listed.
+    sigListed = QtCore.pyqtSignal(str, object, object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.sigStart.connect(self.listPaths)
+        self.generation = 0
+
+    @QtCore.pyqtSlot(int, object)
+    def listPaths(self, generation, paths):
+        for path in paths:
+            if generation != self.generation:
+                return
+            try:
+                mtime = os.stat(path).st_mtime_ns
+                names, dirs = listDirectory(path)
+            except OSError:
+                continue
+            self.sigListed.emit(path, names, dirs, mtime)
+
+
+class QtmacsDirectoryCache(QtCore.QObject):
+    """
+    Cache of directory listings, invalidated by a file system watcher.
+
+    At most ``maxEntries`` listings are retained; the least recently
+    used ones are evicted first.
+    """
+    # Maximum number of cached directories.
+    maxEntries = 128
+
+    # Maximum number of directories to prefetch at once.
+    maxPrefetch = 32
+
+    def __init__(self):
+        super().__init__()
+
+        # Map paths to (names, dirs) tuples in LRU order.
+        self._qteCache = collections.OrderedDict()
+
+        # Evict directories as soon as they change.
+        self._qteWatcher = QtCore.QFileSystemWatcher()
+        self._qteWatcher.directoryChanged.connect(self.qteInvalidate)
+
+        # Prefetch directories in a separate thread.
+        self._qteWorker = DirectoryListWorker()
+        self._qteThread = QtCore.QThread()
+        self._qteWorker.moveToThread(self._qteThread)
+        self._qteWorker.sigListed.connect(
+            self._qteAdd, type=QtCore.Qt.QueuedConnection)
+
+        # Stop the thread together with the application.
+        app = QtCore.QCoreApplication.instance()
+        app.aboutToQuit.connect(self._qteThread.quit)
+        self._qteThread.start()
+
+    def _qteAdd(self, path, names, dirs, mtime=None):
+        """
+        Add the listing of ``path`` to the cache and watch it.
+
+        A directory must be watched before it is listed, or else a
+        change in between goes unnoticed. If ``mtime`` is **None**
+        then the caller already added ``path`` to the watcher.
+        Otherwise, ``mtime`` is the modification time of ``path``
+        before it was listed (in a separate thread), and the listing
+        is discarded if the directory changed until the watch starts.
+        """
+        if path in self._qteCache:
+            self._qteCache.move_to_end(path)
+            return
+        if mtime is not None:
+            self._qteWatcher.addPath(path)
+            try:
+                changed = (os.stat(path).st_mtime_ns != mtime)
+            except OSError:
+                changed = True
+            if changed:
+                self._qteWatcher.removePath(path)
+                return
+        self._qteCache[path] = (names, dirs)
+
+        # Evict the least recently used listings.
+        while len(self._qteCache) > self.maxEntries:
+            oldPath, _ = self._qteCache.popitem(last=False)
+            self._qteWatcher.removePath(oldPath)
+
+    def qteInvalidate(self, path):
+        """
+        Remove ``path`` from the cache.
+
+        This slot is connected to the ``directoryChanged`` signal of
+        the ``QFileSystemWatcher``.
+        """
+        if self._qteCache.pop(path, None) is not None:
+            self._qteWatcher.removePath(path)
+
+    @type_check
+    def qteListing(self, path: str):
+        """
+        Return the sorted names and the set of directories in ``path``.
+
+        The listing comes from the cache if possible, and otherwise
+        from the file system. In the latter case the siblings and
+        sub-directories of ``path`` are prefetched as well.
+
+        |Args|
+
+        * ``path`` (**str**): the directory to list.
+
+        |Returns|
+
+        * **tuple**: (sorted list of names, set of directory names),
+          both empty if ``path`` cannot be read.
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        path = os.path.abspath(path)
+        if path in self._qteCache:
+            self._qteCache.move_to_end(path)
+            return self._qteCache[path]
+
+        # Watch the directory before listing it (see ``_qteAdd``).
+        self._qteWatcher.addPath(path)
+        try:
+            names, dirs = listDirectory(path)
+        except OSError:
+            self._qteWatcher.removePath(path)
+            return [], set()
+        self._qteAdd(path, names, dirs)
+        self.qtePrefetch(path, dirs)
+        return names, dirs
+
+    def qtePrefetch(self, path, dirs):
+        """
+        List the sub-directories ``dirs`` of ``path`` and the
+        siblings of ``path`` in a separate thread.
+        """
+        paths = [os.path.join(path, _) for _ in sorted(dirs) if _ != '..']
+        parent = os.path.dirname(path)
+        if (parent != path) and (parent in self._qteCache):
+            siblings = self._qteCache[parent][1]
+            paths += [os.path.join(parent, _) for _ in sorted(siblings)
+                      if _ != '..']
+        paths = [_ for _ in paths if _ not in self._qteCache]
+
+        # Supersede all pending prefetch requests.
+        self._qteWorker.generation += 1
+        self._qteWorker.sigStart.emit(self._qteWorker.generation,
+                                      paths[:self.maxPrefetch])
+
+    @type_check
+    def qteCompletions(self, path: str, prefix: str):
+        """
+        Return the absolute names of all entries in ``path`` that
+        start with ``prefix``.
+
+        Directories are listed first and have a trailing '/'.
+
+        |Args|
+
+        * ``path`` (**str**): the directory to list.
+        * ``prefix`` (**str**): prefix of the entry names.
+
+        |Returns|
+
+        * **list**: list of absolute file names.
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        names, dirs = self.qteListing(path)
+
+        # Find the range of names with the correct prefix.
+        start = bisect.bisect_left(names, prefix)
+        stop = bisect.bisect_left(names, prefix + '\U0010ffff', start)
+
+        path = os.path.abspath(path)
+        matches = names[start:stop]
+        out = [os.path.join(path, _) + '/' for _ in matches if _ in dirs]
+        out += [os.path.join(path, _) for _ in matches if _ not in dirs]
+        return out
@@ -28,9 +28,20 @@ key bindings. The entry point to this module is the function
    replaced.
 """
 
+import os
 import re
+import sys
 import math
+import time
+import queue
+import pickle
+import functools
+import itertools
+import threading
+import subprocess
+import qtmacs.file_io
 import qtmacs.kill_list
+import qtmacs.regexp_scan
 import qtmacs.undo_stack
 import qtmacs.auxiliary
 import qtmacs.type_check
@@ -44,6 +55,7 @@ from qtmacs.base_macro import QtmacsMacro
 QtmacsMessage = qtmacs.auxiliary.QtmacsMessage
 type_check = qtmacs.type_check.type_check
 KillListElement = qtmacs.kill_list.KillListElement
+atomicWrite = qtmacs.file_io.atomicWrite
 QtmacsUndoStack = qtmacs.undo_stack.QtmacsUndoStack
 QtmacsUndoCommand = qtmacs.undo_stack.QtmacsUndoCommand
 MiniAppletBaseQuery = qtmacs.miniapplets.base_query.MiniAppletBaseQuery
@@ -1030,11 +1042,16 @@ class UndoKillRectangle(QtmacsUndoCommand):
         col1 = min((self.markerPos[1], self.cursorPos[1]))
         col2 = max((self.markerPos[1], self.cursorPos[1]))
 
+        # Fetch the position index once. The loop below only modifies
+        # the current line, which is why the index remains valid for
+        # all subsequent lines without querying the widget again.
+        idx = wid.qtePositionIndex()
+
         # Insert the specified string at the same position in every line
         # in between the mark and the cursor (inclusive).
         self.removedText = []
         for line in range(self.markerPos[0], self.cursorPos[0] + 1):
-            text = wid.text(line)
+            text = idx.lineText(line)
             if col1 >= len(text):
                 # If the line has no text in the specified column
                 # range then ignore it.
@@ -1482,20 +1499,24 @@ class SearchForwardMiniApplet(MiniAppletBaseQuery):
 
         # Shorthand.
         SCI = self.qteWidget
+        idx = SCI.qtePositionIndex()
 
-        # Undo the highlighting of the previously selected match.
-        start, stop = self.matchList[self.selMatchIdx - 1]
-        line, col = SCI.lineIndexFromPosition(start)
+        # Undo the highlighting of the previously selected match. The
+        # match list contains character offsets but Scintilla styles
+        # bytes.
+        start, stop = idx.charSpanToByteSpan(
+            *self.matchList[self.selMatchIdx - 1])
         SCI.SendScintilla(SCI.SCI_STARTSTYLING, start, 0xFF)
         SCI.SendScintilla(SCI.SCI_SETSTYLING, stop - start, 30)
 
         # Highlight the next match.
         start, stop = self.matchList[self.selMatchIdx]
-        SCI.SendScintilla(SCI.SCI_STARTSTYLING, start, 0xFF)
-        SCI.SendScintilla(SCI.SCI_SETSTYLING, stop - start, 31)
+        byteStart, byteStop = idx.charSpanToByteSpan(start, stop)
+        SCI.SendScintilla(SCI.SCI_STARTSTYLING, byteStart, 0xFF)
+        SCI.SendScintilla(SCI.SCI_SETSTYLING, byteStop - byteStart, 31)
 
         # Place the cursor at the start of the currently selected match.
-        line, col = SCI.lineIndexFromPosition(start)
+        line, col = idx.charToLineCol(start)
         SCI.setCursorPosition(line, col)
         self.selMatchIdx += 1
 
@@ -1511,7 +1532,7 @@ class SearchForwardMiniApplet(MiniAppletBaseQuery):
 
         # Compile a list of all sub-string spans.
         stop = 0
-        text = self.qteWidget.text()
+        text = self.qteWidget.qtePositionIndex().text()
         while True:
             start = text.find(curEntry, stop)
             if start == -1:
@@ -1547,15 +1568,19 @@ class SearchForwardMiniApplet(MiniAppletBaseQuery):
         # ------------------------------------------------------------
 
         # Make a copy of the document style bits and determine the
-        # cursor position in the document.
+        # cursor position in the document. Note that the style array
+        # has one entry per byte, whereas the match list contains
+        # character offsets.
         style = bytearray(self.styleOrig)
-        cur = SCI.positionFromLineIndex(*self.cursorPosOrig)
+        idx = SCI.qtePositionIndex()
+        cur = idx.lineColToChar(*self.cursorPosOrig)
 
         # Style all matches.
         self.selMatchIdx = 0
         for start, stop in self.matchList:
             if start < cur:
                 self.selMatchIdx += 1
+            start, stop = idx.charSpanToByteSpan(start, stop)
             style[start:stop] = bytes(b'\x1e') * (stop - start)
 
         # If the cursor is after the last possible match (eg. always
@@ -1568,10 +1593,11 @@ class SearchForwardMiniApplet(MiniAppletBaseQuery):
         # differently to indicate that it is the currently
         # selected one.
         start, stop = self.matchList[self.selMatchIdx]
-        style[start:stop] = bytes(b'\x1f') * (stop - start)
+        byteStart, byteStop = idx.charSpanToByteSpan(start, stop)
+        style[byteStart:byteStop] = bytes(b'\x1f') * (byteStop - byteStart)
 
         # Place the cursor at the start of the currently selected match.
-        line, col = SCI.lineIndexFromPosition(start)
+        line, col = idx.charToLineCol(start)
         SCI.setCursorPosition(line, col)
         self.selMatchIdx += 1
 
@@ -1629,29 +1655,467 @@ class SearchForward(QtmacsMacro):
         self.qteMain.qteAddMiniApplet(query)
 
 
-class SearchForwardRegexpMiniApplet(SearchForwardMiniApplet):
+# ------------------------------------------------------------
+# Support for regular expression searches. The pattern is
+# compiled at most once per distinct user input, and the actual
+# scan runs in a child process on a snapshot of the document so
+# that the GUI remains responsive even for huge buffers and
+# expensive patterns.
+# ------------------------------------------------------------
+
+# Flags of all regular expressions used for searching.
+regexpFlags = re.MULTILINE | re.DOTALL
+
+
+@functools.lru_cache(maxsize=128)
+def compileRegexp(pattern):
     """
-    Interpret the user input as a regular expression and highlight
-    all matches in the QtmacsScintilla widget as the user types.
+    Return the compiled ``pattern``, or **None** if it is invalid.
+
+    The result is cached because the regexp search- and replace
+    macros compile the user input after every keystroke.
     """
-    def compileMatchList(self):
-        # Get the new sub-string to search for.
-        curEntry = self.qteText.toPlainText()
+    try:
+        return re.compile(pattern, regexpFlags)
+    except re.error:
+        return None
 
-        # Return immediately if the input field is empty.
-        if len(curEntry) == 0:
+
+class RegexpScanProcess(object):
+    """
+    Run ``qtmacs.regexp_scan`` in a child process.
+
+    Two daemon threads pass the jobs to the process and collect its
+    results in the ``results`` queue, which means neither a large
+    text nor a busy process ever blocks the GUI thread.
+
+    |Args|
+
+    * **None**
+
+    |Raises|
+
+    * **OSError** if the process cannot be started.
+    """
+    def __init__(self):
+        self.results = queue.Queue()
+        self._jobs = queue.Queue()
+        self.popen = subprocess.Popen(
+            [sys.executable, '-I', qtmacs.regexp_scan.__file__],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        for target in (self._write, self._read):
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+
+    def send(self, job):
+        """
+        Send ``job`` to the process.
+        """
+        self._jobs.put(job)
+
+    def isAlive(self):
+        """
+        Return **True** if the process is still running.
+        """
+        return self.popen.poll() is None
+
+    def kill(self):
+        """
+        Kill the process.
+        """
+        self._jobs.put(None)
+        try:
+            self.popen.kill()
+            self.popen.wait()
+        except OSError:
+            pass
+
+    def _write(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            try:
+                pickle.dump(job, self.popen.stdin,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+                self.popen.stdin.flush()
+            except OSError:
+                break
+        try:
+            self.popen.stdin.close()
+        except OSError:
+            pass
+
+    def _read(self):
+        while True:
+            try:
+                result = pickle.load(self.popen.stdout)
+            except (EOFError, OSError, pickle.UnpicklingError):
+                break
+            self.results.put(result)
+        self.popen.stdout.close()
+
+
+class RegexpScanWorker(QtCore.QObject):
+    """
+    Search text snapshots for regular expression matches in a child
+    process (see ``qtmacs.regexp_scan``).
+
+    The match spans are reported in batches via ``sigMatches``, and
+    ``sigFinished`` reports the end of the search. Only the search
+    with ``activeID`` is reported. The process is killed (and
+    restarted on demand) if the active search exceeds its timeout,
+    or if it does not abandon a superseded search within
+    ``graceTime`` seconds, because a single ``re`` call with
+    catastrophic backtracking cannot be interrupted otherwise.
+    """
+    # Time (in seconds) the process may take to abandon a
+    # superseded search, and the interval (in milliseconds) at
+    # which its results are collected.
+    graceTime = 0.2
+    pollInterval = 20
+
+    # Signals to report (partial) results.
+    sigMatches = QtCore.pyqtSignal(int, object, bool)
+    sigFinished = QtCore.pyqtSignal(int, bool)
+
+    def __init__(self):
+        super().__init__()
+        self.activeID = None
+        self._qteProcess = None
+        self._qteDeadline = None
+
+        # The text the process already has, the job it is working
+        # on, and the most recent job it did not start yet (along
+        # with the time it was sent).
+        self._qteText = None
+        self._qteBusyID = None
+        self._qtePending = None
+
+        self._qteTimer = QtCore.QTimer(self)
+        self._qteTimer.timeout.connect(self._qtePoll)
+
+    def qteStart(self, searchID, pattern, text, cursor, timeout, wrap=True):
+        """
+        Find all matches of ``pattern`` in ``text``, starting at
+        ``cursor``, and make ``searchID`` the active search.
+        """
+        self.activeID = searchID
+        self._qteDeadline = time.monotonic() + timeout
+        self._qteSend((searchID, pattern, regexpFlags, text, cursor, wrap))
+
+    def qteCancel(self):
+        """
+        Abandon the active search (if any).
+        """
+        if self.activeID is None:
             return
+        self.activeID = None
+        if self._qteProcess is not None:
+            self._qteSend((next(_regexpSearchID), None, 0, None, 0, False))
 
-        # If the current user input does not constitute a valid
-        # regular expression then do nothing.
+    def qteShutdown(self):
+        """
+        Kill the process.
+        """
+        self.activeID = None
+        self._qteKill()
+
+    def _qteSend(self, job):
+        """
+        Send ``job`` to the process; start the process if necessary.
+        """
+        if self._qteProcess is None:
+            try:
+                self._qteProcess = RegexpScanProcess()
+            except OSError as err:
+                msg = 'Cannot start the regexp search process: %s'
+                qte_global.qteMain.qteLogger.error(msg, err)
+                searchID, self.activeID = self.activeID, None
+                if searchID is not None:
+                    self.sigFinished.emit(searchID, False)
+                return
+
+        # Only send the text if the process does not have it yet.
+        # The index returns the same string object for as long as
+        # the document did not change.
+        text = job[3]
+        if (text is None) or (text is self._qteText):
+            wire = job[:3] + (None,) + job[4:]
+        else:
+            wire = job
+            self._qteText = text
+        self._qtePending = (time.monotonic(), job)
+        self._qteProcess.send(wire)
+        self._qteTimer.start(self.pollInterval)
+
+    def _qteKill(self):
+        """
+        Kill the process and forget its state.
+        """
+        if self._qteProcess is not None:
+            self._qteProcess.kill()
+        self._qteProcess = None
+        self._qteText = self._qteBusyID = self._qtePending = None
+        self._qteTimer.stop()
+
+    def _qtePoll(self):
+        """
+        Deliver the results of the process and enforce the timeouts.
+        """
+        proc = self._qteProcess
+        if proc is None:
+            self._qteTimer.stop()
+            return
+
+        # Deliver all results the process has sent so far.
+        while True:
+            try:
+                searchID, kind, data = proc.results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'start':
+                self._qteBusyID = searchID
+                pending = self._qtePending
+                if (pending is not None) and (pending[1][0] == searchID):
+                    self._qtePending = None
+            elif kind == 'done':
+                self._qteBusyID = None
+                if searchID == self.activeID:
+                    self.activeID = None
+                    self.sigFinished.emit(searchID, data)
+            elif searchID == self.activeID:
+                self.sigMatches.emit(searchID, data, kind == 'head')
+
+        now = time.monotonic()
+        pending = self._qtePending
+        if not proc.isAlive() and proc.results.empty():
+            # The process died (the results of the active search are
+            # incomplete).
+            searchID, self.activeID = self.activeID, None
+            self._qteKill()
+            if searchID is not None:
+                self.sigFinished.emit(searchID, False)
+        elif (self.activeID is not None) and (now > self._qteDeadline):
+            searchID, self.activeID = self.activeID, None
+            self._qteKill()
+            self.sigFinished.emit(searchID, False)
+        elif ((pending is not None) and (self._qteBusyID is not None) and
+              (now > pending[0] + self.graceTime)):
+            # The process is stuck in a superseded search. Restart it
+            # and re-send the new job (unless it was a cancellation).
+            self._qteKill()
+            if pending[1][1] is not None:
+                self._qteSend(pending[1])
+        elif (self._qteBusyID is None) and (pending is None):
+            # The process is idle.
+            self._qteTimer.stop()
+
+
+# The worker instance (created on demand) and a counter to uniquely
+# identify every search.
+_regexpScanWorker = None
+_regexpSearchID = itertools.count()
+
+
+def regexpScanWorker():
+    """
+    Return the ``RegexpScanWorker`` instance; create it if necessary.
+    """
+    global _regexpScanWorker
+    if _regexpScanWorker is None:
+        _regexpScanWorker = RegexpScanWorker()
+
+        # Kill the process together with the application.
+        app = QtCore.QCoreApplication.instance()
+        app.aboutToQuit.connect(_regexpScanWorker.qteShutdown)
+    return _regexpScanWorker
+
+
+class RegexpSearchMixin(object):
+    """
+    Stream the matches found by ``RegexpScanWorker`` into the
+    ``matchList`` of the search- and replace mini applets.
+
+    The mini applet must provide the ``matchList``, ``selMatchIdx``,
+    and ``styleOrig`` attributes used by ``SearchForwardMiniApplet``
+    and ``QueryReplaceMiniApplet``. The ``_qteSelOffset`` attribute
+    specifies whether ``selMatchIdx`` points to the currently selected
+    match (0) or the one after it (1).
+    """
+    _qteSelOffset = 0
+
+    def qteStartScan(self, pattern, cursor, wrap=True):
+        """
+        Start a background search for ``pattern``.
+
+        The matches are reported to ``qteScanMatches`` and
+        ``qteScanFinished`` as they arrive. If ``wrap`` is **False**
+        then only the matches after ``cursor`` are reported.
+        """
+        worker = regexpScanWorker()
+        if not hasattr(self, '_qteSearchID'):
+            # Deliver the results via the event loop so that the
+            # worker never calls back into a running macro.
+            worker.sigMatches.connect(self._qteScanMatchesSlot,
+                                      type=QtCore.Qt.QueuedConnection)
+            worker.sigFinished.connect(self._qteScanFinishedSlot,
+                                       type=QtCore.Qt.QueuedConnection)
+            self._qteSearchID = None
+
+        # Abandon the previous search and reset the match list.
+        if (self._qteSearchID is not None and
+                worker.activeID == self._qteSearchID):
+            worker.qteCancel()
+        self._qteSearchID = None
+        self._qteNumHead = 0
+        self._qteHasSelection = False
+        self.matchList = []
+        self.selMatchIdx = 0
+
+        # Do nothing if the pattern is invalid.
+        if (pattern == '') or (compileRegexp(pattern) is None):
+            return
+
+        # Start the search on the current snapshot of the text.
+        self._qteSearchID = next(_regexpSearchID)
+        text = self.qteWidget.qtePositionIndex().text()
+        worker.qteStart(self._qteSearchID, pattern, text, cursor,
+                        float(qte_global.search_timeout), wrap)
+
+    def qteStopScan(self):
+        """
+        Abandon the current background search (if any).
+        """
+        if not hasattr(self, '_qteSearchID'):
+            return
+        worker = regexpScanWorker()
+        if (self._qteSearchID is not None and
+                worker.activeID == self._qteSearchID):
+            worker.qteCancel()
+        self._qteSearchID = None
         try:
-            pat = re.compile(curEntry, re.MULTILINE + re.DOTALL)
-        except re.error:
+            worker.sigMatches.disconnect(self._qteScanMatchesSlot)
+            worker.sigFinished.disconnect(self._qteScanFinishedSlot)
+        except TypeError:
+            pass
+        del self._qteSearchID
+
+    def qteScanIsRunning(self):
+        """
+        Return **True** if the background search is still running.
+        """
+        return getattr(self, '_qteSearchID', None) is not None
+
+    def _qteScanMatchesSlot(self, searchID, spans, isHead):
+        if searchID == getattr(self, '_qteSearchID', None):
+            self.qteScanMatches(spans, isHead)
+
+    def _qteScanFinishedSlot(self, searchID, completed):
+        if searchID == getattr(self, '_qteSearchID', None):
+            self._qteSearchID = None
+            self.qteScanFinished(completed)
+
+    def _qteStyleMatches(self, spans, selected=None):
+        """
+        Highlight ``spans`` and style the ``selected`` span differently.
+        """
+        SCI = self.qteWidget
+        idx = SCI.qtePositionIndex()
+
+        # All spans in a batch are sorted, which is why it suffices
+        # to restyle the byte range from the first to the last one.
+        lo = idx.charToByte(spans[0][0])
+        hi = idx.charToByte(spans[-1][1])
+        if hi <= lo:
             return
+        style = bytearray(self.styleOrig[lo:hi])
+        for span in spans:
+            start, stop = idx.charSpanToByteSpan(*span)
+            if span == selected:
+                style[start - lo:stop - lo] = bytes(b'\x1f') * (stop - start)
+            else:
+                style[start - lo:stop - lo] = bytes(b'\x1e') * (stop - start)
+        SCI.SendScintilla(SCI.SCI_STARTSTYLING, lo, 0xFF)
+        SCI.SendScintilla(SCI.SCI_SETSTYLINGEX, len(style), style)
 
-        # Compile a list of all sub-string spans.
-        text = self.qteWidget.text()
-        self.matchList = [_.span() for _ in pat.finditer(text)]
+    def _qteSelectMatch(self, matchIdx):
+        """
+        Make ``matchIdx`` the selected match and move the cursor to it.
+        """
+        start, stop = self.matchList[matchIdx]
+        self._qteStyleMatches([(start, stop)], (start, stop))
+        line, col = self.qteWidget.qtePositionIndex().charToLineCol(start)
+        self.qteWidget.setCursorPosition(line, col)
+        self.selMatchIdx = matchIdx + self._qteSelOffset
+        self._qteHasSelection = True
+
+    def qteScanMatches(self, spans, isHead):
+        """
+        Add a batch of matches to ``matchList`` and highlight them.
+
+        Batches from the region before the cursor (``isHead``=True)
+        are inserted in front of all matches after the cursor. The
+        first match after the cursor is selected.
+        """
+        if isHead:
+            self.matchList[self._qteNumHead:self._qteNumHead] = spans
+            self._qteNumHead += len(spans)
+            if self._qteHasSelection:
+                self.selMatchIdx += len(spans)
+        else:
+            self.matchList.extend(spans)
+        self._qteStyleMatches(spans)
+
+        if not (isHead or self._qteHasSelection):
+            self._qteSelectMatch(len(self.matchList) - len(spans))
+
+    def qteScanFinished(self, completed):
+        """
+        Wrap around to the first match if none was found after the
+        cursor, and inform the user if the search timed out.
+        """
+        if not self._qteHasSelection and len(self.matchList) > 0:
+            self._qteSelectMatch(0)
+        if not completed:
+            msg = 'Search aborted after <b>{}</b> seconds.'
+            self.qteMain.qteStatus(msg.format(qte_global.search_timeout))
+
+
+class SearchForwardRegexpMiniApplet(SearchForwardMiniApplet,
+                                    RegexpSearchMixin):
+    """
+    Interpret the user input as a regular expression and highlight
+    all matches in the QtmacsScintilla widget as the user types.
+
+    The search itself runs in the background (see ``RegexpScanWorker``)
+    and the matches are highlighted as they arrive.
+    """
+    _qteSelOffset = 1
+
+    def qteTextChanged(self):
+        """
+        Start a background search for the new regular expression.
+        """
+        self.clearHighlighting()
+        idx = self.qteWidget.qtePositionIndex()
+        cursor = idx.lineColToChar(*self.cursorPosOrig)
+        self.qteStartScan(self.qteText.toPlainText(), cursor)
+
+    def qteAbort(self, msgObj):
+        """
+        Stop the background search and restore the cursor position.
+        """
+        self.qteStopScan()
+        super().qteAbort(msgObj)
+
+    def qteToBeKilled(self):
+        """
+        Stop the background search and remove all highlighting.
+        """
+        self.qteStopScan()
+        super().qteToBeKilled()
 
 
 class SearchForwardRegexp(QtmacsMacro):
@@ -1884,7 +2348,7 @@ class QueryReplaceMiniApplet(MiniAppletBaseQuery):
         or replace them all automatically.
         """
         # Terminate the replacement procedure if the no match was found.
-        if len(self.matchList) == 0:
+        if not self.hasMatches():
             self.qteAbort(QtmacsMessage())
             self.qteMain.qteKillMiniApplet()
             return
@@ -1931,6 +2395,12 @@ class QueryReplaceMiniApplet(MiniAppletBaseQuery):
             self.qteAbort(QtmacsMessage())
             self.qteMain.qteKillMiniApplet()
 
+    def hasMatches(self):
+        """
+        Return **True** if there are (or may be) matches to replace.
+        """
+        return len(self.matchList) > 0
+
     def highlightNextMatch(self):
         """
         Select and highlight the next match in the set of matches.
@@ -1953,21 +2423,24 @@ class QueryReplaceMiniApplet(MiniAppletBaseQuery):
 
         # Shorthand.
         SCI = self.qteWidget
+        idx = SCI.qtePositionIndex()
 
-        # Undo the highlighting of the previously selected match.
-        start, stop = self.matchList[self.selMatchIdx]
-        line, col = SCI.lineIndexFromPosition(start)
+        # Undo the highlighting of the previously selected match. The
+        # match list contains character offsets but Scintilla styles
+        # bytes.
+        start, stop = idx.charSpanToByteSpan(*self.matchList[self.selMatchIdx])
         SCI.SendScintilla(SCI.SCI_STARTSTYLING, start, 0xFF)
         SCI.SendScintilla(SCI.SCI_SETSTYLING, stop - start, 30)
         self.selMatchIdx += 1
 
         # Highlight the next match.
         start, stop = self.matchList[self.selMatchIdx]
-        SCI.SendScintilla(SCI.SCI_STARTSTYLING, start, 0xFF)
-        SCI.SendScintilla(SCI.SCI_SETSTYLING, stop - start, 31)
+        byteStart, byteStop = idx.charSpanToByteSpan(start, stop)
+        SCI.SendScintilla(SCI.SCI_STARTSTYLING, byteStart, 0xFF)
+        SCI.SendScintilla(SCI.SCI_SETSTYLING, byteStop - byteStart, 31)
 
         # Place the cursor at the start of the currently selected match.
-        line, col = SCI.lineIndexFromPosition(start)
+        line, col = idx.charToLineCol(start)
         SCI.setCursorPosition(line, col)
 
     def replaceSelected(self):
@@ -1985,14 +2458,16 @@ class QueryReplaceMiniApplet(MiniAppletBaseQuery):
 
         # Select the region spanned by the string to replace.
         start, stop = self.matchList[self.selMatchIdx]
-        line1, col1 = SCI.lineIndexFromPosition(start)
-        line2, col2 = SCI.lineIndexFromPosition(stop)
+        idx = SCI.qtePositionIndex()
+        line1, col1 = idx.charToLineCol(start)
+        line2, col2 = idx.charToLineCol(stop)
         SCI.setSelection(line1, col1, line2, col2)
 
         # Replace that region with the new string and move the cursor
         # to the end of that string.
         SCI.replaceSelectedText(self.toReplaceWith)
-        line, col = SCI.lineIndexFromPosition(start + len(self.toReplaceWith))
+        idx = SCI.qtePositionIndex()
+        line, col = idx.charToLineCol(start + len(self.toReplaceWith))
         SCI.setCursorPosition(line, col)
 
         # Backup the new document style bits.
@@ -2007,17 +2482,61 @@ class QueryReplaceMiniApplet(MiniAppletBaseQuery):
             self.highlightAllMatches()
             return True
 
+    def replacementText(self, text, start, stop):
+        """
+        Return the replacement for the match ``text[start:stop]``.
+        """
+        return self.toReplaceWith
+
     def replaceAll(self):
         """
         Replace all matches after the current cursor position.
 
-        This method calls ``replaceSelectedText`` until it returns
-        **False**, and then closes the mini buffer.
+        The region from the first to the last remaining match is
+        rebuilt in a single pass and then replaced in one edit, which
+        also means the entire operation is undone in one step. The
+        number of replacements is reported in the status bar before
+        the mini buffer is closed.
         """
-        while self.replaceSelected():
-            pass
+        SCI = self.qteWidget
+        matches = self.matchList[self.selMatchIdx:]
+        if len(matches) == 0:
+            self.qteMain.qteKillMiniApplet()
+            return
 
-        self.qteWidget.SCISetStylingEx(0, 0, self.styleOrig)
+        # Restore the original styling so that the undo object backs
+        # up the un-highlighted style bits.
+        SCI.SCISetStylingEx(0, 0, self.styleOrig)
+
+        # Assemble the new content of the region spanned by the first
+        # and last match, ie. the unmodified text in between matches
+        # and the replacement for every match.
+        text = SCI.qtePositionIndex().text()
+        regionStart, regionStop = matches[0][0], matches[-1][1]
+        chunks = []
+        prev = regionStart
+        for start, stop in matches:
+            chunks.append(text[prev:start])
+            chunks.append(self.replacementText(text, start, stop))
+            prev = stop
+        newText = ''.join(chunks)
+
+        # Replace the entire region at once; ``replaceSelectedText``
+        # pushes exactly one undo object and places the cursor at the
+        # end of the new text.
+        idx = SCI.qtePositionIndex()
+        line1, col1 = idx.charToLineCol(regionStart)
+        line2, col2 = idx.charToLineCol(regionStop)
+        SCI.setSelection(line1, col1, line2, col2)
+        SCI.replaceSelectedText(newText)
+
+        # Backup the new document style bits because ``qteToBeKilled``
+        # restores them.
+        line, col = SCI.getNumLinesAndColumns()
+        _, self.styleOrig = SCI.SCIGetStyledText((0, 0, line, col))
+
+        msg = 'Replaced <b>{}</b> occurrences.'.format(len(matches))
+        self.qteMain.qteStatus(msg)
         self.qteMain.qteKillMiniApplet()
 
     def compileMatchList(self):
@@ -2034,7 +2553,7 @@ class QueryReplaceMiniApplet(MiniAppletBaseQuery):
 
         # Compile a list of all sub-string spans.
         stop = 0
-        text = self.qteWidget.text()
+        text = self.qteWidget.qtePositionIndex().text()
         while True:
             start = text.find(self.toReplace, stop)
             if start == -1:
@@ -2084,14 +2603,16 @@ class QueryReplaceMiniApplet(MiniAppletBaseQuery):
         # Make a copy of the document style bits and determine the
         # cursor position in the document.
         style = bytearray(self.styleOrig)
-        pos = SCI.getCursorPosition()
-        cur = SCI.positionFromLineIndex(*pos)
+        idx = SCI.qtePositionIndex()
+        cur = idx.lineColToChar(*SCI.getCursorPosition())
 
-        # Style all matches.
+        # Style all matches. Note that the style array has one entry
+        # per byte, whereas the match list contains character offsets.
         self.selMatchIdx = 0
         for start, stop in self.matchList:
             if start < cur:
                 self.selMatchIdx += 1
+            start, stop = idx.charSpanToByteSpan(start, stop)
             style[start:stop] = bytes(b'\x1e') * (stop - start)
 
         if self.selMatchIdx >= len(self.matchList):
@@ -2101,10 +2622,11 @@ class QueryReplaceMiniApplet(MiniAppletBaseQuery):
         # differently to indicate that it is the currently
         # selected one.
         start, stop = self.matchList[self.selMatchIdx]
-        style[start:stop] = bytes(b'\x1f') * (stop - start)
+        byteStart, byteStop = idx.charSpanToByteSpan(start, stop)
+        style[byteStart:byteStop] = bytes(b'\x1f') * (byteStop - byteStart)
 
         # Place the cursor at the start of the currently selected match.
-        line, col = SCI.lineIndexFromPosition(start)
+        line, col = idx.charToLineCol(start)
         SCI.setCursorPosition(line, col)
 
         # Apply the modified style array to the document.
@@ -2168,19 +2690,114 @@ class QueryReplace(QtmacsMacro):
         self.qteMain.qteAddMiniApplet(query)
 
 
-class QueryReplaceRegexpMiniApplet(QueryReplaceMiniApplet):
+class QueryReplaceRegexpMiniApplet(QueryReplaceMiniApplet,
+                                   RegexpSearchMixin):
     """
     Query a regular expression and a substitution string.
+
+    While the user types the regular expression the matches are
+    found in the background (see ``RegexpScanWorker``) and
+    highlighted as they arrive. After every replacement the search
+    resumes behind the new text, which is why the next match may
+    not be available immediately.
     """
+    _qteSelOffset = 0
+
+    # Indicates that all matches are replaced once the background
+    # search is complete.
+    _qteReplaceAllPending = False
+
+    def qteTextChanged(self):
+        """
+        Start a background search for the new regular expression.
+        """
+        self.toReplace = self.qteText.toPlainText()
+        SCI = self.qteWidget
+        SCI.SCISetStylingEx(0, 0, self.styleOrig)
+        cursor = SCI.qtePositionIndex().lineColToChar(*self.cursorPosOrig)
+        self.qteStartScan(self.toReplace, cursor)
+
+    def hasMatches(self):
+        """
+        Return **True** if there are matches, or if the background
+        search may still find some.
+        """
+        return (len(self.matchList) > 0) or self.qteScanIsRunning()
+
+    def replacementText(self, text, start, stop):
+        """
+        Return the substitution for the match ``text[start:stop]``.
+
+        The match is repeated on the entire ``text`` so that
+        look-behind assertions and anchors see the same context as
+        the original search.
+        """
+        pat = compileRegexp(self.toReplace)
+        if pat is None:
+            return text[start:stop]
+        match = pat.match(text, start)
+        if (match is None) or (match.end() != stop):
+            return text[start:stop]
+        return match.expand(self.toReplaceWith)
+
+    def replaceAll(self):
+        """
+        Replace all matches after the current cursor position.
+
+        If the background search has not finished yet then the
+        replacement happens once it has (see ``qteScanFinished``).
+        """
+        if self.qteScanIsRunning():
+            self._qteReplaceAllPending = True
+            self.qteMain.qteStatus('Searching...')
+            return
+        super().replaceAll()
+
+    def qteAbort(self, msgObj):
+        """
+        Stop the background search and restore the cursor position.
+        """
+        self.qteStopScan()
+        super().qteAbort(msgObj)
+
+    def qteToBeKilled(self):
+        """
+        Stop the background search and remove all highlighting.
+        """
+        self.qteStopScan()
+        super().qteToBeKilled()
+
+    def qteScanFinished(self, completed):
+        """
+        Carry out a pending replace-all, or close the mini applet if
+        no match is left after a replacement.
+        """
+        super().qteScanFinished(completed)
+        if self._qteReplaceAllPending:
+            self._qteReplaceAllPending = False
+            if completed:
+                super().replaceAll()
+        elif (self.queryMode == 2) and (len(self.matchList) == 0):
+            self.qteMain.qteKillMiniApplet()
 
     def replaceSelected(self):
         """
         Replace the currently selected string with the new one.
 
-        The method return **False** if another match to the right
-        of the cursor exists, and **True** if not (ie. when the
-        end of the document was reached).
+        The method returns **False** if no match is left, and **True**
+        otherwise (including when the background search did not find
+        the next match yet).
         """
+        # Wait for the background search to find the next match.
+        if self.selMatchIdx >= len(self.matchList):
+            if self.qteScanIsRunning():
+                self.qteMain.qteStatus('Searching...')
+                return True
+            return False
+
+        # Stop the background search because its spans refer to the
+        # text before the replacement.
+        self.qteStopScan()
         SCI = self.qteWidget
 
         # Restore the original styling.
@@ -2188,57 +2805,32 @@ class QueryReplaceRegexpMiniApplet(QueryReplaceMiniApplet):
 
         # Select the region spanned by the string to replace.
         start, stop = self.matchList[self.selMatchIdx]
-        line1, col1 = SCI.lineIndexFromPosition(start)
-        line2, col2 = SCI.lineIndexFromPosition(stop)
+        idx = SCI.qtePositionIndex()
+        line1, col1 = idx.charToLineCol(start)
+        line2, col2 = idx.charToLineCol(stop)
         SCI.setSelection(line1, col1, line2, col2)
 
-        text = SCI.selectedText()
-        text = re.sub(self.toReplace, self.toReplaceWith, text)
+        text = self.replacementText(idx.text(), start, stop)
 
         # Replace that region with the new string and move the cursor
         # to the end of that string.
         SCI.replaceSelectedText(text)
-        line, col = SCI.lineIndexFromPosition(start + len(text))
-        SCI.setCursorPosition(line, col)
 
         # Backup the new document style bits.
-        line, col = SCI.getNumLinesAndColumns()
-        text, style = self.qteWidget.SCIGetStyledText((0, 0, line, col))
-        self.styleOrig = style
+        numLines, numCols = SCI.getNumLinesAndColumns()
+        _, self.styleOrig = SCI.SCIGetStyledText((0, 0, numLines, numCols))
 
-        # Determine if this was the last entry in the match list.
-        if len(self.matchList) == self.selMatchIdx + 1:
-            return False
-        else:
-            self.highlightAllMatches()
-            return True
-
-    def compileMatchList(self):
-        # Get the new sub-string to search for.
-        curEntry = self.qteText.toPlainText()
-
-        # Return immediately if the input field is empty.
-        if len(curEntry) == 0:
-            return
-
-        # If the current user input does not constitute a valid
-        # regular expression then do nothing.
-        try:
-            pat = re.compile(curEntry, re.MULTILINE + re.DOTALL)
-        except re.error:
-            return
-
-        # Compile a list of all sub-string spans.
-        text = self.qteWidget.text()
-        self.matchList = [_.span() for _ in pat.finditer(text)]
+        # Search for the remaining matches behind the new text.
+        self.qteStartScan(self.toReplace, start + len(text), wrap=False)
+        return True
 
 
 class QueryReplaceRegexp(QtmacsMacro):
     """
     Search a regular expression and replace it with another custom string.
 
-    This method uses Python's ``re`` module, in particular ``re.match``
-    to find the string, and ``re.sub`` to replace it. As such, the
+    This method uses Python's ``re`` module to find the string, and
+    ``match.expand`` to build its replacement. As such, the
     search and replacement strings can be any regular expression syntax
     supported by the ``re`` module.
 
@@ -2296,10 +2888,108 @@ class Undo(QtmacsMacro):
         self.qteWidget.undo()
 
 
+class FileSaveWorker(QtCore.QObject):
+    """
+    Encode and write documents to disk in a separate thread.
+
+    The ``token`` argument is passed back unchanged via
+    ``sigFinished``, together with an error message, or **None** if
+    the file was saved successfully.
+    """
+    # Arguments: file name, text, encoding, token.
+    sigStart = QtCore.pyqtSignal(str, object, str, object)
+
+    # Arguments: token, error message (or None).
+    sigFinished = QtCore.pyqtSignal(object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.sigStart.connect(self.save)
+
+    @QtCore.pyqtSlot(str, object, str, object)
+    def save(self, fileName, text, encoding, token):
+        try:
+            atomicWrite(fileName, text.encode(encoding))
+            err = None
+        except (OSError, UnicodeEncodeError, LookupError) as exc:
+            err = str(exc)
+        self.sigFinished.emit(token, err)
+
+
+# The worker instance and its thread (both created on demand).
+_fileSaveWorker = None
+_fileSaveThread = None
+
+
+def fileSaveWorker():
+    """
+    Return the ``FileSaveWorker`` instance; start it if necessary.
+    """
+    global _fileSaveWorker, _fileSaveThread
+    if _fileSaveWorker is None:
+        _fileSaveWorker = FileSaveWorker()
+        _fileSaveThread = QtCore.QThread()
+        _fileSaveWorker.moveToThread(_fileSaveThread)
+
+        # Report the outcome of every save operation exactly once,
+        # no matter how many ``SaveFile`` instances exist.
+        _fileSaveWorker.sigFinished.connect(
+            fileSaveFinished, type=QtCore.Qt.QueuedConnection)
+
+        # Stop the thread together with the application, but only
+        # after all pending saves are complete.
+        app = QtCore.QCoreApplication.instance()
+        app.aboutToQuit.connect(_fileSaveThread.quit)
+        app.aboutToQuit.connect(_fileSaveThread.wait)
+        _fileSaveThread.start()
+    return _fileSaveWorker
+
+
+def fileSaveFinished(token, err):
+    """
+    Report the outcome of a save operation started by ``SaveFile``.
+
+    This function is triggered by the ``sigFinished`` signal of the
+    ``FileSaveWorker``.
+    """
+    qteMain = qte_global.qteMain
+    fileName, wid, version, index, mark = token
+    if err is not None:
+        msg = 'Could not save <b>{}</b>: {}'.format(fileName, err)
+        qteMain.qteLogger.error(msg)
+        return
+    qteMain.qteStatus('Saved file <b>{}</b>'.format(fileName))
+
+    # Declare the document unmodified, unless it was modified
+    # since the snapshot was taken. In that case, merely record
+    # the saved state in the undo stack. Either way, the journal
+    # only needs to retain the modifications after the snapshot.
+    try:
+        if wid.qteVersion == version:
+            wid.setModified(False)
+        else:
+            wid.qteUndoStack.saveState(index)
+        if wid.qteJournal is not None:
+            wid.qteJournal.qteRebase(mark)
+        st = os.stat(fileName)
+        wid.qteDiskStat = (st.st_size, st.st_mtime_ns)
+    except (RuntimeError, OSError):
+        # The widget was deleted in the meantime, or the file
+        # cannot be accessed anymore.
+        pass
+
+
 class SaveFile(QtmacsMacro):
     """
     Save the current text to file.
 
+    The text is encoded with the ``qteEncoding`` of the applet (if
+    it has one, otherwise UTF-8) and written to disk in a separate
+    thread with ``atomicWrite``. The document is declared unmodified
+    once the file is safely on disk (see ``fileSaveFinished``).
+    Documents whose file could not be decoded without loss (see
+    ``qteLossyDecoding`` of the ``SciEditor`` applet) are not saved.
+
     |Signature|
 
     * *applet*: '*'
@@ -2312,10 +3002,22 @@ class SaveFile(QtmacsMacro):
 
     def qteRun(self):
         fileName = self.qteApplet.qteAppletID()
-        content = self.qteWidget.text()
-        open(fileName, 'w').writelines(content)
-        self.qteMain.qteStatus('Saved file <b>{}</b>'.format(fileName))
-        self.qteWidget.setModified(False)
+        if getattr(self.qteApplet, 'qteLossyDecoding', False):
+            msg = 'Not saving <b>{}</b> because it contains bytes that '
+            msg += 'are invalid in its encoding.'
+            self.qteLogger.error(msg.format(fileName))
+            return
+
+        # Snapshot the text together with its version, the size of
+        # the undo stack (to mark the saved state in it), and the
+        # position in the journal.
+        wid = self.qteWidget
+        encoding = getattr(self.qteApplet, 'qteEncoding', 'utf-8')
+        index = len(wid.qteUndoStack)
+        mark = None if wid.qteJournal is None else wid.qteJournal.qteMark()
+        token = (fileName, wid, wid.qteVersion, index, mark)
+        fileSaveWorker().sigStart.emit(fileName, wid.text(), encoding, token)
+        self.qteMain.qteStatus('Saving file <b>{}</b>...'.format(fileName))
 
 
 # ------------------------------------------------------------
@@ -58,6 +58,8 @@ instantiate the applet with ``<ctrl>+x <ctrl>+a``, and type
 'TextQtmacsScintilla'.
 """
 
+import re
+import bisect
 import qtmacs.kill_list
 import qtmacs.type_check
 import qtmacs.undo_stack
@@ -192,9 +194,7 @@ class UndoReplaceSelectedText(QtmacsUndoCommand):
 
         # Determine and backup the region occupied by the new text.
         start = self.selectionPosOld[:2]
-        pos = wid.positionFromLineIndex(*start)
-        pos += len(self.newText)
-        stop = wid.lineIndexFromPosition(pos)
+        stop = _insertionEnd(wid, self.newText, *start)
         self.selectionPosNew = (start[0], start[1], stop[0], stop[1])
         wid.setCursorPosition(*stop)
 
@@ -261,9 +261,8 @@ class UndoInsertAt(QtmacsUndoCommand):
 
         # Determine and backup the region occupied by the just
         # inserted text to facilitate redo (ie. removing the text).
-        pos = self.qteWidget.positionFromLineIndex(self.line, self.col)
-        pos += len(self.insertedText)
-        line, col = self.qteWidget.lineIndexFromPosition(pos)
+        line, col = _insertionEnd(self.qteWidget, self.insertedText,
+                                  self.line, self.col)
         self.selectionPos = (self.line, self.col, line, col)
         self.qteWidget.setCursorPosition(line, col)
 
@@ -326,9 +325,8 @@ class UndoInsert(QtmacsUndoCommand):
         self.baseClass.insert(self.insertedText)
 
         # Determine and backup the region where the text was inserted.
-        pos = self.qteWidget.positionFromLineIndex(*self.cursorPosition)
-        pos += len(self.insertedText)
-        line, col = self.qteWidget.lineIndexFromPosition(pos)
+        line, col = _insertionEnd(self.qteWidget, self.insertedText,
+                                  *self.cursorPosition)
         self.selectionPos = (self.cursorPosition[0],
                              self.cursorPosition[1],
                              line, col)
@@ -482,6 +480,376 @@ class UndoGenericQtmacsScintilla(QtmacsUndoCommand):
         self.qteWidget.SCISetStylingEx(0, 0, self.styleBefore)
 
 
+def _endOfInsertion(text, line, col, before=''):
+    """
+    Return the (line, col) position after ``text`` when it is
+    inserted at (``line``, ``col``) right after the character
+    ``before``, or **None** if ``text`` could split or form a '\\r\\n'
+    line terminator with the adjacent text, ie. if it starts with
+    '\\n', ends with '\\r', or ``before`` is '\\r'.
+    """
+    if text.startswith('\n') or text.endswith('\r') or (before == '\r'):
+        return None
+    parts = QtmacsPositionIndex._reEOL.split(text)
+    if len(parts) == 1:
+        return line, col + len(text)
+    return line + len(parts) - 1, len(parts[-1])
+
+
+def _insertionEnd(wid, text, line, col):
+    """
+    Return the (line, col) position after ``text`` once it was
+    inserted at (``line``, ``col``) of the ``QtmacsScintilla``
+    widget ``wid``.
+
+    Columns count characters, so the end of the text usually follows
+    from its own lines alone. The position index is only consulted if
+    the text may interact with a neighbouring '\\r\\n' pair, because
+    updating it would re-read the rest of the document after every
+    insertion.
+    """
+    before = wid.text(line)[col - 1:col] if col > 0 else ''
+    stop = _endOfInsertion(text, line, col, before)
+    if stop is None:
+        idx = wid.qtePositionIndex()
+        stop = idx.charToLineCol(idx.lineColToChar(line, col) + len(text))
+    return stop
+
+
+class QtmacsPositionIndex(object):
+    """
+    Map between character offsets, UTF-8 byte offsets, and (line, col)
+    positions of a text snapshot.
+
+    Python string methods (eg. ``str.find`` or ``re.finditer``) return
+    character offsets whereas Scintilla expects byte offsets for
+    its ``SCI_*`` commands (eg. ``SCI_STARTSTYLING``) and the style
+    arrays returned by ``SCIGetStyledText`` contain one entry per
+    byte. For pure ASCII documents both are identical, but for
+    everything else they drift apart. This class keeps the start of
+    every line in both units so that all conversions are a binary
+    search plus (for non-ASCII lines only) the encoding of a single
+    line.
+
+    The column ``col`` is always measured in characters, and lines
+    end with any of the Scintilla line terminators, ie. '\\r\\n',
+    '\\r', or '\\n'. The terminator itself belongs to the line it
+    terminates, just like for the native ``text(line)`` method.
+
+    Use ``QtmacsScintilla.qtePositionIndex`` to get an up-to-date
+    index for a widget rather than instantiating this class directly.
+
+    .. note:: the conversion methods are called in tight loops by the
+              search- and replace macros and therefore deliberately
+              skip the ``type_check`` decorator.
+
+    |Args|
+
+    * ``text`` (**str**): the text to index.
+
+    |Raises|
+
+    * **QtmacsArgumentError** if at least one argument has an invalid type.
+    """
+    # Scintilla line terminators.
+    _reEOL = re.compile('\r\n|\r|\n')
+
+    @type_check
+    def __init__(self, text: str=''):
+        # Character- and byte offset of the first character in
+        # every line.
+        self._qteCharStart = [0]
+        self._qteByteStart = [0]
+
+        # The indexed text.
+        self._qteText = ''
+        self.qteUpdate(text)
+
+    @type_check
+    def qteUpdate(self, text: str, fromLine: int=0):
+        """
+        Re-index ``text`` from line ``fromLine`` onwards.
+
+        The caller guarantees that all lines before ``fromLine`` are
+        identical to the previously indexed text, which means only
+        the remainder of the document needs to be scanned.
+
+        |Args|
+
+        * ``text`` (**str**): the (new) text to index.
+        * ``fromLine`` (**int**): first line that may have changed.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        # Discard the line start tables from ``fromLine`` onwards.
+        fromLine = max(0, min(fromLine, len(self._qteCharStart) - 1))
+        del self._qteCharStart[fromLine + 1:]
+        del self._qteByteStart[fromLine + 1:]
+        self._qteText = text
+
+        # Character- and byte offset where the re-indexing starts.
+        char0 = self._qteCharStart[-1]
+        byte0 = self._qteByteStart[-1]
+        tail = text[char0:]
+
+        # Determine the new line starts in character units.
+        charStart = [m.end() + char0 for m in self._reEOL.finditer(tail)]
+
+        # Compute the corresponding byte offsets. This is trivial for
+        # ASCII text, which is also the most common case.
+        if _isASCII(tail):
+            byteStart = [_ - char0 + byte0 for _ in charStart]
+        else:
+            byteStart = []
+            prev = char0
+            for cur in charStart:
+                byte0 += len(text[prev:cur].encode('utf-8'))
+                byteStart.append(byte0)
+                prev = cur
+
+        self._qteCharStart.extend(charStart)
+        self._qteByteStart.extend(byteStart)
+
+    def text(self):
+        """
+        Return the indexed text.
+        """
+        return self._qteText
+
+    def numLines(self):
+        """
+        Return the number of lines in the indexed text.
+        """
+        return len(self._qteCharStart)
+
+    def numBytes(self):
+        """
+        Return the length of the indexed text in UTF-8 bytes.
+        """
+        last = self._qteCharStart[-1]
+        return (self._qteByteStart[-1] +
+                len(self._qteText[last:].encode('utf-8')))
+
+    def lineText(self, line: int):
+        """
+        Return the text of ``line`` including its line terminator.
+
+        This is the equivalent of the native ``text(line)`` method
+        of ``QsciScintilla`` but does not query the widget.
+
+        |Args|
+
+        * ``line`` (**int**): line number.
+
+        |Returns|
+
+        * **str**: the text in ``line`` or an empty string if ``line``
+          does not exist.
+
+        |Raises|
+
+        * **None**
+        """
+        if not (0 <= line < len(self._qteCharStart)):
+            return ''
+        start = self._qteCharStart[line]
+        if line + 1 < len(self._qteCharStart):
+            return self._qteText[start:self._qteCharStart[line + 1]]
+        else:
+            return self._qteText[start:]
+
+    def charToLineCol(self, pos: int):
+        """
+        Convert the character offset ``pos`` to (line, col).
+
+        |Args|
+
+        * ``pos`` (**int**): character offset.
+
+        |Returns|
+
+        * **tuple**: (line, col).
+
+        |Raises|
+
+        * **None**
+        """
+        pos = max(0, min(pos, len(self._qteText)))
+        line = bisect.bisect_right(self._qteCharStart, pos) - 1
+        return line, pos - self._qteCharStart[line]
+
+    def lineColToChar(self, line: int, col: int):
+        """
+        Convert (``line``, ``col``) to a character offset.
+
+        |Args|
+
+        * ``line`` (**int**): line number.
+        * ``col`` (**int**): column (in characters).
+
+        |Returns|
+
+        * **int**: character offset.
+
+        |Raises|
+
+        * **None**
+        """
+        line = max(0, min(line, len(self._qteCharStart) - 1))
+        return min(self._qteCharStart[line] + col, len(self._qteText))
+
+    def lineColToByte(self, line: int, col: int):
+        """
+        Convert (``line``, ``col``) to a UTF-8 byte offset.
+
+        |Args|
+
+        * ``line`` (**int**): line number.
+        * ``col`` (**int**): column (in characters).
+
+        |Returns|
+
+        * **int**: byte offset.
+
+        |Raises|
+
+        * **None**
+        """
+        line = max(0, min(line, len(self._qteCharStart) - 1))
+        text = self.lineText(line)
+        byte0 = self._qteByteStart[line]
+
+        # The character- and byte offsets only differ inside lines
+        # that contain non-ASCII characters.
+        if _isASCII(text):
+            return byte0 + min(col, len(text))
+        else:
+            return byte0 + len(text[:col].encode('utf-8'))
+
+    def charToByte(self, pos: int):
+        """
+        Convert the character offset ``pos`` to a UTF-8 byte offset.
+
+        |Args|
+
+        * ``pos`` (**int**): character offset.
+
+        |Returns|
+
+        * **int**: byte offset.
+
+        |Raises|
+
+        * **None**
+        """
+        return self.lineColToByte(*self.charToLineCol(pos))
+
+    def byteToLineCol(self, pos: int):
+        """
+        Convert the UTF-8 byte offset ``pos`` to (line, col).
+
+        If ``pos`` points into the middle of a multi-byte character
+        then the column of that character is returned.
+
+        |Args|
+
+        * ``pos`` (**int**): byte offset.
+
+        |Returns|
+
+        * **tuple**: (line, col).
+
+        |Raises|
+
+        * **None**
+        """
+        pos = max(0, pos)
+        line = bisect.bisect_right(self._qteByteStart, pos) - 1
+        text = self.lineText(line)
+        off = pos - self._qteByteStart[line]
+        if _isASCII(text):
+            return line, min(off, len(text))
+        else:
+            raw = text.encode('utf-8')[:off]
+            return line, len(raw.decode('utf-8', 'ignore'))
+
+    def byteToChar(self, pos: int):
+        """
+        Convert the UTF-8 byte offset ``pos`` to a character offset.
+
+        |Args|
+
+        * ``pos`` (**int**): byte offset.
+
+        |Returns|
+
+        * **int**: character offset.
+
+        |Raises|
+
+        * **None**
+        """
+        return self.lineColToChar(*self.byteToLineCol(pos))
+
+    def byteToLine(self, pos: int):
+        """
+        Return the line that contains the UTF-8 byte offset ``pos``.
+
+        |Args|
+
+        * ``pos`` (**int**): byte offset.
+
+        |Returns|
+
+        * **int**: line number.
+
+        |Raises|
+
+        * **None**
+        """
+        return max(0, bisect.bisect_right(self._qteByteStart, pos) - 1)
+
+    def charSpanToByteSpan(self, start: int, stop: int):
+        """
+        Convert the character span [``start``, ``stop``) to a byte span.
+
+        This is a convenience method for the search- and replace
+        macros that need to style the spans returned by ``str.find``
+        and ``re.finditer``.
+
+        |Args|
+
+        * ``start`` (**int**): character offset of first character.
+        * ``stop`` (**int**): character offset after the last character.
+
+        |Returns|
+
+        * **tuple**: (start, stop) in bytes.
+
+        |Raises|
+
+        * **None**
+        """
+        return self.charToByte(start), self.charToByte(stop)
+
+
+def _isASCII(text):
+    """
+    Return **True** if ``text`` only contains ASCII characters.
+    """
+    try:
+        return text.isascii()
+    except AttributeError:
+        # Python < 3.7 has no ``isascii`` method.
+        return len(text) == len(text.encode('utf-8'))
+
+
 class QtmacsScintilla(Qsci.QsciScintilla):
     """
     A drop-in replacement for ``QsciScintilla`` with Emacs like undo behaviour.
@@ -505,6 +873,78 @@ class QtmacsScintilla(Qsci.QsciScintilla):
         # Position of last set marker (line- and column number).
         self.qteMarkers = {}
 
+        # Journal of unsaved modifications (see ``qtmacs.journal``),
+        # installed by the applet if desired.
+        self.qteJournal = None
+
+        # Size and modification time of the file as of the last time
+        # the document was saved (or loaded), or **None** if unknown.
+        self.qteDiskStat = None
+
+        # Number of modifications of the text so far. It only ever
+        # increases and thus identifies a version of the document,
+        # unlike the size of the undo stack (which is reset).
+        self.qteVersion = 0
+
+        # Character/byte/line index of the document. It is only
+        # brought up to date when ``qtePositionIndex`` is called, and
+        # then only from the first modified byte onwards (**None**
+        # means the index is current).
+        self._qtePositionIndex = QtmacsPositionIndex()
+        self._qteIndexDirtyPos = 0
+        self.SCN_MODIFIED.connect(self._qteInvalidatePositionIndex)
+
+    def _qteInvalidatePositionIndex(self, pos, modType, *args):
+        """
+        Record the first byte position where the document changed.
+
+        This slot is connected to the ``SCN_MODIFIED`` signal and
+        ignores all notifications that did not alter the text (eg.
+        style changes). It also increments ``qteVersion``.
+        """
+        if not (modType & (self.SC_MOD_INSERTTEXT | self.SC_MOD_DELETETEXT)):
+            return
+        self.qteVersion += 1
+        if (self._qteIndexDirtyPos is None) or (pos < self._qteIndexDirtyPos):
+            self._qteIndexDirtyPos = pos
+
+    def qtePositionIndex(self):
+        """
+        Return an up-to-date ``QtmacsPositionIndex`` for the document.
+
+        The index is maintained incrementally, ie. only the lines
+        from the first modification onwards are re-indexed. The
+        same object is returned every time and describes the document
+        as of the last call only, ie. it does not follow subsequent
+        modifications until this method is called again (which then
+        updates it in place). It is therefore safe to keep using it
+        while modifying the document as long as the caller only
+        relies on the unmodified parts, eg. the lines before the one
+        currently being edited.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **QtmacsPositionIndex**: the index.
+
+        |Raises|
+
+        * **None**
+        """
+        if self._qteIndexDirtyPos is not None:
+            idx = self._qtePositionIndex
+
+            # Start one line before the modification because removing
+            # or inserting line terminators may join the modified line
+            # with the previous one (eg. '\r' + '\n').
+            line = idx.byteToLine(self._qteIndexDirtyPos) - 1
+            idx.qteUpdate(self.text(), max(0, line))
+            self._qteIndexDirtyPos = None
+        return self._qtePositionIndex
+
     @type_check
     def qteSetMark(self, markerID=0, line: int=None, col: int=None):
         """
@@ -615,8 +1055,10 @@ class QtmacsScintilla(Qsci.QsciScintilla):
 
         * **None**
         """
-        num_char_tot = len(self.text())
-        return self.lineIndexFromPosition(num_char_tot)
+        # ``lineIndexFromPosition`` expects a byte position, which
+        # differs from the number of characters in non-ASCII documents.
+        idx = self.qtePositionIndex()
+        return idx.charToLineCol(len(idx.text()))
 
     @type_check
     def isPositionValid(self, line: int, column: int):
@@ -0,0 +1,161 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+File operations that do not depend on Qt.
+
+The functions in this module may be called from any thread, eg. the
+file save worker of ``qtmacs.extensions.qtmacsscintilla_macros``, the
+journal of unsaved modifications (see ``qtmacs.journal``), the
+session file (see ``qtmacs.session``), and the worker processes of
+the ``occur`` applet (see ``qtmacs.occur_scan``).
+"""
+
+import os
+import stat
+import codecs
+import tempfile
+
+# The umask (required for the permissions of new files). It can only
+# be queried by changing it, which is why it is determined once when
+# the module is imported, ie. before any thread writes files.
+_umask = os.umask(0)
+os.umask(_umask)
+
+# Byte order marks and the corresponding codecs. Longer marks must
+# come first because the UTF-32 LE mark starts with the UTF-16 LE mark.
+bom_codecs = ((codecs.BOM_UTF32_LE, 'utf-32'),
+              (codecs.BOM_UTF32_BE, 'utf-32'),
+              (codecs.BOM_UTF8, 'utf-8-sig'),
+              (codecs.BOM_UTF16_LE, 'utf-16'),
+              (codecs.BOM_UTF16_BE, 'utf-16'),
+              )
+
+
+def detectEncoding(head):
+    """
+    Guess the encoding of a file from its first bytes ``head``.
+
+    Files with a byte order mark are decoded accordingly. Otherwise
+    the file is assumed to be UTF-8 if ``head`` is valid UTF-8
+    (apart from a possibly truncated character at the end), and
+    Latin-1 if not because every byte sequence is valid Latin-1.
+
+    |Args|
+
+    * ``head`` (**bytes**): the first bytes of the file.
+
+    |Returns|
+
+    * **str**: name of the codec.
+
+    |Raises|
+
+    * **None**
+    """
+    for bom, name in bom_codecs:
+        if head.startswith(bom):
+            return name
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def atomicWrite(fileName, data):
+    """
+    Replace the content of ``fileName`` with ``data`` atomically.
+
+    The data is written to a temporary file in the same directory,
+    flushed to disk, and then renamed to ``fileName``. At any point
+    in time ``fileName`` therefore contains either the old or the new
+    content, but never a truncated version. If ``fileName`` is a
+    symbolic link then its target is replaced, and the permissions of
+    an existing file are retained.
+
+    |Args|
+
+    * ``fileName`` (**str**): name of file.
+    * ``data`` (**bytes**): the new file content.
+
+    |Returns|
+
+    * **None**
+
+    |Raises|
+
+    * **OSError** if the file could not be written.
+    """
+    fileName = os.path.realpath(fileName)
+    path, name = os.path.split(fileName)
+    try:
+        mode = stat.S_IMODE(os.stat(fileName).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_umask
+
+    fd, tmpName = tempfile.mkstemp(prefix='.' + name + '.', suffix='.tmp',
+                                   dir=path)
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.chmod(tmpName, mode)
+        os.replace(tmpName, fileName)
+    except BaseException:
+        os.unlink(tmpName)
+        raise
+
+    # Persist the rename itself (not supported on all platforms).
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def readText(fileName):
+    """
+    Return the content of ``fileName`` decoded the same way the
+    ``SciEditor`` applet would decode it.
+
+    |Args|
+
+    * ``fileName`` (**str**): name of file.
+
+    |Returns|
+
+    * **str**: the decoded file content.
+
+    |Raises|
+
+    * **OSError** if the file could not be read.
+    """
+    with open(fileName, 'rb') as f:
+        data = f.read()
+    encoding = detectEncoding(data)
+    try:
+        return data.decode(encoding)
+    except UnicodeDecodeError:
+        # See ``SciEditor.qteDecodingFailed``.
+        if encoding in ('utf-8', 'utf-8-sig'):
+            return data.decode('latin-1')
+        return data.decode(encoding, 'replace')
@@ -0,0 +1,363 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Provide ``QtmacsFileWatcher`` to notify applets when their files
+change on disk, and to compute the line differences between a
+document and the new file content in a separate thread.
+
+At startup, Qtmacs creates one instance of ``QtmacsFileWatcher`` and
+places it into ``qte_global.file_watcher``.
+
+Usage example inside an applet::
+
+    import qtmacs.qte_global as qte_global
+
+    watcher = qte_global.file_watcher
+    watcher.qteWatch(fileName, self.fileChanged)
+
+    def fileChanged(self, fileName):
+        watcher.qteDiff(self.qteScintilla.text(), fileName, 'utf-8',
+                        self.applyHunks)
+
+"""
+
+import re
+import os
+import difflib
+import itertools
+import qtmacs.type_check
+
+from PyQt4 import QtCore
+
+# Shorthands:
+type_check = qtmacs.type_check.type_check
+
+# Scintilla line terminators.
+_reEOL = re.compile('\r\n|\r|\n')
+
+
+def splitLines(text):
+    """
+    Split ``text`` into lines the same way Scintilla does.
+
+    Unlike ``str.splitlines`` only '\\r\\n', '\\r', and '\\n' terminate
+    a line, and the terminators are retained.
+
+    |Args|
+
+    * ``text`` (**str**): the text to split.
+
+    |Returns|
+
+    * **list**: list of lines.
+
+    |Raises|
+
+    * **None**
+    """
+    lines, start = [], 0
+    for match in _reEOL.finditer(text):
+        lines.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        lines.append(text[start:])
+    return lines
+
+
+def diffHunks(oldText, newText):
+    """
+    Return the hunks that turn ``oldText`` into ``newText``.
+
+    Every hunk is a tuple ``(i1, i2, j1, j2, start, stop, text)``
+    which specifies that lines ``i1`` to ``i2`` in ``oldText`` must
+    be replaced by lines ``j1`` to ``j2`` of ``newText``, namely
+    ``text``. The ``start`` and ``stop`` positions are (line,
+    column) tuples of the affected range in ``oldText``. The hunks
+    are returned in ascending order.
+
+    |Args|
+
+    * ``oldText`` (**str**): current document.
+    * ``newText`` (**str**): new document.
+
+    |Returns|
+
+    * **list**: list of hunks.
+
+    |Raises|
+
+    * **None**
+    """
+    if oldText == newText:
+        return []
+
+    a, b = splitLines(oldText), splitLines(newText)
+    numLines = len(a)
+    endsWithEOL = (numLines == 0) or (a[-1][-1] in '\r\n')
+
+    def pos(line):
+        # Convert the start of ``line`` into a (line, column) tuple.
+        if (line < numLines) or endsWithEOL:
+            return (line, 0)
+        else:
+            return (numLines - 1, len(a[-1]))
+
+    matcher = difflib.SequenceMatcher(None, a, b)
+    hunks = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        hunks.append((i1, i2, j1, j2, pos(i1), pos(i2), ''.join(b[j1:j2])))
+    return hunks
+
+
+def mapLine(line, hunks):
+    """
+    Return the line number of ``line`` after applying ``hunks``.
+
+    Lines inside a modified region are mapped to the start of the
+    replacement.
+
+    |Args|
+
+    * ``line`` (**int**): line number in the old document.
+    * ``hunks`` (**list**): hunks returned by ``diffHunks``.
+
+    |Returns|
+
+    * **int**: line number in the new document.
+
+    |Raises|
+
+    * **None**
+    """
+    shift = 0
+    for hunk in hunks:
+        i1, i2, j1, j2 = hunk[:4]
+        if i2 <= line:
+            shift += (j2 - j1) - (i2 - i1)
+        elif i1 <= line:
+            return j1
+        else:
+            break
+    return line + shift
+
+
+class FileDiffWorker(QtCore.QObject):
+    """
+    Read a file and compute its difference to a document.
+
+    The result is a tuple with the list of hunks, the file size, and
+    the file content (in bytes), an error message if the file could
+    not be read, or the ``UnicodeDecodeError`` if the file is not
+    valid in the specified encoding.
+    """
+    # Arguments: job ID, document, file name, encoding.
+    sigStart = QtCore.pyqtSignal(int, object, str, str)
+
+    # Arguments: job ID, result.
+    sigFinished = QtCore.pyqtSignal(int, object)
+
+    def __init__(self):
+        super().__init__()
+        self.sigStart.connect(self.diff)
+
+    @QtCore.pyqtSlot(int, object, str, str)
+    def diff(self, jobID, oldText, fileName, encoding):
+        try:
+            with open(fileName, 'rb') as f:
+                data = f.read()
+            newText = data.decode(encoding)
+        except UnicodeDecodeError as err:
+            self.sigFinished.emit(jobID, err)
+            return
+        except (OSError, LookupError) as err:
+            self.sigFinished.emit(jobID, str(err))
+            return
+        hunks = diffHunks(oldText, newText)
+        self.sigFinished.emit(jobID, (hunks, len(data), data))
+
+
+class QtmacsFileWatcher(QtCore.QObject):
+    """
+    Notify subscribers when a file changes on disk.
+
+    Notifications are delayed by ``delay`` milliseconds to coalesce
+    the many change signals a single save operation usually causes.
+    Files replaced with a rename (eg. by atomic saves) remain
+    watched.
+    """
+    # Coalesce notifications within this many milliseconds.
+    delay = 200
+
+    def __init__(self):
+        super().__init__()
+
+        # Map file names to the list of their callbacks.
+        self._qteCallbacks = {}
+
+        # The Qt watcher and the set of files with pending notifications.
+        self._qteWatcher = QtCore.QFileSystemWatcher()
+        self._qteWatcher.fileChanged.connect(self._qteFileChanged)
+        self._qtePending = set()
+        self._qteTimer = QtCore.QTimer()
+        self._qteTimer.setSingleShot(True)
+        self._qteTimer.timeout.connect(self._qteNotify)
+
+        # The diff worker, its thread, and the callbacks of the
+        # pending diff jobs.
+        self._qteJobs = {}
+        self._qteJobID = itertools.count()
+        self._qteWorker = FileDiffWorker()
+        self._qteThread = QtCore.QThread()
+        self._qteWorker.moveToThread(self._qteThread)
+        self._qteWorker.sigFinished.connect(
+            self._qteDiffFinished, type=QtCore.Qt.QueuedConnection)
+
+        # Stop the thread together with the application.
+        app = QtCore.QCoreApplication.instance()
+        app.aboutToQuit.connect(self._qteThread.quit)
+        self._qteThread.start()
+
+    @type_check
+    def qteWatch(self, fileName: str, callback):
+        """
+        Call ``callback(fileName)`` whenever ``fileName`` changes.
+
+        |Args|
+
+        * ``fileName`` (**str**): file to watch.
+        * ``callback`` (**callable**): function to call.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        fileName = os.path.abspath(fileName)
+        callbacks = self._qteCallbacks.setdefault(fileName, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+        if fileName not in self._qteWatcher.files():
+            self._qteWatcher.addPath(fileName)
+
+    @type_check
+    def qteUnwatch(self, fileName: str, callback):
+        """
+        Remove ``callback`` for ``fileName``.
+
+        |Args|
+
+        * ``fileName`` (**str**): the watched file.
+        * ``callback`` (**callable**): function to remove.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        fileName = os.path.abspath(fileName)
+        callbacks = self._qteCallbacks.get(fileName, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if len(callbacks) == 0:
+            self._qteCallbacks.pop(fileName, None)
+            self._qtePending.discard(fileName)
+            if fileName in self._qteWatcher.files():
+                self._qteWatcher.removePath(fileName)
+
+    def qteDiff(self, oldText, fileName, encoding, callback):
+        """
+        Compute the difference between ``oldText`` and ``fileName``
+        in a separate thread and pass the result to ``callback``.
+
+        The result is either an error message (**str**) or a tuple
+        with the list of hunks (see ``diffHunks``), the file size,
+        and the file content as **bytes**.
+
+        |Args|
+
+        * ``oldText`` (**str**): current document.
+        * ``fileName`` (**str**): name of file to compare with.
+        * ``encoding`` (**str**): encoding of the file.
+        * ``callback`` (**callable**): function to call with the result.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        jobID = next(self._qteJobID)
+        self._qteJobs[jobID] = callback
+        self._qteWorker.sigStart.emit(jobID, oldText, fileName, encoding)
+
+    def _qteDiffFinished(self, jobID, result):
+        """
+        Hand the result of a diff job to its callback.
+        """
+        callback = self._qteJobs.pop(jobID, None)
+        if callback is None:
+            return
+        try:
+            callback(result)
+        except RuntimeError:
+            # The subscriber was deleted in the meantime.
+            pass
+
+    def _qteFileChanged(self, fileName):
+        """
+        Queue a notification for ``fileName``.
+
+        This slot is connected to the ``fileChanged`` signal of the
+        ``QFileSystemWatcher``.
+        """
+        # Files that are replaced by a rename are no longer
+        # watched. Add them again.
+        if os.path.exists(fileName) and \
+           (fileName not in self._qteWatcher.files()):
+            self._qteWatcher.addPath(fileName)
+
+        self._qtePending.add(fileName)
+        self._qteTimer.start(self.delay)
+
+    def _qteNotify(self):
+        """
+        Call the subscribers of all changed files.
+        """
+        pending, self._qtePending = self._qtePending, set()
+        for fileName in pending:
+            # Re-add the watch if the file re-appeared after its
+            # notification was queued.
+            if os.path.exists(fileName) and \
+               (fileName not in self._qteWatcher.files()):
+                self._qteWatcher.addPath(fileName)
+            for callback in list(self._qteCallbacks.get(fileName, [])):
+                try:
+                    callback(fileName)
+                except RuntimeError:
+                    # The subscriber was deleted in the meantime.
+                    pass
@@ -0,0 +1,368 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Provide ``QtmacsJournal`` to record all unsaved modifications of a
+``QtmacsScintilla`` widget, and ``recoverJournal`` to replay them
+onto the file after a crash.
+
+A journal consists of a one-line JSON header that describes the file
+on disk the modifications apply to (name, size, modification time,
+and encoding), followed by one binary record per insertion or
+deletion::
+
+    b'I' + struct.pack('<QI', pos, len(data)) + data
+    b'D' + struct.pack('<QI', pos, length)
+
+where ``pos`` and ``length`` are byte positions in the (UTF-8
+encoded) Scintilla document. The records are buffered in memory and
+only appended to the journal once the user paused for
+``qte_global.journal_delay`` milliseconds, or once they are older
+than ``qte_global.journal_max_delay`` milliseconds or larger than
+``qte_global.journal_max_pending`` bytes. The journal is deleted
+once the document is saved, and all remaining journals can be
+replayed with ``recoverJournal`` (or the ``recover-buffers`` macro
+of the ``SciEditor`` applet).
+
+Usage example::
+
+    import qtmacs.journal
+
+    journal = qtmacs.journal.QtmacsJournal(sciWidget, fileName, 'utf-8')
+
+"""
+
+import os
+import json
+import time
+import struct
+import hashlib
+import qtmacs.file_io
+import qtmacs.type_check
+import qtmacs.qte_global as qte_global
+
+from PyQt4 import QtCore
+from qtmacs.exceptions import QtmacsOtherError
+
+# Shorthands:
+type_check = qtmacs.type_check.type_check
+atomicWrite = qtmacs.file_io.atomicWrite
+
+# Binary layout of the record header (operation, position, length).
+_recHeader = struct.Struct('<cQI')
+
+
+def journalName(fileName):
+    """
+    Return the name of the journal for ``fileName``.
+
+    |Args|
+
+    * ``fileName`` (**str**): name of the journaled file.
+
+    |Returns|
+
+    * **str**: name of the journal file.
+
+    |Raises|
+
+    * **None**
+    """
+    fileName = os.path.abspath(fileName)
+    digest = hashlib.sha1(fileName.encode('utf-8')).hexdigest()
+    return os.path.join(journalDir(), digest + '.journal')
+
+
+def journalDir():
+    """
+    Return the (user expanded) journal directory.
+    """
+    return os.path.expanduser(qte_global.journal_dir)
+
+
+def allJournals():
+    """
+    Return the names of all journal files.
+    """
+    path = journalDir()
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return []
+    names = [_ for _ in names if _.endswith('.journal')]
+    return [os.path.join(path, _) for _ in sorted(names)]
+
+
+def _fileStat(fileName):
+    """
+    Return the size and modification time of ``fileName``, or
+    (-1, -1) if it does not exist.
+    """
+    try:
+        st = os.stat(fileName)
+    except OSError:
+        return -1, -1
+    return st.st_size, st.st_mtime_ns
+
+
+class QtmacsJournal(QtCore.QObject):
+    """
+    Record all insertions and deletions in ``qteWidget``.
+
+    The journal file is only created once the first modification was
+    recorded.
+
+    |Args|
+
+    * ``qteWidget`` (**QtmacsScintilla**): the widget to monitor.
+    * ``fileName`` (**str**): name of the file shown in the widget.
+    * ``encoding`` (**str**): encoding of that file.
+
+    |Raises|
+
+    * **QtmacsArgumentError** if at least one argument has an invalid type.
+    """
+    @type_check
+    def __init__(self, qteWidget, fileName: str, encoding: str):
+        super().__init__()
+        self.qteWidget = qteWidget
+        self.fileName = os.path.abspath(fileName)
+        self.encoding = encoding
+        self.journalName = journalName(fileName)
+
+        # Records not yet written to disk, and the total number of
+        # record bytes (written or pending) since the last save.
+        self._qtePending = []
+        self._qteNumBytes = 0
+
+        # Size of the pending records and the time the oldest of them
+        # was queued (**None** if there are none).
+        self._qtePendingBytes = 0
+        self._qtePendingSince = None
+
+        # Describe the file the records apply to.
+        self._qteHeader = self._qteMakeHeader()
+        self._qteHeaderWritten = False
+
+        # Write the pending records once the user paused.
+        self._qteTimer = QtCore.QTimer()
+        self._qteTimer.setSingleShot(True)
+        self._qteTimer.timeout.connect(self.qteFlush)
+
+        # Monitor all text modifications.
+        self._qteModMask = (qteWidget.SC_MOD_INSERTTEXT |
+                            qteWidget.SC_MOD_DELETETEXT)
+        qteWidget.SCN_MODIFIED.connect(self.qteModified)
+
+    def _qteMakeHeader(self):
+        """
+        Return the journal header for the current file on disk.
+        """
+        size, mtime = _fileStat(self.fileName)
+        header = {'file': self.fileName, 'size': size, 'mtime': mtime,
+                  'encoding': self.encoding}
+        return json.dumps(header).encode('utf-8') + b'\n'
+
+    def qteModified(self, pos, modType, text, length, *args):
+        """
+        Queue a record for every insertion and deletion.
+
+        This slot is connected to the ``SCN_MODIFIED`` signal.
+        """
+        if not (modType & self._qteModMask):
+            return
+        if modType & self.qteWidget.SC_MOD_INSERTTEXT:
+            data = bytes(text[:length])
+            rec = _recHeader.pack(b'I', pos, length) + data
+        else:
+            rec = _recHeader.pack(b'D', pos, length)
+        self._qtePending.append(rec)
+        self._qteNumBytes += len(rec)
+        self._qtePendingBytes += len(rec)
+        if self._qtePendingSince is None:
+            self._qtePendingSince = time.monotonic()
+
+        # Wait for a pause unless the user has been typing for so
+        # long, or the pending records became so large, that a crash
+        # would lose too much.
+        age = 1000 * (time.monotonic() - self._qtePendingSince)
+        if ((age >= qte_global.journal_max_delay) or
+                (self._qtePendingBytes >= qte_global.journal_max_pending)):
+            self.qteFlush()
+        else:
+            self._qteTimer.start(qte_global.journal_delay)
+
+    def qteFlush(self):
+        """
+        Append all pending records to the journal file.
+        """
+        self._qteTimer.stop()
+        if len(self._qtePending) == 0:
+            return
+
+        # Restart the limits of ``qteModified`` even if the write
+        # fails, lest every subsequent modification tries again.
+        self._qtePendingBytes = 0
+        self._qtePendingSince = None
+        data = b''.join(self._qtePending)
+        if not self._qteHeaderWritten:
+            data = self._qteHeader + data
+        try:
+            os.makedirs(journalDir(), exist_ok=True)
+            with open(self.journalName, 'ab') as journal:
+                journal.write(data)
+        except OSError as err:
+            msg = 'Cannot write journal <b>{}</b>: {}'
+            qte_global.qteMain.qteLogger.error(
+                msg.format(self.journalName, err))
+            return
+        self._qtePending = []
+        self._qteHeaderWritten = True
+
+    def qteMark(self):
+        """
+        Return a handle to the current position in the journal.
+
+        The handle is required for ``qteRebase``.
+        """
+        return self._qteNumBytes
+
+    def qteRebase(self, mark=None):
+        """
+        Declare the file on disk up to date as of ``mark``.
+
+        All records before ``mark`` (see ``qteMark``) are discarded
+        and the remaining ones now apply to the current file on
+        disk. If ``mark`` is **None** then all records are discarded
+        and the journal is deleted.
+
+        |Args|
+
+        * ``mark`` (**int**): position returned by ``qteMark``.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        self.qteFlush()
+        if mark is None:
+            mark = self._qteNumBytes
+
+        # Keep the records after ``mark``.
+        remainder = b''
+        if self._qteHeaderWritten and (mark < self._qteNumBytes):
+            try:
+                with open(self.journalName, 'rb') as journal:
+                    journal.seek(len(self._qteHeader) + mark)
+                    remainder = journal.read()
+            except OSError:
+                pass
+
+        self.qteDelete()
+        self._qteHeader = self._qteMakeHeader()
+        if len(remainder) > 0:
+            self._qtePending = [remainder]
+            self._qteNumBytes = len(remainder)
+            self.qteFlush()
+
+    def qteDelete(self):
+        """
+        Discard all records and delete the journal file.
+        """
+        self._qteTimer.stop()
+        self._qtePending = []
+        self._qteNumBytes = 0
+        self._qteHeaderWritten = False
+        try:
+            os.unlink(self.journalName)
+        except OSError:
+            pass
+
+    def qteClose(self):
+        """
+        Stop monitoring the widget and delete the journal file.
+
+        Use this method to discard the journal for good, eg. because
+        the document is replaced. Unlike ``qteDelete``, which merely
+        starts over, the journal records nothing afterwards.
+        """
+        self.qteWidget.SCN_MODIFIED.disconnect(self.qteModified)
+        self.qteDelete()
+
+
+def recoverJournal(journal):
+    """
+    Apply the records in ``journal`` to the file it describes.
+
+    The journal is deleted once the file was updated.
+
+    |Args|
+
+    * ``journal`` (**str**): name of the journal file.
+
+    |Returns|
+
+    * **str**: name of the recovered file.
+
+    |Raises|
+
+    * **QtmacsOtherError** if the journal is corrupt or the file
+      was modified since the journal was started.
+    * **OSError** if a file cannot be read or written.
+    """
+    with open(journal, 'rb') as f:
+        header = json.loads(f.readline().decode('utf-8'))
+        records = f.read()
+
+    # The records only apply to the version of the file they were
+    # recorded for.
+    fileName = header['file']
+    if _fileStat(fileName) != (header['size'], header['mtime']):
+        msg = 'File {} was modified since the journal was written'
+        raise QtmacsOtherError(msg.format(fileName))
+
+    if header['size'] < 0:
+        doc = bytearray()
+    else:
+        with open(fileName, 'rb') as f:
+            text = f.read().decode(header['encoding'], 'replace')
+        doc = bytearray(text.encode('utf-8'))
+
+    # Replay the records. A truncated last record is silently
+    # ignored because it may have been cut off by the crash.
+    ofs, numBytes = 0, len(records)
+    while ofs + _recHeader.size <= numBytes:
+        op, pos, length = _recHeader.unpack_from(records, ofs)
+        ofs += _recHeader.size
+        if op == b'I':
+            if ofs + length > numBytes:
+                break
+            doc[pos:pos] = records[ofs:ofs + length]
+            ofs += length
+        elif op == b'D':
+            del doc[pos:pos + length]
+        else:
+            raise QtmacsOtherError('Journal {} is corrupt'.format(journal))
+
+    text = doc.decode('utf-8', 'replace')
+    atomicWrite(fileName, text.encode(header['encoding'], 'replace'))
+    os.unlink(journal)
+    return fileName
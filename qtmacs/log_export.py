@@ -0,0 +1,290 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Export the Qtmacs log as JSON lines to a rotating file.
+
+``QtmacsLogExporter`` adds a ``logging.handlers.QueueHandler`` to the
+'qtmacs' logger. In the GUI thread this handler only converts the
+message to a string, attaches the context of the currently running
+macro, and places the record into a queue. A
+``logging.handlers.QueueListener`` thread then formats the records as
+JSON and writes them to a ``logging.handlers.RotatingFileHandler``.
+
+Every line is a JSON object with the fields
+
+* ``time``, ``level``, ``logger``, ``message``, ``module``,
+  ``line``: as in the log record,
+* ``macro``, ``applet``, ``keysequence``: the macro that was running
+  when the record was created, the ID of its applet, and the key
+  sequence that triggered it (**null** outside of macros),
+* ``macro_ms``: milliseconds since the macro started,
+* ``exception``: the formatted traceback (if any).
+
+In addition, the exporter writes one record with ``event`` set to
+'macro' whenever a macro finished. Its ``status`` field is 'ok' or
+'error', and its ``duration_ms`` field contains the run time of the
+macro. These records only go to the export file, not the LogViewer.
+
+Start Qtmacs with ``--log-json FILE`` to enable the export, or create
+an exporter from the configuration file::
+
+    import qtmacs.log_export
+    qtmacs.log_export.QtmacsLogExporter('~/.qtmacs/log/qtmacs.jsonl')
+
+It is safe to use::
+
+    from log_export import something
+
+"""
+
+import os
+import re
+import copy
+import json
+import time
+import queue
+import logging
+import traceback
+import logging.handlers
+import qtmacs.auxiliary
+import qtmacs.type_check
+import qtmacs.qte_global as qte_global
+
+from PyQt4 import QtCore, QtGui
+
+# Shorthands:
+type_check = qtmacs.type_check.type_check
+qteGetAppletFromWidget = qtmacs.auxiliary.qteGetAppletFromWidget
+
+# The context fields of every exported record.
+contextFields = ('macro', 'applet', 'keysequence', 'macro_ms')
+
+# HTML tags in log messages.
+_tagRe = re.compile(r'<[^>]*>')
+
+
+class QtmacsJSONFormatter(logging.Formatter):
+    """
+    Format a log record as a single line of JSON.
+
+    The HTML tags that are common in Qtmacs log messages are removed.
+    """
+    def format(self, record):
+        out = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': _tagRe.sub('', record.getMessage()),
+            'module': record.module,
+            'line': record.lineno,
+        }
+        for field in contextFields:
+            out[field] = getattr(record, field, None)
+
+        # Add the fields of macro events and the traceback (if any).
+        if getattr(record, 'event', None) is not None:
+            out['event'] = record.event
+            out['status'] = record.status
+            out['duration_ms'] = record.duration_ms
+        if record.exc_text:
+            out['exception'] = record.exc_text
+        return json.dumps(out, default=str)
+
+
+class QtmacsContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue a copy of every log record with the context of the current
+    macro.
+
+    |Args|
+
+    * ``recordQueue`` (**queue.Queue**): queue for the records.
+    * ``exporter`` (**QtmacsLogExporter**): provides the macro context.
+
+    |Raises|
+
+    * **None**
+    """
+    def __init__(self, recordQueue, exporter):
+        super().__init__(recordQueue)
+        self.exporter = exporter
+
+    def prepare(self, record):
+        """
+        Return a copy of ``record`` that is safe to format in the
+        listener thread.
+        """
+        # Do not modify the original record, because other handlers
+        # (eg. the one of the LogViewer) receive it as well.
+        record = copy.copy(record)
+
+        # Convert the message and traceback to strings here, because
+        # the arguments may reference Qt objects that must not be
+        # accessed outside the GUI thread.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = ''.join(
+                    traceback.format_exception(*record.exc_info))
+            record.exc_info = None
+        record.stack_info = None
+
+        # Add the context of the running macro, unless the record
+        # already provides it (eg. macro events).
+        for field, value in self.exporter.qteContext().items():
+            if not hasattr(record, field):
+                setattr(record, field, value)
+        return record
+
+
+class QtmacsLogExporter(QtCore.QObject):
+    """
+    Write all records of the 'qtmacs' logger as JSON lines to the
+    rotating file ``fileName``.
+
+    |Args|
+
+    * ``fileName`` (**str**): name of the export file.
+    * ``maxBytes`` (**int**): the file is rotated once it exceeds
+      this size.
+    * ``backupCount`` (**int**): number of rotated files to keep.
+    * ``level`` (**int**): minimum level of the exported records.
+
+    |Raises|
+
+    * **QtmacsArgumentError** if at least one argument has an invalid type.
+    """
+    @type_check
+    def __init__(self, fileName: str, maxBytes: int=10 * 2**20,
+                 backupCount: int=5, level: int=logging.DEBUG):
+        super().__init__()
+        self.qteMain = qte_global.qteMain
+
+        # Context of the currently running macro.
+        self._qteMacro = None
+        self._qteApplet = None
+        self._qteKeysequence = None
+        self._qteMacroStart = None
+
+        # The file handler is only ever used from the listener thread.
+        fileName = os.path.expanduser(fileName)
+        os.makedirs(os.path.dirname(fileName) or '.', exist_ok=True)
+        self.fileHandler = logging.handlers.RotatingFileHandler(
+            fileName, maxBytes=maxBytes, backupCount=backupCount,
+            encoding='utf-8')
+        self.fileHandler.setFormatter(QtmacsJSONFormatter())
+
+        # The GUI thread only enqueues the records.
+        self.queue = queue.Queue()
+        self.queueHandler = QtmacsContextQueueHandler(self.queue, self)
+        self.queueHandler.setLevel(level)
+        self.listener = logging.handlers.QueueListener(
+            self.queue, self.fileHandler)
+        self.listener.start()
+
+        # Track the running macro.
+        self.qteMain.qtesigMacroStart.connect(self.qteMacroStarted)
+        self.qteMain.qtesigMacroFinished.connect(self.qteMacroFinished)
+        self.qteMain.qtesigMacroError.connect(self.qteMacroError)
+
+        # Attach the handler to the Qtmacs logger and flush the queue
+        # when Qtmacs shuts down.
+        self.qteMain.qteLogger.addHandler(self.queueHandler)
+        app = QtGui.QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.qteStop)
+        qte_global.log_exporter = self
+
+    def qteContext(self):
+        """
+        Return the context of the currently running macro as a
+        dictionary with the keys in ``contextFields``.
+        """
+        if self._qteMacroStart is None:
+            elapsed = None
+        else:
+            elapsed = (time.perf_counter() - self._qteMacroStart) * 1000
+        return {'macro': self._qteMacro, 'applet': self._qteApplet,
+                'keysequence': self._qteKeysequence, 'macro_ms': elapsed}
+
+    def qteMacroStarted(self, msgObj):
+        """
+        Remember the name, applet, and key sequence of the macro that
+        is about to run.
+        """
+        macroName, widgetObj = msgObj.data
+        app = qteGetAppletFromWidget(widgetObj)
+        keysequence = getattr(qte_global, 'last_key_sequence', None)
+
+        self._qteMacro = macroName
+        self._qteApplet = None if app is None else app.qteAppletID()
+        if keysequence is None:
+            self._qteKeysequence = None
+        else:
+            self._qteKeysequence = keysequence.toString()
+        self._qteMacroStart = time.perf_counter()
+
+    def qteMacroFinished(self, msgObj):
+        self._qteMacroEvent('ok')
+
+    def qteMacroError(self, msgObj):
+        self._qteMacroEvent('error')
+
+    def _qteMacroEvent(self, status):
+        """
+        Export a macro event with ``status`` and clear the context.
+        """
+        if self._qteMacroStart is None:
+            return
+
+        # Create the record directly (not via the logger) to keep the
+        # event out of all other log handlers.
+        record = logging.LogRecord(
+            'qtmacs.macro', logging.INFO, __file__, 0,
+            'Macro %s finished (%s).', (self._qteMacro, status), None)
+        record.event = 'macro'
+        record.status = status
+        record.duration_ms = self.qteContext()['macro_ms']
+        self.queueHandler.handle(record)
+
+        self._qteMacro = self._qteApplet = self._qteKeysequence = None
+        self._qteMacroStart = None
+
+    def qteStop(self):
+        """
+        Detach from the logger and write all queued records.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        if self.listener is None:
+            return
+        self.qteMain.qteLogger.removeHandler(self.queueHandler)
+        self.listener.stop()
+        self.listener = None
+        self.fileHandler.close()
@@ -18,9 +18,10 @@
 """
 Define a custom logging handler class for the logger module.
 
-This handler is subclassed from ``logging.Handler``, stores all
-log-records that have every occurred, and triggers the signal supplied
-to the constructor whenever a new record is available.
+This handler is subclassed from ``logging.Handler``, stores the most
+recent log-records in a ring buffer of fixed capacity, and triggers
+the signal supplied to the constructor whenever a new record is
+available.
 
 The constructor of ``QtmacsMain`` will instantiate this
 object. Subsequently, all its methods, as well as all macros and
@@ -33,6 +34,13 @@ applets, can log messages with::
     self.qteLogger.exception('Only use inside Except block.',
                               exc_info-True, stack_info-True)
 
+Every record receives a monotonically increasing sequence number in
+its ``qteSeq`` attribute, and ``fetch`` returns the records by
+sequence number. Once the buffer is full the oldest record is evicted
+for every new one and, optionally, written to a rotating spill file
+beforehand. The ``firstSeq`` attribute denotes the oldest sequence
+number still in the buffer; any record before it was dropped.
+
 The class will not re-trigger ``sigNewLog`` until its ``fetch`` method
 was called, which will return all the log request accumulated since
 the last call. This can greatly reduce the system load if
@@ -66,7 +74,13 @@ Use example (see also documentation of ``logging`` module)::
     # (every macro and applet has this variable defined)
     self.qteLogger.addHandler(self.log_handler)
 """
+import os
+import time
 import logging
+import threading
+import traceback
+import collections
+import logging.handlers
 
 
 class QtmacsLoggingHandler(logging.Handler):
@@ -74,30 +88,58 @@ class QtmacsLoggingHandler(logging.Handler):
     A new handler for the logger module that uses Qt signals to signal
     new log messages.
 
-    The class stores all log records internally and provides a fetch()
-    method to distribute them to whomever asks. The arrival of new log
-    messages is indicated with a Qt signal. Ideally, this signal
-    should be connected as a ``QueuedConnection`` as the class is
-    smart enough to trigger it only once until data is fetched. This
-    keeps the event loop as congestion free as possible and allows for
-    batch processing of the log messages, instead of on a one-by-one
-    basis.
-
-    The class also keeps a record of all log messages it has every
-    issued and are not deleted when ``fetch`` is called.
+    The class stores the most recent ``capacity`` log records
+    internally and provides a fetch() method to distribute them to
+    whomever asks. The arrival of new log messages is indicated with a
+    Qt signal. Ideally, this signal should be connected as a
+    ``QueuedConnection`` as the class is smart enough to trigger it
+    only once until data is fetched. This keeps the event loop as
+    congestion free as possible and allows for batch processing of the
+    log messages, instead of on a one-by-one basis.
+
+    The records are not deleted when ``fetch`` is called, only when
+    they are evicted from the buffer. If ``spillFile`` is not **None**
+    then the evicted records are appended to this file, which is
+    rotated once it exceeds ``spillBytes`` (see
+    ``logging.handlers.RotatingFileHandler``).
+
+    To not keep the frames of a traceback alive, the exception
+    information of every record is formatted into its ``exc_text``
+    attribute and ``exc_info`` is cleared.
 
     |Args|
 
     * ``sigNewLog`` (**pyqtSignal**): the signal to trigger when a new
       log record arrives.
+    * ``capacity`` (**int**): maximum number of records in the buffer.
+    * ``spillFile`` (**str**): file for the evicted records.
+    * ``spillBytes`` (**int**): maximum size of the spill file.
+    * ``spillCount`` (**int**): number of rotated spill files to keep.
 
     """
-    def __init__(self, sigNewLog):
+    def __init__(self, sigNewLog, capacity=10000, spillFile=None,
+                 spillBytes=2**20, spillCount=3):
         super().__init__()
         self.sigNewLog = sigNewLog
+        self.spillBytes = spillBytes
+        self.spillCount = spillCount
+
+        # Ring buffer for the logger records.
+        self.log = collections.deque(maxlen=capacity)
+
+        # Sequence number of the oldest record in the buffer and of
+        # the next record to arrive.
+        self.firstSeq = 0
+        self.nextSeq = 0
 
-        # Buffer for all logger records.
-        self.log = []
+        # Total number of evicted records.
+        self.dropped = 0
+
+        # Optional handler for the evicted records. The file is only
+        # created once the first record is evicted.
+        self.spillFile = None
+        self.spillHandler = None
+        self._qteSetSpillFile(spillFile)
 
         # Flag to indicate whether a fetch signal was already
         # triggered. If True, then the fetch signal was delivered but
@@ -106,6 +148,66 @@ class QtmacsLoggingHandler(logging.Handler):
         # fetch() method.
         self.waitForFetch = False
 
+    def _qteSetSpillFile(self, spillFile):
+        """
+        Close the current spill file (if any) and use ``spillFile``.
+        """
+        if self.spillHandler is not None:
+            self.spillHandler.close()
+            self.spillHandler = None
+        self.spillFile = spillFile
+        if spillFile is None:
+            return
+        spillFile = os.path.expanduser(spillFile)
+        os.makedirs(os.path.dirname(spillFile) or '.', exist_ok=True)
+        self.spillHandler = logging.handlers.RotatingFileHandler(
+            spillFile, maxBytes=self.spillBytes, backupCount=self.spillCount,
+            delay=True)
+        fmt = '%(asctime)s %(levelname)s [%(qteSeq)d] - %(message)s'
+        self.spillHandler.setFormatter(logging.Formatter(fmt))
+
+    def _qteEvict(self):
+        """
+        Remove the oldest record from the buffer and spill it.
+        """
+        evicted = self.log.popleft()
+        self.firstSeq += 1
+        self.dropped += 1
+        if self.spillHandler is not None:
+            self.spillHandler.handle(evicted)
+
+    def qteConfigure(self, capacity, spillFile):
+        """
+        Change the capacity of the buffer and the spill file.
+
+        If the buffer holds more than ``capacity`` records then the
+        oldest ones are evicted right away (and appended to the new
+        spill file, if any).
+
+        |Args|
+
+        * ``capacity`` (**int**): maximum number of records in the buffer.
+        * ``spillFile`` (**str**): file for the evicted records.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        self.acquire()
+        try:
+            if spillFile != self.spillFile:
+                self._qteSetSpillFile(spillFile)
+            if capacity != self.log.maxlen:
+                while len(self.log) > capacity:
+                    self._qteEvict()
+                self.log = collections.deque(self.log, maxlen=capacity)
+        finally:
+            self.release()
+
     def emit(self, record):
         """
         Overloaded emit() function from the logger module.
@@ -116,6 +218,20 @@ class QtmacsLoggingHandler(logging.Handler):
         .. note:: this method is always only called from the
           ``logger`` module.
         """
+        # Format the traceback now and drop the reference to it, and
+        # thereby to all its frames.
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = ''.join(
+                    traceback.format_exception(*record.exc_info))
+            record.exc_info = None
+
+        # Evict the oldest record if the buffer is full.
+        if len(self.log) == self.log.maxlen:
+            self._qteEvict()
+
+        record.qteSeq = self.nextSeq
+        self.nextSeq += 1
         self.log.append(record)
 
         # Do not trigger the signal again if no one has fetched any
@@ -128,11 +244,15 @@ class QtmacsLoggingHandler(logging.Handler):
         """
         Fetch log records and return them as a list.
 
+        Records that were already evicted from the buffer are silently
+        skipped; compare ``start`` with ``firstSeq`` to determine their
+        number.
+
         |Args|
 
-        * ``start`` (**int**): non-negative index of the first log
+        * ``start`` (**int**): sequence number of the first log
           record to return.
-        * ``stop`` (**int**):  non-negative index of the last log
+        * ``stop`` (**int**): sequence number one past the last log
           record to return.
 
         |Returns|
@@ -144,22 +264,163 @@ class QtmacsLoggingHandler(logging.Handler):
 
         * **None**
         """
+        self.acquire()
+        try:
+            # Set defaults if no explicit sequence numbers were
+            # provided.
+            if not start:
+                start = 0
+            if not stop:
+                stop = self.nextSeq
+
+            # Sanity check: sequence numbers must be in the buffer.
+            start = max(start, self.firstSeq)
+            stop = min(stop, self.nextSeq)
+
+            # Clear the fetch flag. It will be set again in the emit()
+            # method once new data arrives.
+            self.waitForFetch = False
+
+            # Return the specified range of log records. The deque
+            # is traversed from its end if that is shorter, because
+            # most calls only ask for the latest records.
+            if start >= stop:
+                return []
+            if start - self.firstSeq < self.nextSeq - stop:
+                it = iter(self.log)
+                for _ in range(start - self.firstSeq):
+                    next(it)
+                return [next(it) for _ in range(stop - start)]
+            else:
+                it = reversed(self.log)
+                for _ in range(self.nextSeq - stop):
+                    next(it)
+                out = [next(it) for _ in range(stop - start)]
+                out.reverse()
+                return out
+        finally:
+            self.release()
+
+    def close(self):
+        """
+        Close the spill file (if any).
+        """
+        if self.spillHandler is not None:
+            self.spillHandler.close()
+        super().close()
 
-        # Set defaults if no explicit indices were provided.
-        if not start:
-            start = 0
-        if not stop:
-            stop = len(self.log)
 
-        # Sanity check: indices must be valid.
-        if start < 0:
-            start = 0
-        if stop > len(self.log):
-            stop = len(self.log)
+class QtmacsFloodFilter(logging.Filter):
+    """
+    Aggregate identical log records within a time window.
 
-        # Clear the fetch flag. It will be set again in the emit()
-        # method once new data arrives.
-        self.waitForFetch = False
+    Two records are identical if they share the logger name, level,
+    formatted message (ie. ``msg`` merged with ``args``), and call
+    site. The first record of a window passes the filter, together
+    with its traceback, whereas all identical records that arrive
+    within the next ``window`` seconds are only counted. Once the
+    window has expired, ``qteFlush`` passes a single record with the
+    number of repetitions to the handlers of ``logger``.
+
+    Attach the filter to a logger (not a handler) to spare all its
+    handlers the formatting of the suppressed records, and call
+    ``qteFlush`` periodically (``QtmacsMain`` uses a ``QTimer``).
+
+    |Args|
+
+    * ``logger`` (**logging.Logger**): logger that receives the
+      aggregated records.
+    * ``window`` (**float**): duration of the aggregation window in
+      seconds (zero disables the aggregation).
+
+    """
+    def __init__(self, logger, window=5.0):
+        super().__init__()
+        self.logger = logger
+        self.window = window
+
+        # Map the record keys to [window start, number of suppressed
+        # records, first record] lists.
+        self._qteWindows = {}
+
+        # Records may arrive from any thread.
+        self._qteLock = threading.Lock()
+
+    def filter(self, record):
+        """
+        Return **False** if ``record`` repeats a record of the current
+        window.
+        """
+        # Aggregated records always pass, and so does every record
+        # if the aggregation is disabled.
+        if getattr(record, 'qteRepeat', None) is not None:
+            return True
+        if self.window <= 0:
+            return True
+
+        # Leave records whose arguments do not match the message to
+        # the handlers, which report the formatting error.
+        try:
+            message = record.getMessage()
+        except Exception:
+            return True
+        key = (record.name, record.levelno, message,
+               record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._qteLock:
+            entry = self._qteWindows.get(key, None)
+            if (entry is not None) and (now - entry[0] < self.window):
+                entry[1] += 1
+                return False
+
+            # Start a new window. The previous one (if any) has expired
+            # but ``qteFlush`` has not summarised it yet.
+            self._qteWindows[key] = [now, 0, record]
+
+        # Summarise the expired window before ``record`` is handled.
+        if (entry is not None) and (entry[1] > 0):
+            self._qteEmitSummary(*entry)
+        return True
+
+    def qteFlush(self):
+        """
+        Pass a summary record to the logger for every expired window
+        that has suppressed records.
 
-        # Return the specified range of log records.
-        return self.log[start:stop]
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        now = time.monotonic()
+        expired = []
+        with self._qteLock:
+            for key, entry in list(self._qteWindows.items()):
+                if now - entry[0] >= self.window:
+                    del self._qteWindows[key]
+                    if entry[1] > 0:
+                        expired.append(entry)
+        for entry in expired:
+            self._qteEmitSummary(*entry)
+
+    def _qteEmitSummary(self, start, numRepeat, record):
+        """
+        Pass a copy of ``record`` (without traceback) to the handlers
+        of the logger and note that it was repeated ``numRepeat``
+        times.
+        """
+        summary = logging.makeLogRecord(record.__dict__)
+        summary.msg = record.getMessage()
+        summary.msg += ' -- (Repeated {} times in {:.1f}s)'.format(
+            numRepeat, time.monotonic() - start)
+        summary.args = None
+        summary.exc_info = summary.exc_text = summary.stack_info = None
+        summary.qteRepeat = numRepeat
+        self.logger.handle(summary)
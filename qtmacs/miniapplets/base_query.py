@@ -101,13 +101,17 @@ type_check = qtmacs.type_check.type_check
 qteQueryHistory = None
 qteHistIdx = None
 
+# ID of the applet that lists the completions. It is shared by all
+# mini applet queries.
+completionsAppID = '__Buffer Completions__'
+
 
 class AutocompleteInput(QtmacsMacro):
     """
     Display all possible completions in a dedicated applet.
 
     This macro executes when the user hits the <tab> key and creates a
-    new completions applet (a simple ``QTextEdit``) if none exists
+    new ``Completions`` applet if none exists
     yet, or brings an existing one to the front. In either case, the
     applet will display a list of all possible completions, ie. a list
     of all candidates that contain the user entered string as a
@@ -124,11 +128,8 @@ class AutocompleteInput(QtmacsMacro):
         self.qteSetAppletSignature('MiniApplet')
         self.qteSetWidgetSignature('QTextEdit')
 
-        # ID of the completions buffer. Note that this name is
-        # implicitly agreed upon between this macro and the QueryInput
-        # macro. Therefore, ensure to change the name in both
-        # locations if so desired.
-        self.completionsAppID = '__Buffer Completions__'
+        # ID of the completions applet.
+        self.completionsAppID = completionsAppID
 
     def qteRun(self):
         # Fetch the text typed into the mini applet by the user.
@@ -142,6 +143,7 @@ class AutocompleteInput(QtmacsMacro):
         # Keep only those entries which contain the user input as a
         # sub-string.
         if isinstance(completions, list) or isinstance(completions, tuple):
+            candidates = completions
             completions = [_ for _ in completions if userInput in _]
         else:
             completions = None
@@ -163,22 +165,44 @@ class AutocompleteInput(QtmacsMacro):
             return
 
         # If the completion is not unique then list all options,
-        # otherwise close the completions applet altogether.
+        # otherwise hide the completions applet (but keep it alive
+        # for the next <tab>).
         if (completions is not None) and (len(completions) > 1):
-            # Get a handle to the completions buffer or create a new
-            # one if none exists yet.
-            app = self.qteMain.qteGetAppletHandle(self.completionsAppID)
-            if app is None:
-                app = self.qteMain.qteNewApplet('RichEditor',
-                                                self.completionsAppID)
-            self.qteMain.qteSplitApplet(app)
-
-            # Clear the buffer and list the possible completions.
-            app.qteText.clear()
-            for _ in completions:
-                app.qteText.append(_)
+            self.qteShowCompletions(candidates, userInput)
         else:
-            self.qteMain.qteKillApplet(self.completionsAppID)
+            self.qteMain.qteRemoveAppletFromLayout(self.completionsAppID)
+
+    def qteShowCompletions(self, candidates, userInput):
+        """
+        Display all ``candidates`` that contain ``userInput`` in the
+        completions applet.
+
+        The applet is created if it does not exist yet, and shown if
+        it is currently hidden.
+
+        |Args|
+
+        * ``candidates`` (**list**): list of strings.
+        * ``userInput`` (**str**): the current user input.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        # Get a handle to the completions applet or create a new one
+        # if none exists yet.
+        app = self.qteMain.qteGetAppletHandle(self.completionsAppID)
+        if app is None:
+            app = self.qteMain.qteNewApplet('Completions',
+                                            self.completionsAppID)
+            if app is None:
+                return
+        self.qteMain.qteSplitApplet(app)
+        app.qteSetCompletions(candidates, userInput)
 
 
 class QueryInput(QtmacsMacro):
@@ -201,11 +225,8 @@ class QueryInput(QtmacsMacro):
         self.qteSetAppletSignature('MiniApplet')
         self.qteSetWidgetSignature('QTextEdit')
 
-        # ID of the completions buffer. Note that this name is
-        # implicitly agreed upon between this macro and the
-        # AutocompleteInput macro. Therefore, ensure to change the
-        # name in both locations if so desired.
-        self.completionsAppID = '__Buffer Completions__'
+        # ID of the completions applet.
+        self.completionsAppID = completionsAppID
 
     def qteRun(self):
         # Fetch the final user input.
@@ -367,15 +388,7 @@ class MiniAppletBaseQuery(QtmacsApplet):
 
         # Automatically determine a unique applet ID if none was provided.
         if appletID is None:
-            cnt = 0
-            while True:
-                appletID = '__DefaultQuery#{}__'.format(cnt)
-                import qtmacs.qte_global
-                qteMain = qtmacs.qte_global.qteMain
-                if qteMain.qteGetAppletHandle(appletID) is None:
-                    break
-                else:
-                    cnt += 1
+            appletID = applet.qteMain.qteUniqueAppletID('__DefaultQuery#{}__')
 
         # Initialise the base classes and define the applet signature
         # (all the macros defined earlier must use the same applet
@@ -443,6 +456,9 @@ class MiniAppletBaseQuery(QtmacsApplet):
         n = self.qteMain.qteRegisterMacro(BackInHistory, replaceMacro=True)
         self.qteMain.qteBindKeyWidget('<Alt>+p', n, self.qteText)
 
+        # Filter the displayed completions as the user types.
+        self.qteText.textChanged.connect(self.qteFilterCompletions)
+
         # If a prefix- and/or postfix string were specified then use
         # the respective QLabels to display them.
         self.prefix = prefix
@@ -459,6 +475,15 @@ class MiniAppletBaseQuery(QtmacsApplet):
             self.qteTextPostfix.setText(postfix)
             self.qteTextPostfix.setVisible(True)
 
+    def qteFilterCompletions(self):
+        """
+        Filter the completions applet (if visible) with the current
+        user input.
+        """
+        app = self.qteMain.qteGetAppletHandle(completionsAppID)
+        if (app is not None) and app.qteIsVisible():
+            app.qteFilter(self.qteText.toPlainText())
+
     def generateCompletions(self, userInput):
         """
         Virtual: must be overloaded to return purpose built completion
@@ -71,10 +71,9 @@ configuration file, start Qtmacs, press `<alt>+x`, type
     # Register the macro with Qtmacs.
     qteRegisterMacro(ExampleQuery)
 
-..note: the implementation of this query is very similar to the one in
-        base_query.py. The reason why this one does not inhert it is
-        because the history feature needs to manipulate a global module
-        variable.
+..note: ``MiniAppletFindFile`` derives from ``MiniAppletBaseQuery``
+        and only replaces the source of the completions (the <tab>
+        macro), the prefix, and the initial user input.
 
 It is safe to use::
 
@@ -83,30 +82,29 @@ It is safe to use::
 """
 import os
 import qtmacs.type_check
+import qtmacs.qte_global as qte_global
 import qtmacs.miniapplets.base_query as base_query
 
 from PyQt4 import QtCore, QtGui
-from qtmacs.base_macro import QtmacsMacro
 from qtmacs.base_applet import QtmacsApplet
 
 # Shorthands
 type_check = qtmacs.type_check.type_check
+MiniAppletBaseQuery = base_query.MiniAppletBaseQuery
 
-# Global variables used by the macros to query and update the
-# history. Macros using the ``MiniAppletBaseQuery`` class must
-# point ``qteQueryHistory`` to the history (a Python list) they would
-# like to use.
-qteQueryHistory = []
-qteHistIdx = None
+# The mini applet uses the history- and input macros of
+# ``MiniAppletBaseQuery``.
+QueryInput = base_query.QueryInput
+NextInHistory = base_query.NextInHistory
+BackInHistory = base_query.BackInHistory
 
 
 class AutocompleteInput(base_query.AutocompleteInput):
     """
     Display all possible file completions in a dedicated applet.
 
-    Create (or reuse) the applet with ID '\*\*Completions\*\*' to
-    display all possible completions for the partially entered file
-    name.
+    Create (or reuse) the ``Completions`` applet to display all
+    possible completions for the partially entered file name.
 
     |Signature|
 
@@ -116,36 +114,19 @@ class AutocompleteInput(base_query.AutocompleteInput):
     """
     def qteRun(self):
         # Fetch the text typed into the mini applet by the user
-        # and extract purely the path name.
+        # and split it into the path- and (partial) file name.
         userInput = self.qteWidget.toPlainText()
-        path = os.path.split(userInput)
-        path = path[0]
+        path, prefix = os.path.split(userInput)
 
         # If the path is empty replace it with the root path.
         if len(path) == 0:
             path = '/'
 
-        # Get a handle to the current directory and extract all files
-        # and directories in it.
-        curDir = QtCore.QDir(path)
-        curDir.setFilter(QtCore.QDir.AllEntries | QtCore.QDir.NoDot)
-        curDir.setSorting(QtCore.QDir.Name | QtCore.QDir.DirsFirst)
-        curDir = curDir.entryInfoList()
-
-        # Convert the list of QFileEntry obejects to strings denoting
-        # the absolute file names (ie. path + fileName,
-        # eg. /foo/bar.txt). Also, remove those entries that do not
-        # contain the user input as a sub-string.
-        completions = []
-        for ii in curDir:
-            name = ii.absoluteFilePath()
-            if userInput not in name:
-                continue
-
-            if ii.isDir():
-                completions.append(name + '/')
-            else:
-                completions.append(name)
+        # Fetch the absolute names of all files and directories in
+        # the current directory that start with the partial file
+        # name. Directories come first and have a trailing '/'. The
+        # listing is cached until the directory changes.
+        completions = qte_global.dir_cache.qteCompletions(path, prefix)
 
         # Call the generateCompletions method from the
         # ``MiniAppletBaseQuery`` class (the programmer has to
@@ -155,6 +136,7 @@ class AutocompleteInput(base_query.AutocompleteInput):
         # Keep only those entries which contain the user input as a
         # sub-string.
         if isinstance(completions, list) or isinstance(completions, tuple):
+            candidates = completions
             completions = [_ for _ in completions if userInput in _]
         else:
             completions = None
@@ -176,156 +158,15 @@ class AutocompleteInput(base_query.AutocompleteInput):
             return
 
         # If the completion is not unique then list all options,
-        # otherwise close the completions applet altogether.
+        # otherwise hide the completions applet (but keep it alive
+        # for the next <tab>).
         if (completions is not None) and (len(completions) > 1):
-            # Get a handle to the completions buffer or create a new
-            # one if none exists yet.
-            app = self.qteMain.qteGetAppletHandle(self.completionsAppID)
-            if app is None:
-                app = self.qteMain.qteNewApplet('RichEditor',
-                                                self.completionsAppID)
-            self.qteMain.qteSplitApplet(app)
-
-            # Clear the buffer and list the possible completions.
-            app.qteText.clear()
-            for _ in completions:
-                app.qteText.append(_)
+            self.qteShowCompletions(candidates, userInput)
         else:
-            self.qteMain.qteKillApplet(self.completionsAppID)
+            self.qteMain.qteRemoveAppletFromLayout(self.completionsAppID)
 
 
-class QueryInput(QtmacsMacro):
-    """
-    Close the mini applet and process the user input.
-
-    This macro executes when the user hits <enter> to finalise the
-    input. The mini applet is closed and the extracted string passed
-    to the (overloaded) ``inputCompleted`` method in the
-    ``MiniAppletBaseQuery`` object.
-
-    |Signature|
-
-    * *applet*: 'MiniApplet'
-    * *widget*: ``QTextEdit``
-
-    """
-    def __init__(self):
-        super().__init__()
-        self.qteSetAppletSignature('MiniApplet')
-        self.qteSetWidgetSignature('QTextEdit')
-
-        # ID of the completions buffer. Note that this name is
-        # implicitly agreed upon between this macro and the
-        # AutocompleteInput macro. Therefore, ensure to change the
-        # name in both locations if so desired.
-        self.completionsAppID = '__Buffer Completions__'
-
-    def qteRun(self):
-        # Fetch the final user input.
-        userInput = self.qteWidget.toPlainText()
-
-        # If a history list was supplied to ``MiniAppletBaseQuery``
-        # then add the latest entry.
-        global qteQueryHistory, qteHistIdx
-        if isinstance(qteQueryHistory, list):
-            qteQueryHistory.append(userInput)
-            qteHistIdx = len(qteQueryHistory)
-
-        # Process the user input in the main object and close the mini
-        # applet.
-        self.qteApplet.inputCompleted(userInput)
-
-        # Kill the completions buffer and mini applet. The methods are
-        # smart enough to do nothing if one or the other (or both)
-        # do not exist anymore.
-        self.qteMain.qteRemoveAppletFromLayout(self.completionsAppID)
-        self.qteMain.qteKillApplet(self.completionsAppID)
-        self.qteMain.qteKillMiniApplet()
-
-
-class NextInHistory(QtmacsMacro):
-    """
-    Yield the next-older entry in the history and display it in the
-    mini applet.
-
-    This macro will do nothing if ``MiniAppletBaseQuery`` (or the
-    derived class) was not instantiated with a valid Python list as
-    the history.
-
-    |Signature|
-
-    * *applet*: 'MiniApplet'
-    * *widget*: ``QTextEdit``
-
-    """
-    def __init__(self):
-        super().__init__()
-        self.qteSetAppletSignature('MiniApplet')
-        self.qteSetWidgetSignature('QTextEdit')
-
-    def qteRun(self):
-        # Return immediately if no history list exists.
-        global qteQueryHistory, qteHistIdx
-        if not isinstance(qteQueryHistory, list):
-            return
-
-        # If no newer element is available then do nothing.
-        if qteHistIdx >= len(qteQueryHistory) - 1:
-            return
-
-        # Increment the counter to point to the next element in the history
-        # and overwrite the entire content of the QTextEdit with the item from
-        # the history list.
-        qteHistIdx += 1
-        msg = qteQueryHistory[qteHistIdx]
-        self.qteWidget.setPlainText(msg)
-        tc = self.qteWidget.textCursor()
-        tc.movePosition(QtGui.QTextCursor.EndOfLine)
-        self.qteWidget.setTextCursor(tc)
-
-
-class BackInHistory(QtmacsMacro):
-    """
-    Yield the next-newer entry in the history and display it in the
-    mini applet.
-
-    This macro will do nothing if ``MiniAppletBaseQuery`` (or the
-    derived class) was not instantiated with a valid Python list as
-    the history.
-
-    |Signature|
-
-    * *applet*: 'MiniApplet'
-    * *widget*: ``QTextEdit``
-
-    """
-    def __init__(self):
-        super().__init__()
-        self.qteSetAppletSignature('MiniApplet')
-        self.qteSetWidgetSignature('QTextEdit')
-
-    def qteRun(self):
-        # Return immediately if no history list exists.
-        global qteQueryHistory, qteHistIdx
-        if not isinstance(qteQueryHistory, list):
-            return
-
-        # If no older element is available then do nothing.
-        if qteHistIdx == 0:
-            return
-
-        # Decrement the counter to point to the previous element in
-        # the history and overwrite the entire content of the
-        # QTextEdit with the item from the history list.
-        qteHistIdx -= 1
-        msg = qteQueryHistory[qteHistIdx]
-        self.qteWidget.setPlainText(msg)
-        tc = self.qteWidget.textCursor()
-        tc.movePosition(QtGui.QTextCursor.EndOfLine)
-        self.qteWidget.setTextCursor(tc)
-
-
-class MiniAppletFindFile(QtmacsApplet):
+class MiniAppletFindFile(MiniAppletBaseQuery):
     """
     Customisable auto completion mini applet.
 
@@ -369,83 +210,18 @@ class MiniAppletFindFile(QtmacsApplet):
     @type_check
     def __init__(self, applet: QtmacsApplet, widget: QtGui.QWidget,
                  history: list=None, appletID: str=None):
+        super().__init__(applet, widget, appletID=appletID,
+                         prefix='Find file:', history=history)
 
-        # Automatically determine a unique applet ID if none was provided.
-        if appletID is None:
-            cnt = 0
-            while True:
-                appletID = '__DefaultQuery#{}__'.format(cnt)
-                if not applet.qteMain.qteGetAppletHandle(appletID):
-                    break
-                else:
-                    cnt += 1
-
-        # Initialise the base classes and define the applet signature
-        # (all the macros defined earlier must use this applet signature).
-        super().__init__(appletID)
-        self.qteSetAppletSignature('MiniApplet')
-
-        # Point the global variables to the user supplied history, or
-        # **None** if it is missing.
-        global qteQueryHistory, qteHistIdx
-        if isinstance(history, list):
-            qteQueryHistory = history
-            qteHistIdx = len(qteQueryHistory)
-        else:
-            qteQueryHistory = qteHistIdx = None
-
-        # Make sure the mini applet is only as high as it has to be,
-        # otherwise the Qt layout engine is likely to allocate it half
-        # the vertical space (ugly!).
-        fm = self.fontMetrics().size(0, 'X')
-        self.setMaximumHeight(2.5 * fm.height())
-
-        # Keep a reference to the calling applet and widget.
-        self.qteWidget = widget
-        self.qteApplet = applet
-
-        # Line up a QLabel for the "Find file" prefix string, and a
-        # QTextEdit (pure text only) for the user input.
-        self.qteTextPrefix = self.qteAddWidget(QtGui.QLabel(self),
-                                               isFocusable=False)
-        self.qteTextPrefix.setText('Find file:')
-        self.qteText = self.qteAddWidget(QtGui.QTextEdit(self))
-        self.qteText.setAcceptRichText(False)
-
+        # Start in the current directory.
         curDir = QtCore.QDir().current()
         self.qteText.append(curDir.absolutePath() + '/')
 
-        # At this point, the QTextEdit used in the mini applet as a
-        # text entry field is already endowed will all the usual
-        # macros and key-bindings for a QTextEdit (the qteAddWidget
-        # method took care of that). However, to be useful in a mini
-        # applet context the <tab> key should trigger auto-completion
-        # instead of literally inserting a <tab>, and the <enter> key
-        # should close the mini applet and process its input, instead
-        # of inserting a newline. Similarly, <ctrl>-p and <ctrl>-n
-        # should go back and forth in the history. Therefore, replace
-        # the default macros for these keys with dedicated macros that
-        # enact the just behaviour for the QTextEdit in the mini
-        # applet.
-
-        # Auto-completion.
-        p = QtCore.Qt
+        # Complete file names instead of the strings returned by
+        # ``generateCompletions``.
         n = self.qteMain.qteRegisterMacro(AutocompleteInput, replaceMacro=True)
         self.qteMain.qteBindKeyWidget('<Tab>', n, self.qteText)
 
-        # Process final user input.
-        n = self.qteMain.qteRegisterMacro(QueryInput, replaceMacro=True)
-        self.qteMain.qteBindKeyWidget('<Enter>', n, self.qteText)
-        self.qteMain.qteBindKeyWidget('<Return>', n, self.qteText)
-
-        # Bring up next element in the history.
-        n = self.qteMain.qteRegisterMacro(NextInHistory, replaceMacro=True)
-        self.qteMain.qteBindKeyWidget('<Alt>+n', n, self.qteText)
-
-        # Bring up previous element in the history.
-        n = self.qteMain.qteRegisterMacro(BackInHistory, replaceMacro=True)
-        self.qteMain.qteBindKeyWidget('<Alt>+p', n, self.qteText)
-
     def generateCompletions(self, completions):
         """
         Generate the possible list of completions.
@@ -0,0 +1,852 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Mini applet template for project wide fuzzy file queries.
+
+Unlike ``MiniAppletFindFile``, which completes one directory level at
+a time, this query matches the user input against every file in the
+project. A file matches if it contains all characters of the input in
+the same order (eg. 'scied' matches 'qtmacs/applets/scieditor.py').
+The matches are ranked and displayed as the user types; <tab> and
+<ctrl>+n/<ctrl>+p select a match and <enter> accepts it.
+
+The project root is the closest ancestor of the directory of the file
+shown in the calling applet (or of the current directory if there is
+no such file) that contains a version control directory (eg. '.git').
+It is crawled in a separate thread, honouring the '.gitignore' and
+'.ignore' files along the way, and the resulting ``FuzzyIndex`` is
+cached (and refreshed in the background) for subsequent queries.
+
+The user needs to overload the ``inputCompleted`` method to implement
+the desired action on the absolute name of the chosen file::
+
+    class ExampleQuery(QtmacsMacro):
+        class Query(MiniAppletFuzzyFindFile):
+            def inputCompleted(self, userInput):
+                self.qteMain.qteStatus('Selected file: ' + userInput);
+
+        def __init__(self):
+            super().__init__()
+            self.qteSetAppletSignature('*')
+            self.qteSetWidgetSignature('*')
+
+        def qteRun(self):
+            query = self.Query(self.qteApplet, self.qteWidget)
+            self.qteMain.qteAddMiniApplet(query)
+
+    # Register the macro with Qtmacs.
+    qteRegisterMacro(ExampleQuery)
+
+It is safe to use::
+
+    from fuzzy_file_query import *
+
+"""
+import os
+import re
+import heapq
+import fnmatch
+import qtmacs.type_check
+import qtmacs.miniapplets.base_query as base_query
+
+from PyQt4 import QtCore, QtGui
+from qtmacs.base_macro import QtmacsMacro
+from qtmacs.base_applet import QtmacsApplet
+
+# Shorthands
+type_check = qtmacs.type_check.type_check
+
+# Directories that mark the root of a project and are never indexed.
+vcsDirs = ('.git', '.hg', '.svn', '.bzr')
+
+# Ignore files consulted in every directory.
+ignoreFiles = ('.gitignore', '.ignore')
+
+
+def projectRoot(path):
+    """
+    Return the closest ancestor of ``path`` that contains a version
+    control directory, or ``path`` itself if there is none.
+
+    |Args|
+
+    * ``path`` (**str**): directory to start the search from.
+
+    |Returns|
+
+    * **str**: absolute path of the project root.
+
+    |Raises|
+
+    * **None**
+    """
+    path = os.path.abspath(path)
+    cur = path
+    while True:
+        if any(os.path.isdir(os.path.join(cur, _)) for _ in vcsDirs):
+            return cur
+        parent = os.path.dirname(cur)
+        if parent == cur:
+            return path
+        cur = parent
+
+
+def readIgnoreRules(path, relDir):
+    """
+    Return the rules of all ignore files in directory ``path``.
+
+    Every rule is a tuple ``(regexp, anchored, dirOnly)``. Anchored
+    rules (ie. patterns that contain a '/') are matched against the
+    path relative to the project root, all others against the bare
+    name. Negated patterns ('!') are not supported and skipped.
+
+    |Args|
+
+    * ``path`` (**str**): absolute path of the directory.
+    * ``relDir`` (**str**): the same directory relative to the
+      project root ('' for the root itself).
+
+    |Returns|
+
+    * **list**: list of rules.
+
+    |Raises|
+
+    * **None**
+    """
+    rules = []
+    for name in ignoreFiles:
+        try:
+            with open(os.path.join(path, name), 'r', errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            continue
+        for pat in lines:
+            pat = pat.strip()
+            if (pat == '') or pat.startswith('#') or pat.startswith('!'):
+                continue
+            dirOnly = pat.endswith('/')
+            pat = pat.rstrip('/')
+            anchored = '/' in pat
+            if anchored:
+                pat = os.path.join(relDir, pat.lstrip('/'))
+            regexp = re.compile(fnmatch.translate(pat))
+            rules.append((regexp, anchored, dirOnly))
+    return rules
+
+
+def isIgnored(relPath, name, isDir, rules):
+    """
+    Return **True** if any of the ``rules`` matches the file.
+
+    |Args|
+
+    * ``relPath`` (**str**): file name relative to the project root.
+    * ``name`` (**str**): file name without the path.
+    * ``isDir`` (**bool**): whether the file is a directory.
+    * ``rules`` (**list**): rules returned by ``readIgnoreRules``.
+
+    |Returns|
+
+    * **bool**: whether the file is ignored.
+
+    |Raises|
+
+    * **None**
+    """
+    for regexp, anchored, dirOnly in rules:
+        if dirOnly and not isDir:
+            continue
+        if regexp.match(relPath if anchored else name):
+            return True
+    return False
+
+
+def crawlProject(root, maxFiles):
+    """
+    Return the names (relative to ``root``) of all files in the
+    project that are not ignored.
+
+    Version control directories, symbolic links to directories, and
+    file names with line breaks are skipped.
+
+    |Args|
+
+    * ``root`` (**str**): absolute path of the project root.
+    * ``maxFiles`` (**int**): stop after this many files.
+
+    |Returns|
+
+    * **list**: list of relative file names.
+
+    |Raises|
+
+    * **None**
+    """
+    files = []
+    stack = [('', [])]
+    while len(stack) > 0:
+        relDir, rules = stack.pop()
+        path = os.path.join(root, relDir)
+        rules = rules + readIgnoreRules(path, relDir)
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            continue
+        for entry in entries:
+            name = entry.name
+            if (name in vcsDirs) or ('\n' in name) or ('\r' in name):
+                continue
+            relPath = os.path.join(relDir, name)
+            try:
+                isDir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if isIgnored(relPath, name, isDir, rules):
+                continue
+            if isDir:
+                stack.append((relPath, rules))
+            else:
+                files.append(relPath)
+                if len(files) >= maxFiles:
+                    return files
+    return files
+
+
+def fuzzyScore(path, query):
+    """
+    Return the score of ``path`` for the fuzzy ``query``, or **None**
+    if ``path`` does not contain all characters of ``query`` in order.
+
+    The characters are matched from the end of ``path`` to favour
+    matches in the file name over matches in the directory names.
+    Consecutive characters and characters at the start of a word
+    (ie. after '/', '_', '-', '.', or ' ') earn a bonus, and so does a
+    match that lies entirely inside the file name.
+
+    |Args|
+
+    * ``path`` (**str**): lower case file name.
+    * ``query`` (**str**): lower case query.
+
+    |Returns|
+
+    * **int**: score (higher is better).
+
+    |Raises|
+
+    * **None**
+    """
+    score, pos, prev = 0, len(path), None
+    for char in reversed(query):
+        pos = path.rfind(char, 0, pos)
+        if pos < 0:
+            return None
+        if prev == pos + 1:
+            score += 5
+        if (pos == 0) or (path[pos - 1] in '/_-. '):
+            score += 3
+        prev = pos
+    if pos > path.rfind('/'):
+        score += 10
+    return score
+
+
+class FuzzyIndex(object):
+    """
+    Index of all file names in a project, optimised for fuzzy queries.
+
+    The names are sorted by length and concatenated (in lower case)
+    into a single string with one name per line. A query is compiled
+    into a regular expression that only matches lines which contain
+    all of its characters in order, and all matching lines are ranked
+    with ``fuzzyScore``. If a query extends the previous one then only
+    the previous candidates are searched again.
+
+    Scanning a large index takes tens of milliseconds, which is why
+    ``ProjectIndexer.qteMatch`` runs the queries in a separate thread.
+    The index is not thread safe, ie. all queries of one index must
+    run in the same thread.
+
+    |Args|
+
+    * ``root`` (**str**): absolute path of the project root.
+    * ``names`` (**list**): file names relative to ``root``.
+
+    |Raises|
+
+    * **None**
+    """
+    def __init__(self, root, names):
+        self.root = root
+        names = sorted(names, key=lambda _: (len(_), _))
+        self.numFiles = len(names)
+
+        # Lower case versions of the names, unless this would change
+        # their length (then the offsets into ``_names`` and
+        # ``_lower`` would differ).
+        lower = [_.lower() for _ in names]
+        lower = [lo if len(lo) == len(na) else na
+                 for lo, na in zip(lower, names)]
+        self._names = '\n'.join(names) + '\n'
+        self._lower = '\n'.join(lower) + '\n'
+
+        # The last query and its candidates as (start, stop) offsets
+        # into ``_lower``.
+        self._lastQuery = None
+        self._lastCandidates = []
+
+    def candidates(self, query):
+        """
+        Return the (start, stop) offsets of all lines that match
+        ``query``.
+        """
+        text = self._lower
+        regexp = re.compile(re.escape(query[0]) + ''.join(
+            '[^\n{0}]*{0}'.format(re.escape(_)) for _ in query[1:]))
+
+        # If this query extends the previous one then the matches of
+        # this query must be a subset of the previous matches.
+        if (self._lastQuery is not None) and query.startswith(self._lastQuery):
+            out = [(start, stop) for (start, stop) in self._lastCandidates
+                   if regexp.search(text, start, stop)]
+        else:
+            out, pos = [], 0
+            while True:
+                match = regexp.search(text, pos)
+                if match is None:
+                    break
+                start = text.rfind('\n', 0, match.start()) + 1
+                stop = text.find('\n', match.end())
+                out.append((start, stop))
+                pos = stop + 1
+
+        self._lastQuery = query
+        self._lastCandidates = out
+        return out
+
+    def match(self, query, maxResults):
+        """
+        Return the ``maxResults`` best matches for ``query``.
+
+        |Args|
+
+        * ``query`` (**str**): the fuzzy query.
+        * ``maxResults`` (**int**): maximum number of matches.
+
+        |Returns|
+
+        * **list**: file names relative to the project root, best
+          match first.
+
+        |Raises|
+
+        * **None**
+        """
+        query = ''.join(query.lower().split())
+
+        # Without a query, the shortest names come first.
+        if len(query) == 0:
+            names = self._names.split('\n', maxResults)[:maxResults]
+            return [_ for _ in names if _ != '']
+
+        # Rank the candidates. Ties are broken by the position in the
+        # index, ie. shorter names win.
+        ranked = []
+        lower = self._lower
+        for start, stop in self.candidates(query):
+            score = fuzzyScore(lower[start:stop], query)
+            if score is not None:
+                ranked.append((score, -start, stop))
+        ranked = heapq.nlargest(maxResults, ranked)
+        return [self._names[-negStart:stop] for (_, negStart, stop) in ranked]
+
+
+class ProjectIndexWorker(QtCore.QObject):
+    """
+    Crawl projects and build their ``FuzzyIndex`` in a separate thread.
+    """
+    # Arguments: project root.
+    sigStart = QtCore.pyqtSignal(str)
+
+    # Arguments: project root, FuzzyIndex instance.
+    sigFinished = QtCore.pyqtSignal(str, object)
+
+    # Stop crawling after this many files.
+    maxFiles = 2000000
+
+    def __init__(self):
+        super().__init__()
+        self.sigStart.connect(self.build)
+
+    @QtCore.pyqtSlot(str)
+    def build(self, root):
+        names = crawlProject(root, self.maxFiles)
+        self.sigFinished.emit(root, FuzzyIndex(root, names))
+
+
+class FuzzyMatchWorker(QtCore.QObject):
+    """
+    Run fuzzy queries against a ``FuzzyIndex`` in a separate thread.
+
+    The queries run in their own thread, rather than that of
+    ``ProjectIndexWorker``, because crawling a large project takes
+    several seconds and the queries would have to wait for it.
+    """
+    # Arguments: job ID, FuzzyIndex instance, query, maximum number of
+    # matches.
+    sigStart = QtCore.pyqtSignal(int, object, str, int)
+
+    # Arguments: job ID, list of matches.
+    sigFinished = QtCore.pyqtSignal(int, object)
+
+    def __init__(self):
+        super().__init__()
+        self.sigStart.connect(self.match)
+
+        # ID of the most recent job; older jobs that are still queued
+        # are skipped since nobody waits for their result anymore.
+        self.qteLatestJob = 0
+
+    @QtCore.pyqtSlot(int, object, str, int)
+    def match(self, jobID, index, query, maxResults):
+        if jobID < self.qteLatestJob:
+            return
+        self.sigFinished.emit(jobID, index.match(query, maxResults))
+
+
+class ProjectIndexer(QtCore.QObject):
+    """
+    Cache the ``FuzzyIndex`` of every project and rebuild it on demand.
+
+    Use ``projectIndexer`` to obtain the one and only instance.
+    """
+    # Arguments: project root.
+    sigIndexed = QtCore.pyqtSignal(str)
+
+    # Arguments: job ID, list of matches.
+    sigMatched = QtCore.pyqtSignal(int, object)
+
+    def __init__(self):
+        super().__init__()
+
+        # Map project roots to their index, and the set of projects
+        # that are currently being crawled.
+        self._qteIndexes = {}
+        self._qtePending = set()
+
+        # Crawl the projects in a separate thread.
+        self._qteWorker = ProjectIndexWorker()
+        self._qteThread = QtCore.QThread()
+        self._qteWorker.moveToThread(self._qteThread)
+        self._qteWorker.sigFinished.connect(
+            self._qteIndexed, type=QtCore.Qt.QueuedConnection)
+
+        # Match the queries in yet another thread.
+        self._qteJobID = 0
+        self._qteMatcher = FuzzyMatchWorker()
+        self._qteMatchThread = QtCore.QThread()
+        self._qteMatcher.moveToThread(self._qteMatchThread)
+        self._qteMatcher.sigFinished.connect(
+            self.sigMatched, type=QtCore.Qt.QueuedConnection)
+
+        # Stop the threads together with the application.
+        app = QtCore.QCoreApplication.instance()
+        app.aboutToQuit.connect(self._qteThread.quit)
+        app.aboutToQuit.connect(self._qteMatchThread.quit)
+        self._qteThread.start()
+        self._qteMatchThread.start()
+
+    def _qteIndexed(self, root, index):
+        """
+        Store the new ``index`` for ``root``.
+        """
+        self._qtePending.discard(root)
+        self._qteIndexes[root] = index
+        self.sigIndexed.emit(root)
+
+    def qteIndex(self, root):
+        """
+        Return the current index of ``root``, or **None** if none has
+        been built yet.
+        """
+        return self._qteIndexes.get(root, None)
+
+    def qteRefresh(self, root):
+        """
+        Rebuild the index of ``root`` in a separate thread.
+
+        The previous index remains available until the new one is
+        complete, whereupon ``sigIndexed`` is emitted.
+        """
+        if root in self._qtePending:
+            return
+        self._qtePending.add(root)
+        self._qteWorker.sigStart.emit(root)
+
+    def qteMatch(self, root, query, maxResults):
+        """
+        Match ``query`` against the index of ``root`` in a separate
+        thread.
+
+        The ``maxResults`` best matches are delivered via
+        ``sigMatched``, together with the job ID returned by this
+        method. Queued jobs are skipped once a newer one was started,
+        ie. only the result of the most recent job is guaranteed to
+        arrive.
+
+        |Args|
+
+        * ``root`` (**str**): absolute path of the project root.
+        * ``query`` (**str**): the fuzzy query.
+        * ``maxResults`` (**int**): maximum number of matches.
+
+        |Returns|
+
+        * **int**: job ID, or **None** if ``root`` has no index yet.
+
+        |Raises|
+
+        * **None**
+        """
+        index = self.qteIndex(root)
+        if index is None:
+            return None
+        self._qteJobID += 1
+        self._qteMatcher.qteLatestJob = self._qteJobID
+        self._qteMatcher.sigStart.emit(
+            self._qteJobID, index, query, maxResults)
+        return self._qteJobID
+
+
+# The indexer instance (created on demand).
+_projectIndexer = None
+
+
+def projectIndexer():
+    """
+    Return the ``ProjectIndexer`` instance; create it if necessary.
+    """
+    global _projectIndexer
+    if _projectIndexer is None:
+        _projectIndexer = ProjectIndexer()
+    return _projectIndexer
+
+
+class NextMatch(QtmacsMacro):
+    """
+    Select the next match.
+
+    |Signature|
+
+    * *applet*: 'MiniApplet'
+    * *widget*: ``QTextEdit``
+
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('MiniApplet')
+        self.qteSetWidgetSignature('QTextEdit')
+
+    def qteRun(self):
+        self.qteApplet.qteSelectMatch(+1)
+
+
+class PreviousMatch(QtmacsMacro):
+    """
+    Select the previous match.
+
+    |Signature|
+
+    * *applet*: 'MiniApplet'
+    * *widget*: ``QTextEdit``
+
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('MiniApplet')
+        self.qteSetWidgetSignature('QTextEdit')
+
+    def qteRun(self):
+        self.qteApplet.qteSelectMatch(-1)
+
+
+class QueryInput(QtmacsMacro):
+    """
+    Close the mini applet and process the selected match.
+
+    The absolute name of the selected match is passed to the
+    (overloaded) ``inputCompleted`` method of the
+    ``MiniAppletFuzzyFindFile`` object. If there is no match then
+    nothing happens.
+
+    |Signature|
+
+    * *applet*: 'MiniApplet'
+    * *widget*: ``QTextEdit``
+
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('MiniApplet')
+        self.qteSetWidgetSignature('QTextEdit')
+
+    def qteRun(self):
+        fileName = self.qteApplet.qteSelectedFile()
+        if fileName is None:
+            return
+
+        # Process the selected file in the main object.
+        self.qteApplet.inputCompleted(fileName)
+
+        # Kill the completions buffer and mini applet.
+        appID = self.qteApplet.completionsAppID
+        self.qteMain.qteRemoveAppletFromLayout(appID)
+        self.qteMain.qteKillApplet(appID)
+        self.qteMain.qteKillMiniApplet()
+
+
+class MiniAppletFuzzyFindFile(QtmacsApplet):
+    """
+    Query a file in the current project with fuzzy matching.
+
+    The ``maxResults`` best matches are listed in the completions
+    applet and updated whenever the user input changes. Overload
+    ``inputCompleted`` to act on the chosen file.
+
+    The ``applet`` and ``widget`` parameter are (almost) certainly the
+    respective ``self.qteApplet`` and ``self.qteWidget`` attributes of
+    the macro that instantiates this class.
+
+    |Args|
+
+    * ``applet`` (**QtmacsApplet**): reference to calling applet
+      (typically ``self.qteApplet``).
+    * ``widget`` (**QWidget**): reference to calling widget
+      (typically ``self.qteWidget``).
+    * ``root`` (**str**): project root (defaults to the project of
+      the file shown in ``applet``, or of the current directory if
+      ``applet`` shows no file).
+    * ``appletID`` (**str**): unique name of mini applet.
+    """
+    # Number of matches to display.
+    maxResults = 50
+
+    # ID of the applet that lists the matches.
+    completionsAppID = base_query.completionsAppID
+
+    @type_check
+    def __init__(self, applet: QtmacsApplet, widget: QtGui.QWidget,
+                 root: str=None, appletID: str=None):
+
+        # Automatically determine a unique applet ID if none was provided.
+        if appletID is None:
+            appletID = applet.qteMain.qteUniqueAppletID('__DefaultQuery#{}__')
+
+        # Initialise the base classes and define the applet signature
+        # (all the macros defined earlier must use this applet signature).
+        super().__init__(appletID)
+        self.qteSetAppletSignature('MiniApplet')
+
+        # Make sure the mini applet is only as high as it has to be.
+        fm = self.fontMetrics().size(0, 'X')
+        self.setMaximumHeight(2.5 * fm.height())
+
+        # Keep a reference to the calling applet and widget.
+        self.qteWidget = widget
+        self.qteApplet = applet
+
+        # The project, the current matches, and the selected match.
+        # The project defaults to that of the file in the calling
+        # applet (if it has one, and it is a local file).
+        if root is None:
+            path = QtCore.QDir.currentPath()
+            fileName = getattr(applet, 'fileName', None)
+            if isinstance(fileName, str):
+                fileDir = os.path.dirname(os.path.abspath(fileName))
+                if os.path.isdir(fileDir):
+                    path = fileDir
+            root = projectRoot(path)
+        self.qteRoot = root
+        self.qteMatches = []
+        self.qteSelected = 0
+
+        # ID of the most recent matching job; the results of older
+        # jobs are ignored.
+        self._qteJobID = None
+
+        # Line up a QLabel for the prefix string, a QTextEdit (pure
+        # text only) for the user input, and a QLabel for the status.
+        self.qteTextPrefix = self.qteAddWidget(QtGui.QLabel(self),
+                                               isFocusable=False)
+        self.qteTextPrefix.setText('Find file in project:')
+        self.qteText = self.qteAddWidget(QtGui.QTextEdit(self))
+        self.qteText.setAcceptRichText(False)
+        self.qteTextPostfix = self.qteAddWidget(QtGui.QLabel(self),
+                                                isFocusable=False)
+
+        # Replace the default macros of the entry field with the
+        # selection and acceptance macros.
+        n = self.qteMain.qteRegisterMacro(NextMatch, replaceMacro=True)
+        self.qteMain.qteBindKeyWidget('<Tab>', n, self.qteText)
+        self.qteMain.qteBindKeyWidget('<ctrl>+n', n, self.qteText)
+        n = self.qteMain.qteRegisterMacro(PreviousMatch, replaceMacro=True)
+        self.qteMain.qteBindKeyWidget('<ctrl>+p', n, self.qteText)
+        n = self.qteMain.qteRegisterMacro(QueryInput, replaceMacro=True)
+        self.qteMain.qteBindKeyWidget('<Enter>', n, self.qteText)
+        self.qteMain.qteBindKeyWidget('<Return>', n, self.qteText)
+
+        # Update the matches once all pending key events were
+        # processed, ie. at most once per event loop iteration.
+        self._qteQueryTimer = QtCore.QTimer()
+        self._qteQueryTimer.setSingleShot(True)
+        self._qteQueryTimer.timeout.connect(self.qteUpdateMatches)
+        self.qteText.textChanged.connect(self._qteQueryTimer.start)
+
+        # Use the cached index (if any) right away, but rebuild it in
+        # the background to pick up new files.
+        self._qteIndexer = projectIndexer()
+        self._qteIndexer.sigIndexed.connect(self.qteIndexed)
+        self._qteIndexer.sigMatched.connect(self.qteMatched)
+        self._qteIndexer.qteRefresh(self.qteRoot)
+        self.qteUpdateMatches()
+
+    def qteIndexed(self, root):
+        """
+        Update the matches once the index of the project is complete.
+        """
+        if root == self.qteRoot:
+            self.qteUpdateMatches()
+
+    def qteUpdateMatches(self):
+        """
+        Match the user input against the project index in the
+        background; ``qteMatched`` lists the best matches once they
+        are available.
+        """
+        userInput = self.qteText.toPlainText()
+        jobID = self._qteIndexer.qteMatch(
+            self.qteRoot, userInput, self.maxResults)
+        if jobID is None:
+            self.qteTextPostfix.setText('[indexing...]')
+            return
+        self._qteJobID = jobID
+
+    def qteMatched(self, jobID, matches):
+        """
+        List the ``matches`` unless a newer job is already pending.
+        """
+        if jobID != self._qteJobID:
+            return
+        self.qteMatches = matches
+        self.qteSelected = 0
+        self.qteShowMatches()
+
+    @type_check
+    def qteSelectMatch(self, step: int):
+        """
+        Move the selection by ``step`` matches (wraps around).
+
+        |Args|
+
+        * ``step`` (**int**): number of matches to advance.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        if len(self.qteMatches) == 0:
+            return
+        self.qteSelected = (self.qteSelected + step) % len(self.qteMatches)
+        self.qteShowMatches()
+
+    def qteSelectedFile(self):
+        """
+        Return the absolute name of the selected match, or **None**.
+        """
+        if len(self.qteMatches) == 0:
+            return None
+        return os.path.join(self.qteRoot, self.qteMatches[self.qteSelected])
+
+    def qteShowMatches(self):
+        """
+        List the matches in the completions applet and display the
+        selected one in the status label.
+        """
+        index = self._qteIndexer.qteIndex(self.qteRoot)
+        num = len(self.qteMatches)
+        if num == 0:
+            self.qteTextPostfix.setText('[no match]')
+        else:
+            msg = '[{}/{} of {} files]'
+            self.qteTextPostfix.setText(msg.format(
+                self.qteSelected + 1, num, index.numFiles))
+
+        # Get a handle to the completions applet or create a new one
+        # if none exists yet.
+        app = self.qteMain.qteGetAppletHandle(self.completionsAppID)
+        if app is None:
+            app = self.qteMain.qteNewApplet('Completions',
+                                            self.completionsAppID)
+            if app is None:
+                return
+
+        # Only split the layout if the applet is not visible yet.
+        if not app.qteIsVisible():
+            self.qteMain.qteSplitApplet(app)
+
+        # List the matches and highlight the selected one.
+        app.qteSetCompletions(self.qteMatches)
+        app.qteSetCurrentRow(self.qteSelected)
+
+    def qteToBeKilled(self):
+        """
+        Stop listening to the indexer.
+        """
+        self._qteQueryTimer.stop()
+        pairs = ((self._qteIndexer.sigIndexed, self.qteIndexed),
+                 (self._qteIndexer.sigMatched, self.qteMatched))
+        for signal, slot in pairs:
+            try:
+                signal.disconnect(slot)
+            except TypeError:
+                pass
+
+    def inputCompleted(self, userInput):
+        """
+        Virtual: must be overloaded to implement specific action when
+        the user hits <enter>.
+
+        |Args|
+
+        * ``userInput`` (**str**): absolute name of the selected file.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+
+        """
+        pass
@@ -0,0 +1,80 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Scan a buffer for regular expression matches in a worker process.
+
+The ``occur`` applet (see ``qtmacs.applets.occur``) submits
+``occurScan`` to a process pool whose workers are fresh interpreters.
+Every worker imports this module to unpickle the function, which is
+why it must not import Qt (or any part of Qtmacs that does) so that
+the workers start quickly.
+"""
+
+import re
+import qtmacs.file_io
+
+# Shorthands:
+readText = qtmacs.file_io.readText
+
+# Scintilla line terminators.
+_reEOL = re.compile('\r\n|\r|\n')
+
+
+def occurScan(appletID, text, pattern):
+    """
+    Return all matches of ``pattern`` in ``text``.
+
+    Every match in a line is reported, but empty matches only if
+    they are the first match in their line (otherwise a pattern like
+    'a*' would report every column).
+
+    If ``text`` is **None** then the file ``appletID`` is searched
+    instead (and there are no matches if it cannot be read).
+
+    This function runs in a worker process and must therefore only
+    depend on its (picklable) arguments.
+
+    |Args|
+
+    * ``appletID`` (**str**): ID of the applet that holds ``text``.
+    * ``text`` (**str**): the text to search, or **None**.
+    * ``pattern`` (**str**): regular expression.
+
+    |Returns|
+
+    * **tuple**: (``appletID``, list of (line, col, text) tuples).
+
+    |Raises|
+
+    * **None**
+    """
+    if text is None:
+        try:
+            text = readText(appletID)
+        except OSError:
+            return appletID, []
+
+    pat = re.compile(pattern)
+    hits = []
+    for lineNum, line in enumerate(_reEOL.split(text)):
+        first = True
+        for match in pat.finditer(line):
+            if first or (match.end() > match.start()):
+                hits.append((lineNum, match.start(), line))
+            first = False
+    return appletID, hits
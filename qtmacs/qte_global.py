@@ -72,8 +72,62 @@ default_widget_keybindings = {
 # usually a good idea to update this list in the
 # ``__qteRegisterAppletInit__`` method so that the ``find-file`` macro
 # can create this applet if it encounters a supported file type.
+# Applets registered with ``qteRegisterAppletModule`` are added to
+# this list before their module is even imported.
 findFile_types = [('.*\.txt$', 'RichEditor')]
 
 # If the file name does not match any pattern in ``findFile_types``
 # (see above), then use this applet as the fallback option.
 findFile_default = 'SciEditor'
+
+# Files that match no pattern in ``findFile_types`` but are at least
+# ``findFile_largeSize`` bytes large are opened with this applet
+# instead, because ``findFile_default`` loads the entire file.
+findFile_large = 'LargeFileViewer'
+findFile_largeSize = 64 * 2 ** 20
+
+# Maximum time (in seconds) the background scan of the regular
+# expression search- and replace macros may take before it is
+# abandoned. Matches found up to that point remain highlighted.
+search_timeout = 5
+
+# Directory for the journals of unsaved modifications (see
+# ``qtmacs.journal``), and the time (in milliseconds) the user must
+# pause typing before the pending journal records are written. The
+# records are written regardless once the oldest is more than
+# ``journal_max_delay`` milliseconds old, or once they amount to more
+# than ``journal_max_pending`` bytes.
+journal_dir = '~/.qtmacs/journal'
+journal_delay = 1000
+journal_max_delay = 10000
+journal_max_pending = 2 ** 20
+
+# Number of log records the log viewer keeps in memory, and the file
+# (if any) for the records evicted from memory (see
+# ``qtmacs.logging_handler``).
+log_capacity = 10000
+log_spill_file = None
+
+# Identical log records within this many seconds are only logged once,
+# followed by a summary with the number of repetitions (see
+# ``QtmacsFloodFilter`` in ``qtmacs.logging_handler``). Use zero to
+# log every record.
+log_flood_window = 5
+
+# Invisible applets that have been idle for this many seconds
+# hibernate, ie. they replace their content with a compact state
+# until they become visible again (see ``QtmacsApplet.qteHibernate``).
+# Only applets that support hibernation do so. Use **None** to
+# disable hibernation. Qtmacs looks for idle applets every
+# ``hibernate_interval`` seconds.
+hibernate_after = None
+hibernate_interval = 60
+
+# File to save the session to (see ``QtmacsMain.qteSaveSession``). If
+# set, Qtmacs restores the session at startup, saves it every
+# ``session_interval`` seconds, and once more when it closes. Use
+# **None** to disable sessions. Only the most recent
+# ``session_kill_list`` elements of the kill list are saved.
+session_file = None
+session_interval = 300
+session_kill_list = 10
@@ -58,17 +58,25 @@ Usage example (requires Python 3.x and PyQt 4.8)::
 
 import re
 import os
-import imp
 import sip
 import sys
+import time
 import types
 import inspect
 import logging
+import importlib
+import contextlib
+import importlib.util
+import importlib.machinery
 import qtmacs.auxiliary
+import qtmacs.session
 import qtmacs.kill_list
+import qtmacs.log_export
+import qtmacs.logging_handler
 import qtmacs.type_check
 import qtmacs.base_macro
 import qtmacs.base_applet
+import qtmacs.startup_profile
 import qtmacs.qtmacsmain_macros
 import qtmacs.qte_global as qte_global
 
@@ -83,8 +91,12 @@ QtmacsKeymap = qtmacs.auxiliary.QtmacsKeymap
 QtmacsMessage = qtmacs.auxiliary.QtmacsMessage
 QtmacsKeysequence = qtmacs.auxiliary.QtmacsKeysequence
 QtmacsAdminStructure = qtmacs.auxiliary.QtmacsAdminStructure
+QtmacsAppletDescriptor = qtmacs.auxiliary.QtmacsAppletDescriptor
+QtmacsModuleRecord = qtmacs.auxiliary.QtmacsModuleRecord
 qteIsQtmacsWidget = qtmacs.auxiliary.qteIsQtmacsWidget
 qteGetAppletFromWidget = qtmacs.auxiliary.qteGetAppletFromWidget
+qteMemoryUsage = qtmacs.auxiliary.qteMemoryUsage
+QtmacsPlaceholder = qtmacs.session.QtmacsPlaceholder
 
 
 class DeliverQtKeyEvent(QtmacsMacro):
@@ -610,7 +622,7 @@ class QtmacsSplitter(QtGui.QSplitter):
         # Assign the widget sizes.
         self.setSizes(newSize)
 
-    def qteAddWidget(self, widget):
+    def qteAddWidget(self, widget, adjustSizes=True):
         """
         Add a widget to the splitter and make it visible.
 
@@ -627,6 +639,8 @@ class QtmacsSplitter(QtGui.QSplitter):
         |Args|
 
         * ``widget`` (**QWidget**): the widget to add to the splitter.
+        * ``adjustSizes`` (**bool**): if **True** then assign all
+          widgets in the splitter the same size.
 
         |Returns|
 
@@ -636,8 +650,10 @@ class QtmacsSplitter(QtGui.QSplitter):
 
         * **None**
         """
-        # Add ``widget`` to the splitter.
+        # Add ``widget`` to the splitter and update the parent index
+        # of the layout.
         self.addWidget(widget)
+        widget._qteAdmin.parentSplitter = self
 
         # Show ``widget``. If it is a ``QtmacsSplitter`` instance then its
         # show() methods has no argument, whereas ``QtmacsApplet`` instances
@@ -650,10 +666,11 @@ class QtmacsSplitter(QtGui.QSplitter):
             widget.show(True)
 
         # Adjust the sizes of the widgets inside the splitter according to
-        # the handle position.
-        self.qteAdjustWidgetSizes()
+        # the handle position, unless the caller takes care of it.
+        if adjustSizes:
+            self.qteAdjustWidgetSizes()
 
-    def qteInsertWidget(self, idx, widget):
+    def qteInsertWidget(self, idx, widget, adjustSizes=True):
         """
         Insert ``widget`` to the splitter at the specified ``idx``
         position and make it visible.
@@ -673,6 +690,8 @@ class QtmacsSplitter(QtGui.QSplitter):
         * ``idx`` (**int**): non-negative index position.
         * ``widget`` (**QWidget**): the widget to insert into the
           splitter at position ``idx``.
+        * ``adjustSizes`` (**bool**): if **True** then assign all
+          widgets in the splitter the same size.
 
         |Returns|
 
@@ -682,8 +701,10 @@ class QtmacsSplitter(QtGui.QSplitter):
 
         * **None**
         """
-        # Insert the widget into the splitter.
+        # Insert the widget into the splitter and update the parent
+        # index of the layout.
         self.insertWidget(idx, widget)
+        widget._qteAdmin.parentSplitter = self
 
         # Show ``widget``. If it is a ``QtmacsSplitter`` instance then its
         # show() methods has no argument, whereas ``QtmacsApplet`` instances
@@ -696,8 +717,9 @@ class QtmacsSplitter(QtGui.QSplitter):
             widget.show(True)
 
         # Adjust the sizes of the widgets inside the splitter according to
-        # the handle position.
-        self.qteAdjustWidgetSizes()
+        # the handle position, unless the caller takes care of it.
+        if adjustSizes:
+            self.qteAdjustWidgetSizes()
 
     def qteParentWindow(self):
         """
@@ -817,6 +839,15 @@ class QtmacsMain(QtCore.QObject):
     * ``importFile`` (**str**): name of module to import at startup.
     * ``logConsole`` (**bool**): if **True**, write all log messages
         to the console and log viewer applet.
+    * ``startupProfile`` (**QtmacsStartupProfile**): profile to
+        record the startup phases in (a new one is created if
+        **None**).
+    * ``logExport`` (**str**): if not **None**, export all log
+        messages as JSON lines to this file (see
+        ``qtmacs.log_export``).
+    * ``session`` (**str**): if not **None**, restore the session
+        from this file and save it there periodically (see
+        ``qteSaveSession``).
     """
     # Define the signals Qtmacs can emit.
     qtesigAbort = QtCore.pyqtSignal(QtmacsMessage)
@@ -830,7 +861,8 @@ class QtmacsMain(QtCore.QObject):
     qtesigKeyseqComplete = QtCore.pyqtSignal(QtmacsMessage)
     qtesigKeyseqInvalid = QtCore.pyqtSignal(QtmacsMessage)
 
-    def __init__(self, parent=None, importFile=None, logConsole=False):
+    def __init__(self, parent=None, importFile=None, logConsole=False,
+                 startupProfile=None, logExport=None, session=None):
         # Call the base class constructors.
         super().__init__(parent)
 
@@ -839,20 +871,41 @@ class QtmacsMain(QtCore.QObject):
         # variable is set for the entire life of this Qtmacs instance!
         qte_global.qteMain = self
 
+        # Record the duration of every startup phase. The profile is
+        # complete once the focus manager ran for the first time.
+        if startupProfile is None:
+            startupProfile = qtmacs.startup_profile.QtmacsStartupProfile()
+        self._qteStartupProfile = startupProfile
+        self.qteDefVar('startup_profile', startupProfile,
+                       doc="Instance of ``QtmacsStartupProfile`` class.")
+        startupProfile.qteBegin('logging')
+
         # ------------------------------------------------------------
         # Define all lists, queues, timers, and admin variables.
         # ------------------------------------------------------------
         self._qteAppletList = []
         self._qteWindowList = []
+
+        # Index of ``_qteAppletList`` by applet ID, and the next
+        # number to try for every template of ``qteUniqueAppletID``.
+        self._qteAppletDict = {}
+        self._qteIDCounters = {}
         self._qteMacroQueue = []
         self._qteRegistryHooks = {}
         self._qteRegistryMacros = {}
         self._qteRegistryApplets = {}
+        self._qteRegistryModules = {}
+        self._qteModuleStack = []
         self._qteKeyEmulationQueue = []
         self._qteGlobalKeyMap = QtmacsKeymap()
         self._qteMiniApplet = None
         self._qteActiveApplet = None
 
+        # Nesting depth of ``qteQuietRegistration`` and the number of
+        # macro registrations it has summarised so far.
+        self._qteQuietDepth = 0
+        self._qteQuietCounts = {'registered': 0, 'replaced': 0, 'kept': 0}
+
         # Timer ID to trigger the focus manager. At startup,
         # invoke it as soon as this class was fully initialised.
         self._qteTimerFocusManager = None
@@ -860,6 +913,21 @@ class QtmacsMain(QtCore.QObject):
         # Timer ID to execute a queued macro.
         self._qteTimerRunMacro = None
 
+        # Periodically hibernate idle invisible applets. The timer
+        # does nothing unless ``qte_global.hibernate_after`` is set,
+        # and is only started by ``qteApplySettings``.
+        self._qteHibernateTimer = QtCore.QTimer()
+        self._qteHibernateTimer.timeout.connect(self._qteHibernateIdleApplets)
+
+        # Periodically save the session. The timer does nothing
+        # unless ``qte_global.session_file`` is set, and is only
+        # started by ``qteApplySettings``.
+        if session is not None:
+            qte_global.session_file = session
+        self._qteSessionHistories = {}
+        self._qteSessionTimer = QtCore.QTimer()
+        self._qteSessionTimer.timeout.connect(self._qteAutoSaveSession)
+
         # ------------------------------------------------------------
         # Setup the logging facility for Qtmacs. This consists of
         # a ``logging.getLogger`` instance that can henceforth be
@@ -874,6 +942,16 @@ class QtmacsMain(QtCore.QObject):
         self.qteDefVar('qteLogger', self.qteLogger,
                        doc="Instance of ``logging.getLogger('qtmacs')``.")
 
+        # Aggregate floods of identical log records (eg. a hook that
+        # fails on every key press), and periodically summarise the
+        # suppressed ones. The configured window only takes effect
+        # in ``qteApplySettings``.
+        self._qteFloodFilter = qtmacs.logging_handler.QtmacsFloodFilter(
+            self.qteLogger, qte_global.log_flood_window)
+        self.qteLogger.addFilter(self._qteFloodFilter)
+        self._qteFloodTimer = QtCore.QTimer()
+        self._qteFloodTimer.timeout.connect(self._qteFloodFilter.qteFlush)
+
         # Add a stream handler if requested. This handler dumps all
         # log messages to the console but has no effect on the log
         # viewer applet in Qtmacs. The main purpose of this additional
@@ -888,12 +966,18 @@ class QtmacsMain(QtCore.QObject):
             streamHandler.setFormatter(formatter)
             self.qteLogger.addHandler(streamHandler)
 
+        # Export all log messages as JSON lines to ``logExport`` in a
+        # background thread if requested.
+        if logExport is not None:
+            qtmacs.log_export.QtmacsLogExporter(logExport)
+
         # Re-route the except hook to a custom object to capture all
         # errors not otherwise captured, and feed them into the
         # Qtmacs logger.
         sys.excepthook = self.QtmacsExceptHook
 
         # Perform OS- and machine specific setup.
+        startupProfile.qteBegin('platform_setup')
         import qtmacs.platform_setup
         qtmacs.platform_setup.setup(self)
 
@@ -910,6 +994,7 @@ class QtmacsMain(QtCore.QObject):
         # events for these widgets are nonetheless intercepted by
         # the Qtmacs event handler they are delivered with the
         # special macro ``DelierQtKeyEvent``.
+        startupProfile.qteBegin('event_filter')
         self.qteRegisterMacro(DeliverQtKeyEvent)
 
         # Instantiate the keyboard filter for Qtmacs. This must
@@ -920,9 +1005,12 @@ class QtmacsMain(QtCore.QObject):
 
         # Import the applet- and widget independent macros and
         # key-bindings to provide the core functionality for Qtmacs.
-        qtmacs.qtmacsmain_macros.install_macros_and_bindings()
+        startupProfile.qteBegin('install_macros_and_bindings')
+        with self.qteQuietRegistration('the default macros'):
+            qtmacs.qtmacsmain_macros.install_macros_and_bindings()
 
         # Instantiate the first window.
+        startupProfile.qteBegin('first_window')
         self.qteNewWindow(QtCore.QRect(100, 200, 750, 500))
 
         # ------------------------------------------------------------
@@ -930,16 +1018,37 @@ class QtmacsMain(QtCore.QObject):
         # qte_global to make the same instance available to every
         # applet that wants to use it.
         # ------------------------------------------------------------
+        startupProfile.qteBegin('kill_list')
         import qtmacs.kill_list
         self.qteDefVar('kill_list',
                        qtmacs.kill_list.QtmacsKillList(),
                        doc="Instance of ``QtmacsKillList`` class.")
 
+        # ------------------------------------------------------------
+        # Create the (one and only) file watcher to notify applets
+        # when their files change on disk.
+        # ------------------------------------------------------------
+        startupProfile.qteBegin('file_watcher')
+        import qtmacs.file_watcher
+        self.qteDefVar('file_watcher',
+                       qtmacs.file_watcher.QtmacsFileWatcher(),
+                       doc="Instance of ``QtmacsFileWatcher`` class.")
+
+        # ------------------------------------------------------------
+        # Create the directory cache for file name completions.
+        # ------------------------------------------------------------
+        startupProfile.qteBegin('dir_cache')
+        import qtmacs.dir_cache
+        self.qteDefVar('dir_cache',
+                       qtmacs.dir_cache.QtmacsDirectoryCache(),
+                       doc="Instance of ``QtmacsDirectoryCache`` class.")
+
         # ------------------------------------------------------------
         # Register and instantiate the ``logviewer`` applet. It will
         # automatically connect to the Qtmacs wide logger instance to
         # intercept all log messages.
         # ------------------------------------------------------------
+        startupProfile.qteBegin('logviewer')
         import qtmacs.applets.logviewer as logviewer
         appName = self.qteRegisterApplet(logviewer.LogViewer)
         appObj = self.qteNewApplet(appName, '**LogViewer**')
@@ -952,10 +1061,20 @@ class QtmacsMain(QtCore.QObject):
             self.qteMakeAppletActive(appObj)
             del logviewer
 
+        # ------------------------------------------------------------
+        # Register the ``completions`` applet used by the mini applet
+        # queries to list their completions.
+        # ------------------------------------------------------------
+        startupProfile.qteBegin('completions')
+        import qtmacs.applets.completions as completions
+        self.qteRegisterApplet(completions.Completions)
+        del completions
+
         # ------------------------------------------------------------
         # Pick up mouse clicks to synchronise the Qtmacs internal
         # state variables.
         # ------------------------------------------------------------
+        startupProfile.qteBegin('app_event_filter')
         qApp = QtGui.QApplication.instance()
         qApp.installEventFilter(self._qteEventFilter)
 
@@ -966,6 +1085,7 @@ class QtmacsMain(QtCore.QObject):
         # Add all subdirectories of 'modules/' to the path.
         # ------------------------------------------------------------
         # The 'modules' directory is one level above this file.
+        startupProfile.qteBegin('modules_path')
         path, _ = os.path.split(qtmacs.qtmacsmain.__file__)
         path = os.path.abspath(os.path.join(path, '..', 'modules'))
         if os.path.exists(path):
@@ -977,6 +1097,7 @@ class QtmacsMain(QtCore.QObject):
         # Load the global configuration file.
         # ------------------------------------------------------------
         # The global configuration file is in the same path as this file.
+        startupProfile.qteBegin('config')
         path, _ = os.path.split(qtmacs.qtmacsmain.__file__)
         sys.path.insert(0, path)
         self.qteLogger.info('Loading global configuration file.')
@@ -987,12 +1108,24 @@ class QtmacsMain(QtCore.QObject):
         # ------------------------------------------------------------
         self.qteLogger.info('Initialisation of Qtmacs complete.')
         if importFile is not None:
+            startupProfile.qteBegin('user_import')
             self.qteLogger.info('Loading file <b>{}</b>.'
                                 .format(importFile))
             # Load the user specific configuration file.
             self.qteImportModule(importFile)
 
-        # Trigger the focus manager.
+        # Apply the settings the configuration files may have changed.
+        self.qteApplySettings()
+
+        # Restore the previous session (if any).
+        if qte_global.session_file is not None:
+            startupProfile.qteBegin('session')
+            if os.path.exists(os.path.expanduser(qte_global.session_file)):
+                self.qteRestoreSession()
+
+        # Trigger the focus manager. The startup profile is complete
+        # once it ran (see ``timerEvent``).
+        startupProfile.qteBegin('first_focus')
         self.qteUpdate()
 
         # ------------------------------------------------------------
@@ -1000,6 +1133,49 @@ class QtmacsMain(QtCore.QObject):
         # ------------------------------------------------------------
         #self.debugTimer = self.startTimer(2000)
 
+    def qteApplySettings(self):
+        """
+        Apply the settings in ``qte_global`` that are only read once.
+
+        This concerns the timer intervals for hibernation, sessions,
+        and log flood summaries, as well as the capacity and spill
+        file of the log viewer. All of them are in use before the
+        configuration files are imported, which is why Qtmacs calls
+        this method once they were, and whenever modules were
+        reloaded with ``qteReloadModules``.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        self._qteHibernateTimer.start(
+            int(qte_global.hibernate_interval * 1000))
+        self._qteSessionTimer.start(int(qte_global.session_interval * 1000))
+
+        # A flood window of zero disables the aggregation; summarise
+        # the records suppressed so far right away in that case.
+        window = qte_global.log_flood_window
+        self._qteFloodFilter.window = window
+        if window > 0:
+            self._qteFloodTimer.start(int(window * 1000))
+        else:
+            self._qteFloodTimer.stop()
+            self._qteFloodFilter.qteFlush()
+
+        # Resize the record buffer of the log viewer.
+        logViewer = self.qteGetAppletHandle('**LogViewer**')
+        if logViewer is not None:
+            logViewer.logHandler.qteConfigure(qte_global.log_capacity,
+                                              qte_global.log_spill_file)
+
     def timerEvent(self, event):
         """
         Trigger the focus manager and work off all queued macros.
@@ -1065,6 +1241,10 @@ class QtmacsMain(QtCore.QObject):
                     # to run. So trigger the focus manager one more time
                     # and then leave the while-loop.
                     self._qteFocusManager()
+
+                    # The first focus pass concludes the startup.
+                    if not self._qteStartupProfile.finished:
+                        self._qteStartupProfile.qteFinish()
                     break
                 self._qteFocusManager()
         elif event.timerId() == self.debugTimer:
@@ -1956,13 +2136,7 @@ class QtmacsMain(QtCore.QObject):
 
         # Determine an automatic applet ID if none was provided.
         if appletID is None:
-            cnt = 0
-            while True:
-                appletID = appletName + '_' + str(cnt)
-                if self.qteGetAppletHandle(appletID) is None:
-                    break
-                else:
-                    cnt += 1
+            appletID = self.qteUniqueAppletID(appletName + '_{}')
 
         # Return immediately if an applet with the same ID already
         # exists.
@@ -1980,9 +2154,19 @@ class QtmacsMain(QtCore.QObject):
         else:
             cls = self._qteRegistryApplets[appletName]
 
-        # Try to instantiate the class.
+        # Import the applet module if only its descriptor was
+        # registered so far.
+        if isinstance(cls, QtmacsAppletDescriptor):
+            cls = self.qteLoadApplet(appletName)
+            if cls is None:
+                return None
+
+        # Try to instantiate the class. The constructor usually
+        # registers the macros of all its widgets.
         try:
-            app = cls(appletID)
+            with self.qteQuietRegistration('applet <b>{}</b>'
+                                           .format(appletName)):
+                app = cls(appletID)
         except Exception:
             msg = 'Applet <b>{}</b> has a faulty constructor.'.format(appletID)
             self.qteLogger.exception(msg, exc_info=True, stack_info=True)
@@ -1999,6 +2183,7 @@ class QtmacsMain(QtCore.QObject):
 
         # Add the applet to the list of instantiated Qtmacs applets.
         self._qteAppletList.insert(0, app)
+        self._qteAppletDict[appletID] = app
 
         # If the new applet does not yet have an internal layout then
         # arrange all its children automatically. The layout used for
@@ -2082,6 +2267,7 @@ class QtmacsMain(QtCore.QObject):
         # Add the mini applet to the applet registry, ie. for most
         # purposes the mini applet is treated like any other applet.
         self._qteAppletList.insert(0, self._qteMiniApplet)
+        self._qteAppletDict[appletObj.qteAppletID()] = self._qteMiniApplet
 
         # Add the mini applet to the respective splitter in the window
         # layout and show it.
@@ -2166,6 +2352,9 @@ class QtmacsMain(QtCore.QObject):
                     # active.
                     self._qteActiveApplet = None
             self._qteAppletList.remove(self._qteMiniApplet)
+            miniID = self._qteMiniApplet.qteAppletID()
+            if self._qteAppletDict.get(miniID, None) is self._qteMiniApplet:
+                del self._qteAppletDict[miniID]
 
         # Close the mini applet applet and schedule it for deletion.
         self._qteMiniApplet.close()
@@ -2180,10 +2369,16 @@ class QtmacsMain(QtCore.QObject):
         """
         Return the splitter that holds ``appletObj``.
 
-        This method recursively searches for ``appletObj`` in the
-        nested splitter hierarchy of the window layout, starting at
-        ``split``. If successful, the method returns a reference to
-        the splitter, otherwise it returns **None**.
+        This method searches for ``appletObj`` in the nested splitter
+        hierarchy of the window layout, starting at ``split``. If
+        successful, the method returns a reference to the splitter,
+        otherwise it returns **None**.
+
+        The search follows the ``parentSplitter`` handles in the admin
+        structures from ``appletObj`` towards the root splitter, and
+        thus only takes time proportional to the depth of the
+        layout. Only if the handles disagree with the actual Qt
+        parents (ie. a bug) does it traverse the entire hierarchy.
 
         |Args|
 
@@ -2210,7 +2405,27 @@ class QtmacsMain(QtCore.QObject):
                     yield from splitterIter(subSplitter)
             yield split
 
-        # Traverse all QtmacsSplitter until ``appletObj`` was found.
+        # Look up the splitter that holds ``appletObj`` in the parent
+        # index, and ensure it really holds the applet.
+        parentSplit = appletObj._qteAdmin.parentSplitter
+        if parentSplit is None:
+            return None
+        if parentSplit.indexOf(appletObj) >= 0:
+            # Walk up the index until ``split`` was found. If this
+            # does not happen then ``appletObj`` is not in the
+            # hierarchy of ``split``.
+            curSplit = parentSplit
+            while curSplit is not None:
+                if curSplit is split:
+                    return parentSplit
+                curSplit = curSplit._qteAdmin.parentSplitter
+            return None
+
+        # The parent index is inconsistent. Log the problem and fall
+        # back to traversing all QtmacsSplitter until ``appletObj``
+        # was found.
+        msg = 'Parent splitter of applet <b>%s</b> is out of date.'
+        self.qteLogger.debug(msg, appletObj.qteAppletID())
         for curSplit in splitterIter(split):
             if appletObj in curSplit.children():
                 return curSplit
@@ -2294,6 +2509,7 @@ class QtmacsMain(QtCore.QObject):
         if newAppObj is None:
             self.qteLogger.warning('All applets are already visible.')
             return False
+        newAppObj = self.qteMaterialiseApplet(newAppObj)
 
         # If the root splitter is empty then add the new applet and
         # return immediately.
@@ -2354,6 +2570,7 @@ class QtmacsMain(QtCore.QObject):
         newSplit.qteAddWidget(curApp)
         newSplit.qteAddWidget(newAppObj)
         split.insertWidget(curAppIdx, newSplit)
+        newSplit._qteAdmin.parentSplitter = split
 
         # Adjust the size of two widgets in ``split`` (ie. ``newSplit`` and
         # whatever other widget) to take up equal space. The same adjusment is
@@ -2409,6 +2626,7 @@ class QtmacsMain(QtCore.QObject):
             newAppObj = self.qteGetAppletHandle(newApplet)
         else:
             newAppObj = newApplet
+        newAppObj = self.qteMaterialiseApplet(newAppObj)
 
         # Use the currently active window if none was specified.
         if windowObj is None:
@@ -2464,7 +2682,7 @@ class QtmacsMain(QtCore.QObject):
         # oldAppObj. Afterwards, remove oldAppObj by re-parenting it, make
         # it invisible, and restore the widget sizes.
         sizes = split.sizes()
-        split.qteInsertWidget(oldAppIdx, newAppObj)
+        split.qteInsertWidget(oldAppIdx, newAppObj, adjustSizes=False)
         oldAppObj.hide(True)
         split.setSizes(sizes)
 
@@ -2509,12 +2727,15 @@ class QtmacsMain(QtCore.QObject):
         else:
             appletObj = applet
 
-        # Return immediately if the applet does not exist in any splitter.
-        for window in self._qteWindowList:
-            split = self._qteFindAppletInSplitter(
-                appletObj, window.qteAppletSplitter)
-            if split is not None:
-                break
+        # Return immediately if the applet does not exist or is not
+        # in the layout of its window.
+        if appletObj is None:
+            return
+        window = appletObj.qteParentWindow()
+        if window is None:
+            return
+        split = self._qteFindAppletInSplitter(
+            appletObj, window.qteAppletSplitter)
         if split is None:
             return
 
@@ -2540,6 +2761,7 @@ class QtmacsMain(QtCore.QObject):
                     return
 
             # Ok, we found an applet to show.
+            nextApp = self.qteMaterialiseApplet(nextApp)
             split.qteAddWidget(nextApp)
             return
 
@@ -2578,13 +2800,15 @@ class QtmacsMain(QtCore.QObject):
                 # after each removal.
                 obj = otherWidget.widget(0)
                 if appletIdx == 0:
-                    split.qteAddWidget(obj)
+                    split.qteAddWidget(obj, adjustSizes=False)
                 else:
-                    split.qteInsertWidget(1 + ii, obj)
+                    split.qteInsertWidget(1 + ii, obj, adjustSizes=False)
 
-            # Delete the child splitter.
+            # Delete the child splitter and assign the widgets in
+            # ``split`` the same size.
             otherWidget.setParent(None)
             otherWidget.close()
+            split.qteAdjustWidgetSizes()
         else:
             # No, ``otherWidget`` is a QtmacsApplet, therefore move it
             # to the parent splitter and delete the current one,
@@ -2622,17 +2846,11 @@ class QtmacsMain(QtCore.QObject):
 
         * **QtmacsArgumentError** if at least one argument has an invalid type.
         """
-        # Compile list of all applet IDs.
-        ID_list = [_.qteAppletID() for _ in self._qteAppletList]
-
-        if appletID not in ID_list:
-            # Do nothing if the applet does not exist.
+        # Get a reference to the actual applet object based on the
+        # name, and do nothing if the applet does not exist.
+        appObj = self._qteAppletDict.get(appletID, None)
+        if appObj is None:
             return
-        else:
-            # Get a reference to the actual applet object based on the
-            # name.
-            idx = ID_list.index(appletID)
-            appObj = self._qteAppletList[idx]
 
         # Mini applets are killed with a special method.
         if self.qteIsMiniApplet(appObj):
@@ -2664,8 +2882,9 @@ class QtmacsMain(QtCore.QObject):
             self._qteActiveApplet = newApplet
 
         # Remove the applet object from the applet list.
-        self.qteLogger.debug('Kill applet: <b>{}</b>'.format(appletID))
+        self.qteLogger.debug('Kill applet: <b>%s</b>', appletID)
         self._qteAppletList.remove(appObj)
+        del self._qteAppletDict[appletID]
 
         # Close the applet and schedule it for destruction. Explicitly
         # call the sip.delete() method to ensure that all signals are
@@ -2676,6 +2895,542 @@ class QtmacsMain(QtCore.QObject):
         appObj.close()
         sip.delete(appObj)
 
+    @type_check
+    def qteHibernateApplets(self, idleTime: (int, float)=0):
+        """
+        Hibernate all invisible applets that have been idle for at
+        least ``idleTime`` seconds.
+
+        Only applets that support hibernation are affected (see
+        ``QtmacsApplet.qteHibernate``), and they wake up again once
+        they become visible. The memory usage of Qtmacs before and
+        after is logged.
+
+        |Args|
+
+        * ``idleTime`` (**int**, **float**): minimum time (in
+          seconds) since the applet became invisible.
+
+        |Returns|
+
+        * **int**: number of applets that are now hibernating.
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        now = time.monotonic()
+        before = qteMemoryUsage()
+        numApplets = 0
+        for app in self._qteAppletList:
+            # Skip the mini applet, visible applets, and those that
+            # became invisible only recently.
+            if self.qteIsMiniApplet(app) or app.qteIsVisible():
+                continue
+            hiddenSince = app._qteAdmin.hiddenSince
+            if (hiddenSince is None) or (now - hiddenSince < idleTime):
+                continue
+            if app.qteHibernate():
+                numApplets += 1
+
+        # Log the memory usage (it may not drop immediately because
+        # the memory allocator does not necessarily return the
+        # released memory to the operating system).
+        if numApplets > 0:
+            msg = ('Hibernated <b>%d</b> applets. Memory usage: %.1f MB'
+                   ' before, %.1f MB after.')
+            self.qteLogger.info(msg, numApplets, before / 2**20,
+                                qteMemoryUsage() / 2**20)
+        return numApplets
+
+    def _qteHibernateIdleApplets(self):
+        """
+        Hibernate the applets that have been idle for longer than
+        ``qte_global.hibernate_after`` seconds.
+
+        This method is triggered periodically by a timer.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        if qte_global.hibernate_after is not None:
+            self.qteHibernateApplets(qte_global.hibernate_after)
+
+    @type_check
+    def qteSaveSession(self, fileName: str=None):
+        """
+        Save the windows, their layout, the applets, the kill list,
+        and the query histories to ``fileName``.
+
+        Applets only contribute their light-weight session state (see
+        ``QtmacsApplet.qteSessionState``), not their content. The
+        session is written atomically, ie. an interrupted save never
+        corrupts the previous session file.
+
+        |Args|
+
+        * ``fileName`` (**str**): name of the session file (defaults
+          to ``qte_global.session_file``).
+
+        |Returns|
+
+        * **bool**: **True** if the session was saved.
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        if fileName is None:
+            fileName = qte_global.session_file
+            if fileName is None:
+                return False
+        start = time.perf_counter()
+
+        # Geometry and splitter tree of every window.
+        windows = []
+        for window in self._qteWindowList:
+            geo = window.geometry()
+            windows.append([window._qteWindowID,
+                            [geo.x(), geo.y(), geo.width(), geo.height()],
+                            self._qteSessionLayout(window.qteAppletSplitter)])
+
+        # Name, ID, and state of all applets in the order of
+        # ``qteNextApplet``. Placeholders of a previous session that
+        # were never shown retain their original name and state.
+        applets = []
+        for app in self._qteAppletList:
+            if self.qteIsMiniApplet(app):
+                continue
+            if isinstance(app, QtmacsPlaceholder):
+                appletName = app.qtePlaceholderName
+            else:
+                appletName = app.__class__.__name__
+            applets.append([appletName, app.qteAppletID(),
+                            app.qteSessionState()])
+
+        active = self.qteNextApplet(numSkip=0)
+        if active is not None:
+            active = active.qteAppletID()
+
+        # The most recent elements of the kill list. Custom data is
+        # only saved if it is a string.
+        killList = qte_global.kill_list
+        numKill = max(0, qte_global.session_kill_list)
+        elements = []
+        for el in killList[max(0, len(killList) - numKill):]:
+            custom = el.dataCustom()
+            if not isinstance(custom, str):
+                custom = None
+            elements.append([el.dataText(), custom, el.dataType()])
+
+        # The query histories of all macros, including those of a
+        # previous session whose macros were never registered.
+        histories = dict(self._qteSessionHistories)
+        for key, macroObj in self._qteRegistryMacros.items():
+            for attr in qtmacs.session.historyAttributes:
+                hist = getattr(macroObj, attr, None)
+                if not isinstance(hist, list) or len(hist) == 0:
+                    continue
+                hist = [_ for _ in hist[-qtmacs.session.historySize:]
+                        if isinstance(_, str)]
+                histories.setdefault('|'.join(key), {})[attr] = hist
+
+        session = {'version': qtmacs.session.sessionVersion,
+                   'windows': windows, 'applets': applets,
+                   'active': active, 'killList': elements,
+                   'histories': histories}
+        try:
+            qtmacs.session.writeSession(fileName, session)
+        except OSError as err:
+            msg = 'Cannot save the session to <b>%s</b>: %s'
+            self.qteLogger.error(msg, fileName, err)
+            return False
+
+        msg = 'Saved session with <b>%d</b> applets to <b>%s</b> in %.1f ms.'
+        self.qteLogger.debug(msg, len(applets), fileName,
+                             1000 * (time.perf_counter() - start))
+        return True
+
+    def _qteSessionLayout(self, split):
+        """
+        Return the splitter tree below ``split`` in the format of the
+        session file (see ``qtmacs.session``).
+
+        |Args|
+
+        * ``split`` (**QtmacsSplitter**): root of the splitter tree.
+
+        |Returns|
+
+        * **list**: ``['h' or 'v', sizes, children]``.
+
+        |Raises|
+
+        * **None**
+        """
+        children = []
+        for ii in range(split.count()):
+            widget = split.widget(ii)
+            if widget._qteAdmin.widgetSignature == '__QtmacsLayoutSplitter__':
+                children.append(self._qteSessionLayout(widget))
+            else:
+                children.append(widget.qteAppletID())
+        if split.orientation() == QtCore.Qt.Horizontal:
+            orient = 'h'
+        else:
+            orient = 'v'
+        return [orient, split.sizes(), children]
+
+    @type_check
+    def qteRestoreSession(self, fileName: str=None):
+        """
+        Restore the session saved in ``fileName``.
+
+        Only the applets that are visible in the restored layout are
+        created right away. All other applets are represented by a
+        ``QtmacsPlaceholder`` until they are shown for the first time
+        (see ``qteMaterialiseApplet``). Applets that already exist, or
+        whose name is not registered, are skipped.
+
+        |Args|
+
+        * ``fileName`` (**str**): name of the session file (defaults
+          to ``qte_global.session_file``).
+
+        |Returns|
+
+        * **bool**: **True** if the session was restored.
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        if fileName is None:
+            fileName = qte_global.session_file
+            if fileName is None:
+                return False
+        start = time.perf_counter()
+
+        try:
+            session = qtmacs.session.readSession(fileName)
+        except (OSError, ValueError) as err:
+            msg = 'Cannot restore the session from <b>%s</b>: %s'
+            self.qteLogger.warning(msg, fileName, err)
+            return False
+
+        # Collect the IDs of all applets in the window layouts.
+        visible = set()
+
+        def collect(tree):
+            for child in tree[2]:
+                if isinstance(child, str):
+                    visible.add(child)
+                else:
+                    collect(child)
+        for _, _, layout in session['windows']:
+            collect(layout)
+
+        # Create the visible applets, and placeholders for all others.
+        order = []
+        numCreated = 0
+        for appletName, appletID, state in session['applets']:
+            order.append(appletID)
+            if appletID in self._qteAppletDict:
+                continue
+            if appletName not in self._qteRegistryApplets:
+                msg = ('Cannot restore applet <b>%s</b> because <b>%s</b>'
+                       ' is not registered.')
+                self.qteLogger.warning(msg, appletID, appletName)
+                continue
+            if appletID in visible:
+                app = self.qteNewApplet(appletName, appletID)
+                if app is not None:
+                    self._qteRestoreAppletSession(app, state)
+                    numCreated += 1
+            else:
+                app = QtmacsPlaceholder(appletID, appletName, state)
+                app.qteReparent(None)
+                self._qteAppletList.append(app)
+                self._qteAppletDict[appletID] = app
+
+        # Restore the order of the applets. Applets that are not part
+        # of the session move to the end.
+        rank = {appletID: idx for idx, appletID in enumerate(order)}
+        self._qteAppletList.sort(
+            key=lambda _: rank.get(_.qteAppletID(), len(rank)))
+
+        # Re-use the existing windows and create new ones as necessary.
+        for idx, (windowID, geo, layout) in enumerate(session['windows']):
+            rect = QtCore.QRect(*geo)
+            if idx < len(self._qteWindowList):
+                window = self._qteWindowList[idx]
+                window.setGeometry(rect)
+            else:
+                windowIDs = [_._qteWindowID for _ in self._qteWindowList]
+                if windowID in windowIDs:
+                    windowID = None
+                window = self.qteNewWindow(rect, windowID)
+            self._qteClearLayout(window)
+            self._qteBuildLayout(window.qteAppletSplitter, layout, window)
+
+            # Show at least one applet in every window.
+            split = window.qteAppletSplitter
+            if split.count() == 0:
+                app = self.qteNextApplet(skipInvisible=False,
+                                         skipVisible=True)
+                if app is not None:
+                    split.qteAddWidget(self.qteMaterialiseApplet(app))
+
+        # Append the kill list of the session to the current one.
+        for text, custom, dataType in session.get('killList', []):
+            qte_global.kill_list.append(
+                qtmacs.kill_list.KillListElement(text, custom, dataType))
+
+        # Restore the query histories. The histories of macros that
+        # are not registered yet (eg. because their applet was not
+        # created yet) are applied whenever a new applet was created.
+        self._qteSessionHistories.update(session.get('histories', {}))
+        self._qteApplySessionHistories()
+        slot = self._qteApplySessionHistories
+        if (len(self._qteSessionHistories) > 0) and \
+           (slot not in self._qteRegistryHooks.get('init', [])):
+            self.qteConnectHook('init', slot)
+
+        # Activate the previously active applet.
+        app = self._qteAppletDict.get(session.get('active'))
+        if app is not None:
+            self.qteMakeAppletActive(app)
+
+        msg = ('Restored session from <b>%s</b> with <b>%d</b> applets'
+               ' (%d created) in %.1f ms.')
+        self.qteLogger.info(msg, fileName, len(order), numCreated,
+                            1000 * (time.perf_counter() - start))
+        return True
+
+    def _qteClearLayout(self, window):
+        """
+        Remove all applets and splitters from the layout of ``window``.
+
+        |Args|
+
+        * ``window`` (**QtmacsWindow**): the window to clear.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        # Hiding an applet also removes it from its splitter.
+        for app in self._qteAppletList:
+            if self.qteIsMiniApplet(app):
+                continue
+            if app.qteParentWindow() is window:
+                app.hide(True)
+
+        # Delete the (now empty) splitters.
+        split = window.qteAppletSplitter
+        for ii in reversed(range(split.count())):
+            widget = split.widget(ii)
+            if widget._qteAdmin.widgetSignature == '__QtmacsLayoutSplitter__':
+                widget.setParent(None)
+                widget.close()
+
+    def _qteBuildLayout(self, split, tree, window):
+        """
+        Insert the applets and splitters described by ``tree`` into
+        ``split``.
+
+        |Args|
+
+        * ``split`` (**QtmacsSplitter**): the (empty) splitter.
+        * ``tree`` (**list**): splitter tree in the format of the
+          session file (see ``qtmacs.session``).
+        * ``window`` (**QtmacsWindow**): the window of ``split``.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        orient, sizes, children = tree
+        if orient == 'h':
+            split.setOrientation(QtCore.Qt.Horizontal)
+        else:
+            split.setOrientation(QtCore.Qt.Vertical)
+
+        for child in children:
+            if isinstance(child, str):
+                # Skip applets that do not exist (anymore) or are
+                # already visible elsewhere.
+                app = self._qteAppletDict.get(child)
+                if (app is None) or app.qteIsVisible():
+                    continue
+                app = self.qteMaterialiseApplet(app)
+                split.qteAddWidget(app, adjustSizes=False)
+            else:
+                newSplit = QtmacsSplitter(QtCore.Qt.Horizontal, window)
+                split.qteAddWidget(newSplit, adjustSizes=False)
+                newSplit._qteAdmin.parentSplitter = split
+                self._qteBuildLayout(newSplit, child, window)
+
+                # Discard splitters without any applets.
+                if newSplit.count() == 0:
+                    newSplit.setParent(None)
+                    newSplit.close()
+
+        # Use the saved sizes only if all widgets were restored.
+        if len(sizes) == split.count():
+            split.setSizes(sizes)
+        else:
+            split.qteAdjustWidgetSizes()
+
+    def _qteRestoreAppletSession(self, app, state):
+        """
+        Pass the session ``state`` to ``app``.
+
+        Errors are logged, because a broken (or outdated) state must
+        not prevent the remaining session from being restored.
+
+        |Args|
+
+        * ``app`` (**QtmacsApplet**): the restored applet.
+        * ``state`` (**dict**): its session state.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        if state is None:
+            return
+        try:
+            app.qteRestoreSession(state)
+        except Exception:
+            msg = 'Cannot restore the session state of applet <b>%s</b>.'
+            self.qteLogger.exception(msg, app.qteAppletID())
+
+    def _qteApplySessionHistories(self, msgObj=None):
+        """
+        Apply the pending query histories of the restored session to
+        the registered macros.
+
+        This method is also connected to the 'init' hook, because
+        macros may only be registered once their applet was created.
+        It returns immediately once all histories were applied.
+
+        |Args|
+
+        * ``msgObj`` (**QtmacsMessage**): ignored.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        if len(self._qteSessionHistories) == 0:
+            return
+
+        for key, macroObj in self._qteRegistryMacros.items():
+            key = '|'.join(key)
+            if key not in self._qteSessionHistories:
+                continue
+            for attr, values in self._qteSessionHistories.pop(key).items():
+                hist = getattr(macroObj, attr, None)
+                if isinstance(hist, list):
+                    hist[:] = values
+
+    def qteMaterialiseApplet(self, applet):
+        """
+        Replace the placeholder ``applet`` with the actual applet it
+        represents, and return the latter.
+
+        Applets that are not placeholders (and **None**) are returned
+        unchanged. The new applet inherits the ID, the position in
+        the applet list, and the session state of the placeholder. If
+        the applet cannot be created then the placeholder is returned.
+
+        |Args|
+
+        * ``applet`` (**QtmacsApplet**): the applet to materialise.
+
+        |Returns|
+
+        * **QtmacsApplet**: the actual applet.
+
+        |Raises|
+
+        * **None**
+        """
+        if not isinstance(applet, QtmacsPlaceholder):
+            return applet
+
+        # Release the ID for the actual applet.
+        appletID = applet.qteAppletID()
+        idx = self._qteAppletList.index(applet)
+        self._qteAppletList.remove(applet)
+        del self._qteAppletDict[appletID]
+
+        app = self.qteNewApplet(applet.qtePlaceholderName, appletID)
+        if app is None:
+            # Keep the placeholder (``qteNewApplet`` logged the error).
+            self._qteAppletList.insert(idx, applet)
+            self._qteAppletDict[appletID] = applet
+            return applet
+
+        # Move the applet to the position of the placeholder.
+        self._qteAppletList.remove(app)
+        self._qteAppletList.insert(idx, app)
+        self._qteRestoreAppletSession(app, applet.qtePlaceholderState)
+        if self._qteActiveApplet is applet:
+            self._qteActiveApplet = app
+
+        # Delete the placeholder (see ``qteKillApplet``).
+        applet.close()
+        sip.delete(applet)
+        return app
+
+    def _qteAutoSaveSession(self):
+        """
+        Save the session to ``qte_global.session_file`` (if set).
+
+        This method is triggered periodically by a timer.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        if qte_global.session_file is not None:
+            self.qteSaveSession()
+
     @type_check
     def qteRunHook(self, hookName: str, msgObj: QtmacsMessage=None):
         """
@@ -2767,6 +3522,11 @@ class QtmacsMain(QtCore.QObject):
         else:
             reg[hookName] = [slot]
 
+        # Remember the hook if a module is being imported.
+        record = self._qteCurrentModule()
+        if record is not None:
+            record.hooks.append((hookName, slot))
+
     @type_check
     def qteDisconnectHook(self, hookName: str,
                           slot: (types.FunctionType, types.MethodType)):
@@ -2823,6 +3583,10 @@ class QtmacsMain(QtCore.QObject):
         If ``fileName`` has no path prefix then it must be in the
         standard Python module path. Relative path names are possible.
 
+        Qtmacs keeps track of all macros, applets, hooks, and global
+        key bindings the module registers while it executes. This
+        makes it possible to reload it later with ``qteReloadModule``.
+
         |Args|
 
         * ``fileName`` (**str**): file name (with full path) of module
@@ -2849,26 +3613,194 @@ class QtmacsMain(QtCore.QObject):
             path = [path]
 
         # Try to locate the module.
-        try:
-            fp, pathname, desc = imp.find_module(name, path)
-        except ImportError:
+        spec = importlib.machinery.PathFinder.find_spec(name, path)
+        if (spec is None) or (spec.loader is None):
             msg = 'Could not find module <b>{}</b>.'.format(fileName)
             self.qteLogger.error(msg)
             return None
 
-        # Try to import the module.
-        try:
-            mod = imp.load_module(name, fp, pathname, desc)
-            return mod
-        except ImportError:
+        # Create the module and register it, just like the ``import``
+        # statement would.
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[name] = mod
+
+        # Try to execute the module and record everything it registers.
+        record = QtmacsModuleRecord(mod, spec.origin)
+        if not self._qteExecModule(record, spec.loader.exec_module):
+            sys.modules.pop(name, None)
             msg = 'Could not import module <b>{}</b>.'.format(fileName)
             self.qteLogger.error(msg)
             return None
+
+        self._qteRegistryModules[name] = record
+        return mod
+
+    @type_check
+    def qteReloadModule(self, moduleName: str):
+        """
+        Re-execute the module ``moduleName`` and replace all its
+        registrations in place.
+
+        The module must have been imported with ``qteImportModule``,
+        and its registrations are updated as follows:
+
+        * macros are re-registered with ``replaceMacro=True`` and
+          those the module no longer defines are unregistered,
+        * applets are re-registered with ``replaceApplet=True``; the
+          instances that already exist are not affected,
+        * the hooks of the previous execution are disconnected,
+        * only those global key bindings that changed are re-bound,
+          and bindings the module no longer defines are removed.
+
+        If the module raises an error then the hooks of the previous
+        execution are reconnected. All other registrations it made up
+        to this point remain in effect.
+
+        |Args|
+
+        * ``moduleName`` (**str**): name of the module (eg. 'config').
+
+        |Returns|
+
+        * **bool**: **True** if the module was reloaded successfully.
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        if moduleName not in self._qteRegistryModules:
+            msg = 'Module <b>{}</b> was not imported with qteImportModule.'
+            self.qteLogger.error(msg.format(moduleName))
+            return False
+
+        # The new record keeps a reference to the previous one to
+        # compare the registrations (see eg. ``qteBindKeyGlobal``).
+        oldRecord = self._qteRegistryModules[moduleName]
+        mod = oldRecord.module
+        record = QtmacsModuleRecord(mod, oldRecord.fileName)
+        record.previous = oldRecord
+
+        # Disconnect the old hooks, or they would be called twice
+        # once the module connects them again.
+        for hookName, slot in oldRecord.hooks:
+            if slot in self._qteRegistryHooks.get(hookName, []):
+                self.qteDisconnectHook(hookName, slot)
+
+        # Re-execute the module in its existing name space. Unlike
+        # ``importlib.reload`` the loader does not search ``sys.path``
+        # again, which may not contain the path of the module.
+        sys.modules[moduleName] = mod
+        if not self._qteExecModule(record, mod.__spec__.loader.exec_module):
+            # Replace the hooks the failed execution connected (if
+            # any) with those of the previous execution, and keep the
+            # old record, augmented by the new registrations.
+            for hookName, slot in record.hooks:
+                if slot in self._qteRegistryHooks.get(hookName, []):
+                    self.qteDisconnectHook(hookName, slot)
+            for hookName, slot in oldRecord.hooks:
+                self.qteConnectHook(hookName, slot)
+            oldRecord.macros |= record.macros
+            oldRecord.applets |= record.applets
+            oldRecord.keys.update(record.keys)
+            msg = 'Could not reload module <b>{}</b>.'.format(moduleName)
+            self.qteLogger.error(msg)
+            return False
+
+        # Unregister the macros the module no longer defines.
+        for macroNameInternal in oldRecord.macros - record.macros:
+            macroObj = self._qteRegistryMacros.pop(macroNameInternal, None)
+            if macroObj is not None:
+                macroObj.deleteLater()
+                msg = 'Macro <b>{}</b> was unregistered.'
+                self.qteLogger.info(msg.format(macroNameInternal))
+
+        # Remove the global key bindings the module no longer defines,
+        # unless something else has re-bound the key in the meantime.
+        for key, (keysequence, macroName) in oldRecord.keys.items():
+            if key in record.keys:
+                continue
+            if self._qteGlobalKeyMap.match(keysequence)[0] != macroName:
+                continue
+            self._qteGlobalKeyMap.qteRemoveKey(keysequence)
+            for app in self._qteAppletList:
+                self.qteUnbindKeyApplet(app, keysequence)
+
+        record.previous = None
+        self._qteRegistryModules[moduleName] = record
+        msg = 'Module <b>{}</b> reloaded.'.format(moduleName)
+        self.qteLogger.info(msg)
+        return True
+
+    def qteReloadModules(self):
+        """
+        Reload all modules imported with ``qteImportModule`` whose
+        file has changed since they were (re)loaded.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **list**: names of the successfully reloaded modules.
+
+        |Raises|
+
+        * **None**
+        """
+        reloaded = []
+        for moduleName, record in list(self._qteRegistryModules.items()):
+            try:
+                mtime = os.path.getmtime(record.fileName)
+            except OSError:
+                continue
+            if mtime == record.mtime:
+                continue
+            if self.qteReloadModule(moduleName):
+                reloaded.append(moduleName)
+        if len(reloaded) > 0:
+            self.qteApplySettings()
+        return reloaded
+
+    def _qteExecModule(self, record, execFun):
+        """
+        Execute a module with ``execFun(record.module)`` and collect
+        its registrations in ``record``.
+
+        |Args|
+
+        * ``record`` (**QtmacsModuleRecord**): record of the module.
+        * ``execFun`` (**callable**): executes the module.
+
+        |Returns|
+
+        * **bool**: **True** if the module executed without error.
+
+        |Raises|
+
+        * **None**
+        """
+        # All registration methods add to the record at the top of
+        # the stack (see ``_qteCurrentModule``).
+        self._qteModuleStack.append(record)
+        try:
+            execFun(record.module)
+            return True
+        except Exception:
+            msg = 'Error in module <b>{}</b>.'.format(record.fileName)
+            self.qteLogger.exception(msg, exc_info=True, stack_info=True)
+            return False
         finally:
-            # According to the imp documentation the file pointer
-            # should always be closed explicitly.
-            if fp:
-                fp.close()
+            self._qteModuleStack.pop()
+
+    def _qteCurrentModule(self):
+        """
+        Return the ``QtmacsModuleRecord`` of the module that is
+        currently executing, or **None**.
+        """
+        if len(self._qteModuleStack) == 0:
+            return None
+        return self._qteModuleStack[-1]
 
     def qteMacroNameMangling(self, macroCls):
         """
@@ -3000,6 +3932,11 @@ class QtmacsMain(QtCore.QObject):
             self.qteLogger.error(msg, stack_info=True)
             return None
 
+        # Modules replace their own macros when they are reloaded.
+        record = self._qteCurrentModule()
+        if (record is not None) and (record.previous is not None):
+            replaceMacro = True
+
         # Flag to indicate that at least one new macro type was
         # registered.
         anyRegistered = False
@@ -3017,25 +3954,35 @@ class QtmacsMain(QtCore.QObject):
                 # new one.
                 if macroNameInternal in self._qteRegistryMacros:
                     if replaceMacro:
-                        # Remove existing macro.
+                        # Remove existing macro. Replacing a macro with
+                        # another instance of the same class is routine
+                        # (eg. for every new mini applet) and only
+                        # worth a debug message.
                         tmp = self._qteRegistryMacros.pop(macroNameInternal)
-                        msg = 'Replacing existing macro <b>{}</b> with new {}.'
-                        msg = msg.format(macroNameInternal, macroObj)
-                        self.qteLogger.info(msg)
+                        msg = 'Replacing existing macro <b>%s</b> with new %s.'
+                        if type(tmp) is macroCls:
+                            level = logging.DEBUG
+                        else:
+                            level = logging.INFO
+                        self._qteLogRegistration(
+                            'replaced', level, msg, macroNameInternal,
+                            macroObj)
                         tmp.deleteLater()
                     else:
-                        msg = 'Macro <b>{}</b> already exists (not replaced).'
-                        msg = msg.format(macroNameInternal)
-                        self.qteLogger.info(msg)
+                        msg = 'Macro <b>%s</b> already exists (not replaced).'
+                        self._qteLogRegistration(
+                            'kept', logging.INFO, msg, macroNameInternal)
                         # Macro was not registered for this widget
                         # signature.
                         continue
 
                 # Add macro object to the registry.
                 self._qteRegistryMacros[macroNameInternal] = macroObj
-                msg = ('Macro <b>{}</b> successfully registered.'
-                       .format(macroNameInternal))
-                self.qteLogger.info(msg)
+                if record is not None:
+                    record.macros.add(macroNameInternal)
+                msg = 'Macro <b>%s</b> successfully registered.'
+                self._qteLogRegistration(
+                    'registered', logging.INFO, msg, macroNameInternal)
                 anyRegistered = True
 
         # Return the name of the macro, irrespective of whether or not
@@ -3043,6 +3990,64 @@ class QtmacsMain(QtCore.QObject):
         # (in case of a name conflict).
         return macroName
 
+    def _qteLogRegistration(self, kind, level, msg, *args):
+        """
+        Log a message about a macro registration of type ``kind``
+        ('registered', 'replaced', or 'kept'), unless
+        ``qteQuietRegistration`` is in effect.
+
+        The message is only formatted (with the %-operator and
+        ``args``) if a log handler actually processes it.
+        """
+        if self._qteQuietDepth > 0:
+            self._qteQuietCounts[kind] += 1
+        else:
+            self.qteLogger.log(level, msg, *args)
+
+    @contextlib.contextmanager
+    def qteQuietRegistration(self, context):
+        """
+        Summarise all macro registrations inside a ``with`` block in a
+        single log message.
+
+        Use this context manager when registering many macros in bulk,
+        eg. the default key bindings of a widget::
+
+            with qteMain.qteQuietRegistration('my widget'):
+                qteMain.qteRegisterMacro(...)
+                ...
+
+        Nested blocks are summarised by the outermost one. Errors are
+        still logged immediately.
+
+        |Args|
+
+        * ``context`` (**str**): what was registered (used in the
+          summary).
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **None**
+        """
+        self._qteQuietDepth += 1
+        try:
+            yield
+        finally:
+            self._qteQuietDepth -= 1
+            counts = self._qteQuietCounts
+            if (self._qteQuietDepth == 0) and any(counts.values()):
+                msg = ('Registered <b>%d</b> macros (%d replaced, %d '
+                       'already existed) for %s.')
+                self.qteLogger.info(msg, counts['registered'],
+                                    counts['replaced'], counts['kept'],
+                                    context)
+                for key in counts:
+                    counts[key] = 0
+
     @type_check
     def qteIsMacroRegistered(self, macroName: str,
                              widgetObj: QtGui.QWidget=None):
@@ -3314,6 +4319,19 @@ class QtmacsMain(QtCore.QObject):
             self.qteLogger.error(msg, stack_info=True)
             return False
 
+        # Remember the binding if a module is being imported. If the
+        # module is being reloaded and the binding did not change then
+        # all applets have it already.
+        record = self._qteCurrentModule()
+        if record is not None:
+            key = tuple(keysequence.toQtKeylist())
+            record.keys[key] = (keysequence, macroName)
+            if record.previous is not None:
+                oldBinding = record.previous.keys.get(key, (None, None))
+                if (oldBinding[1] == macroName) and \
+                   (self._qteGlobalKeyMap.match(keysequence)[0] == macroName):
+                    return True
+
         # Insert/overwrite the key sequence and associate it with the
         # new macro.
         self._qteGlobalKeyMap.qteInsertKey(keysequence, macroName)
@@ -3734,6 +4752,19 @@ class QtmacsMain(QtCore.QObject):
         # under which the applet will be known.
         class_name = cls.__name__
 
+        # A descriptor for this applet is silently superseded by the
+        # class itself.
+        if isinstance(self._qteRegistryApplets.get(class_name, None),
+                      QtmacsAppletDescriptor):
+            self._qteRemoveDescriptor(class_name)
+
+        # Modules replace their own applets when they are reloaded.
+        record = self._qteCurrentModule()
+        if record is not None:
+            record.applets.add(class_name)
+            if record.previous is not None:
+                replaceApplet = True
+
         # Issue a warning if an applet with this name already exists.
         if class_name in self._qteRegistryApplets:
             msg = 'The original applet <b>{}</b>'.format(class_name)
@@ -3757,6 +4788,132 @@ class QtmacsMain(QtCore.QObject):
                             .format(class_name))
         return class_name
 
+    @type_check
+    def qteRegisterAppletModule(self, appletName: str, moduleName: str,
+                                fileTypes: (tuple, list)=(),
+                                replaceApplet: bool=False):
+        """
+        Register the applet ``appletName`` defined in ``moduleName``
+        without importing the module.
+
+        The module is imported, and the applet class registered with
+        ``qteRegisterApplet``, when the first instance of the applet
+        is created with ``qteNewApplet``. Until then, the regular
+        expressions in ``fileTypes`` are added to
+        ``qte_global.findFile_types`` on behalf of the applet. For
+        instance::
+
+            qteRegisterAppletModule('PDFReader', 'qtmacs.applets.pdf_reader',
+                                    ['.*\.pdf$'])
+
+        makes the PDFReader applet available, but the Poppler
+        library is only loaded once the first PDF file is opened.
+
+        |Args|
+
+        * ``appletName`` (**str**): name of the applet class.
+        * ``moduleName`` (**str**): absolute name of the module that
+          defines the applet class.
+        * ``fileTypes`` (**tuple**, **list**): regular expressions of
+          the file names the applet can open.
+        * ``replaceApplet`` (**bool**): if applet with same name exists,
+          then replace it.
+
+        |Returns|
+
+        * **str**: name under which the applet was registered with Qtmacs.
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        # A module that is reloaded replaces its own descriptors, but
+        # not the applet classes that were loaded in the meantime.
+        record = self._qteCurrentModule()
+        if record is not None:
+            record.applets.add(appletName)
+            if record.previous is not None:
+                replaceApplet = isinstance(
+                    self._qteRegistryApplets.get(appletName, None),
+                    QtmacsAppletDescriptor)
+
+        # Issue a warning if an applet with this name already exists.
+        if appletName in self._qteRegistryApplets:
+            msg = 'The original applet <b>{}</b>'.format(appletName)
+            if replaceApplet:
+                msg += ' was redefined.'
+                self.qteLogger.warning(msg)
+                if isinstance(self._qteRegistryApplets[appletName],
+                              QtmacsAppletDescriptor):
+                    self._qteRemoveDescriptor(appletName)
+            else:
+                msg += ' was not redefined.'
+                self.qteLogger.warning(msg)
+                return appletName
+
+        # Associate the file types with the applet the same way the
+        # ``__qteRegisterAppletInit__`` method of the applet would.
+        desc = QtmacsAppletDescriptor(appletName, moduleName, fileTypes)
+        for pat in desc.fileTypes:
+            qte_global.findFile_types.insert(0, (pat, appletName))
+
+        # Add the descriptor to the applet registry.
+        self._qteRegistryApplets[appletName] = desc
+        return appletName
+
+    def _qteRemoveDescriptor(self, appletName):
+        """
+        Remove the descriptor of ``appletName`` from the registry
+        and its file types from ``qte_global.findFile_types``.
+        """
+        desc = self._qteRegistryApplets.pop(appletName)
+        for pat in desc.fileTypes:
+            try:
+                qte_global.findFile_types.remove((pat, appletName))
+            except ValueError:
+                pass
+
+    @type_check
+    def qteLoadApplet(self, appletName: str):
+        """
+        Import the module of ``appletName`` and register the applet.
+
+        This method is called automatically by ``qteNewApplet`` for
+        applets registered with ``qteRegisterAppletModule``. If the
+        module cannot be imported then the applet is unregistered.
+
+        |Args|
+
+        * ``appletName`` (**str**): name of the applet.
+
+        |Returns|
+
+        * **class QtmacsApplet**: the applet class, or **None** if it
+          could not be loaded.
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        cls = self._qteRegistryApplets.get(appletName, None)
+        if not isinstance(cls, QtmacsAppletDescriptor):
+            return cls
+
+        # Import the module and fetch the applet class.
+        desc = cls
+        try:
+            module = importlib.import_module(desc.moduleName)
+            cls = getattr(module, appletName)
+        except (ImportError, AttributeError) as err:
+            self._qteRemoveDescriptor(appletName)
+            msg = 'Could not load applet <b>{}</b> from <b>{}</b>: {}'
+            self.qteLogger.error(msg.format(appletName, desc.moduleName, err))
+            return None
+
+        # Register the class (this supersedes the descriptor).
+        self.qteRegisterApplet(cls)
+        return cls
+
     def qteGetAllAppletIDs(self):
         """
         Return a tuple of all applet IDs currently active in Qtmacs.
@@ -3813,16 +4970,42 @@ class QtmacsMain(QtCore.QObject):
 
         * **QtmacsArgumentError** if at least one argument has an invalid type.
         """
-        # Compile list of applet Ids.
-        id_list = [_.qteAppletID() for _ in self._qteAppletList]
+        return self._qteAppletDict.get(appletID, None)
 
-        # If one of the applets has ``appletID`` then return a
-        # reference to it.
-        if appletID in id_list:
-            idx = id_list.index(appletID)
-            return self._qteAppletList[idx]
-        else:
-            return None
+    @type_check
+    def qteUniqueAppletID(self, template: str):
+        """
+        Return an applet ID of the form ``template.format(number)``
+        that is not in use yet.
+
+        Qtmacs keeps a counter for every ``template``, so that the
+        cost of finding an unused ID does not depend on the number of
+        applets. As a consequence, the numbers are not re-used once
+        the respective applets were killed. For instance::
+
+            qteUniqueAppletID('__DefaultQuery#{}__')
+
+        returns '__DefaultQuery#0__', then '__DefaultQuery#1__', etc.
+
+        |Args|
+
+        * ``template`` (**str**): format string with one '{}' field.
+
+        |Returns|
+
+        * **str**: an unused applet ID.
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        cnt = self._qteIDCounters.get(template, 0)
+        appletID = template.format(cnt)
+        while appletID in self._qteAppletDict:
+            cnt += 1
+            appletID = template.format(cnt)
+        self._qteIDCounters[template] = cnt + 1
+        return appletID
 
     @type_check
     def qteMakeAppletActive(self, applet: (QtmacsApplet, str)):
@@ -3862,6 +5045,9 @@ class QtmacsMain(QtCore.QObject):
         if appletObj not in self._qteAppletList:
             return False
 
+        # Replace placeholders of a restored session with their applet.
+        appletObj = self.qteMaterialiseApplet(appletObj)
+
         # If ``appletObj`` is a mini applet then double check that it
         # is actually installed and visible. If it is a conventional
         # applet then insert it into the layout.
@@ -3907,6 +5093,10 @@ class QtmacsMain(QtCore.QObject):
         msgObj.setSignalName('qtesigCloseQtmacs')
         self.qtesigCloseQtmacs.emit(msgObj)
 
+        # Save the session before its applets disappear.
+        if qte_global.session_file is not None:
+            self.qteSaveSession()
+
         # Kill all applets and update the GUI.
         for appName in self.qteGetAllAppletIDs():
             self.qteKillApplet(appName)
@@ -4057,3 +5247,26 @@ class QtmacsMain(QtCore.QObject):
             # process.
             for event in key_list:
                 self._qteKeyEmulationQueue.append(event)
+
+            # Process the keys once the event loop is idle.
+            self.qteUpdate()
+
+    def qteIsBusy(self):
+        """
+        Return **True** if macros or emulated keys are still queued.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **bool**: whether Qtmacs has pending work.
+
+        |Raises|
+
+        * **None**
+        """
+        return ((len(self._qteMacroQueue) > 0) or
+                (len(self._qteKeyEmulationQueue) > 0) or
+                (self._qteTimerRunMacro is not None))
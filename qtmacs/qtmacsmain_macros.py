@@ -32,10 +32,12 @@ the default functionality of Qtmacs.
 
 """
 
+import os
 import re
 import qtmacs.auxiliary
 import qtmacs.miniapplets.base_query
 import qtmacs.miniapplets.file_query
+import qtmacs.miniapplets.fuzzy_file_query
 import qtmacs.qte_global as qte_global
 
 from PyQt4 import QtCore, QtGui
@@ -132,6 +134,92 @@ class DescribeKey(QtmacsMacro):
             self.qteAbort)
 
 
+class DescribeStartup(QtmacsMacro):
+    """
+    Display the duration and number of imported modules of every
+    startup phase.
+
+    |Signature|
+
+    * *applet*: '*'
+    * *widget*: '*'
+
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('*')
+        self.qteSetWidgetSignature('*')
+
+    def qteRun(self):
+        msg = 'Qtmacs startup profile:\n\n'
+        msg += qte_global.startup_profile.qteReport()
+
+        # Get handle to the help window applet (create a new applet if
+        # necessary).
+        app = self.qteMain.qteGetAppletHandle('**Help**')
+        if app is None:
+            app = self.qteMain.qteNewApplet('RichEditor', '**Help**')
+            if app is None:
+                return
+
+        # Ensure the applet is visible and display the report in a
+        # fixed width font.
+        if not app.qteIsVisible():
+            self.qteMain.qteSplitApplet(app)
+        app.qteText.clear()
+        app.qteText.setCurrentFont(QtGui.QFont('Monospace'))
+        app.qteText.insertPlainText(msg)
+
+
+class ReloadModules(QtmacsMacro):
+    """
+    Reload the configuration files and all other modules imported
+    with ``qteImportModule`` that have changed on disk.
+
+    The macros, applets, hooks, and key bindings of these modules
+    are replaced in place, ie. without restarting Qtmacs.
+
+    |Signature|
+
+    * *applet*: '*'
+    * *widget*: '*'
+
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('*')
+        self.qteSetWidgetSignature('*')
+
+    def qteRun(self):
+        reloaded = self.qteMain.qteReloadModules()
+        if len(reloaded) == 0:
+            self.qteMain.qteStatus('No modules have changed')
+        else:
+            msg = 'Reloaded {}'.format(', '.join(sorted(reloaded)))
+            self.qteMain.qteStatus(msg)
+
+
+class HibernateApplets(QtmacsMacro):
+    """
+    Hibernate all invisible applets that support it, irrespective of
+    how long they have been idle.
+
+    |Signature|
+
+    * *applet*: '*'
+    * *widget*: '*'
+
+    """
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('*')
+        self.qteSetWidgetSignature('*')
+
+    def qteRun(self):
+        num = self.qteMain.qteHibernateApplets()
+        self.qteMain.qteStatus('Hibernated {} applets'.format(num))
+
+
 class ReplayKeysequence(QtmacsMacro):
     """
     Replay a previously recorded key sequence.
@@ -872,9 +960,16 @@ class FindFile(QtmacsMacro):
 
             # If none of the currently registered applets can process
             # the file then use the fallback option (usually a simple
-            # text editor widget).
+            # text editor widget), unless the file is too large for it.
             if appName is None:
-                appName = qte_global.findFile_default
+                try:
+                    size = os.path.getsize(userInput)
+                except OSError:
+                    size = 0
+                if size >= qte_global.findFile_largeSize:
+                    appName = qte_global.findFile_large
+                else:
+                    appName = qte_global.findFile_default
 
             # Try to instantiate the new applet.
             app = self.qteMain.qteNewApplet(appName, userInput)
@@ -900,6 +995,43 @@ class FindFile(QtmacsMacro):
         self.qteMain.qteAddMiniApplet(query)
 
 
+class FindFileInProject(QtmacsMacro):
+    """
+    Use the mini applet to query a file anywhere in the current
+    project with fuzzy matching. The current project is the one of
+    the file shown in the active applet, or of the current directory
+    if the applet shows no file.
+
+    The chosen file is opened the same way as with ``FindFile``.
+
+    |Signature|
+
+    * *applet*: '*'
+    * *widget*: '*'
+
+    """
+    class Query(
+            qtmacs.miniapplets.fuzzy_file_query.MiniAppletFuzzyFindFile):
+        """
+        Query the name of a file in the project of the current applet.
+        """
+        # Open the file with the applet registered for its type.
+        inputCompleted = FindFile.Query.inputCompleted
+
+    def __init__(self):
+        super().__init__()
+        self.qteSetAppletSignature('*')
+        self.qteSetWidgetSignature('*')
+
+    def qteRun(self):
+        # Instantiate the fuzzy file name query.
+        query = self.Query(self.qteApplet, self.qteWidget)
+
+        # Install the query object as the mini applet and return
+        # control to the event loop.
+        self.qteMain.qteAddMiniApplet(query)
+
+
 # -----------------------------------------------------------------
 #   Assign the default key bindings for the Qtmacs standard macros.
 # -----------------------------------------------------------------
@@ -911,6 +1043,9 @@ def install_macros_and_bindings():
     # with this macro.
     macro_list = (
         (DescribeKey, '<ctrl>+h k'),
+        (DescribeStartup, None),
+        (ReloadModules, None),
+        (HibernateApplets, None),
         (CloseQtmacs, '<ctrl>+x <ctrl>+c'),
         (KillApplet, '<ctrl>+x k'),
         (ReplayKeysequence, '<ctrl>+x e'),
@@ -927,6 +1062,7 @@ def install_macros_and_bindings():
         (ExecuteMacro, '<alt>+x'),
         (NewApplet, '<ctrl>+x <ctrl>+a'),
         (FindFile, '<ctrl>+x <ctrl>+f'),
+        (FindFileInProject, '<ctrl>+x <ctrl>+p'),
         (KillWindow, None),
         (NewWindow, None),
         (MacroProxyDemo, None))
@@ -0,0 +1,159 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Find regular expression matches in a separate process.
+
+Python's ``re`` module holds the GIL for the entire duration of a
+match, which is why a pattern with catastrophic backtracking blocks
+every thread of Qtmacs, including the GUI. The regexp search- and
+replace macros therefore run this file as a child process (see
+``RegexpScanWorker`` in ``qtmacs.extensions.qtmacsscintilla_macros``),
+and kill it if a search exceeds its time limit.
+
+The process reads pickled jobs from stdin and writes pickled results
+to stdout. A job is a tuple ``(searchID, pattern, flags, text,
+cursor, wrap)``, where ``text`` is **None** if it is identical to the
+text of the previous job, and ``pattern`` is **None** to merely
+abandon the current search. The scan starts at ``cursor``, continues
+to the end of the text, and then (if ``wrap`` is **True**) wraps
+around to the start. A new job supersedes the current one, which is
+abandoned at the next batch boundary.
+
+Every result is a tuple ``(searchID, kind, data)`` where ``kind`` is
+
+* 'start': the process started to work on the job,
+* 'tail': ``data`` is a batch of match spans after the cursor,
+* 'head': ``data`` is a batch of match spans before the cursor,
+* 'done': the job is over and ``data`` is **True** if all matches
+  were reported.
+
+This file must not import Qt (or any part of Qtmacs) so that the
+process starts quickly.
+"""
+
+import re
+import sys
+import queue
+import pickle
+import threading
+
+# Number of characters after which a batch of matches is sent.
+chunkSize = 2 ** 16
+
+
+def readJobs(stream, jobs):
+    """
+    Read the jobs from ``stream`` into the ``jobs`` queue.
+
+    A separate thread runs this function to notice new jobs while
+    the main thread is still busy with the current one. **None**
+    marks the end of the stream.
+    """
+    while True:
+        try:
+            job = pickle.load(stream)
+        except (EOFError, OSError, pickle.UnpicklingError):
+            job = None
+        jobs.put(job)
+        if job is None:
+            return
+
+
+def scanRegion(pat, text, start, stop, limit, report, cancelled):
+    """
+    Report all matches in ``text`` that start in [start, stop) and
+    end before ``limit``.
+
+    Return a tuple with a flag that indicates whether the scan
+    completed, and the start of the first match (or the length of
+    ``text`` if there was none).
+    """
+    first = None
+    batch = []
+    boundary = start + chunkSize
+    for match in pat.finditer(text, start):
+        span = match.span()
+        if (span[0] >= stop) or (span[1] > limit):
+            break
+
+        # Send the matches found so far once the chunk boundary
+        # has been crossed, and find out whether to continue.
+        if span[0] >= boundary:
+            report(batch)
+            batch = []
+            boundary = span[0] + chunkSize
+            if cancelled():
+                return False, first
+
+        if first is None:
+            first = span[0]
+        batch.append(span)
+
+    if len(batch) > 0:
+        report(batch)
+    if first is None:
+        first = len(text)
+    return True, first
+
+
+def main():
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+    jobs = queue.Queue()
+    reader = threading.Thread(target=readJobs, args=(stdin, jobs))
+    reader.daemon = True
+    reader.start()
+
+    def send(*result):
+        pickle.dump(result, stdout, protocol=pickle.HIGHEST_PROTOCOL)
+        stdout.flush()
+
+    text = ''
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        searchID, pattern, flags, newText, cursor, wrap = job
+        if newText is not None:
+            text = newText
+        send(searchID, 'start', None)
+        if pattern is None:
+            send(searchID, 'done', False)
+            continue
+
+        # The search is abandoned once the next job arrives.
+        pat = re.compile(pattern, flags)
+        num = len(text)
+        completed, first = scanRegion(
+            pat, text, cursor, num, num,
+            lambda batch: send(searchID, 'tail', batch), jobs.qsize)
+
+        # Then scan from the start of the document up to the cursor
+        # but ignore matches that overlap with the first match found
+        # above.
+        if completed and wrap and (cursor > 0):
+            completed, _ = scanRegion(
+                pat, text, 0, cursor, first,
+                lambda batch: send(searchID, 'head', batch), jobs.qsize)
+        send(searchID, 'done', completed)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
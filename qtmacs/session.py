@@ -0,0 +1,161 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Read and write the session files of ``QtmacsMain.qteSaveSession`` and
+``QtmacsMain.qteRestoreSession``, and provide the
+``QtmacsPlaceholder`` applet that stands in for the applets of a
+restored session until they are first shown.
+
+A session file is a zlib compressed JSON object with the fields
+
+* ``version``: format version (currently 1),
+* ``windows``: list of ``[windowID, [x, y, width, height], layout]``,
+  where ``layout`` describes the splitter tree of the window. Every
+  splitter is a list ``['h' or 'v', sizes, children]`` and every child
+  either an applet ID or another splitter,
+* ``applets``: list of ``[appletName, appletID, state]`` in the order
+  of ``qteNextApplet``, where ``state`` is the value returned by
+  ``QtmacsApplet.qteSessionState`` (eg. the cursor position),
+* ``active``: ID of the active applet,
+* ``killList``: the most recent elements of the kill list as
+  ``[text, custom, type]``,
+* ``histories``: the most recent entries of the query histories of
+  all macros, indexed by the macro name and its applet- and widget
+  signature (separated by '|').
+
+It is safe to use::
+
+    from session import something
+
+"""
+
+import os
+import json
+import zlib
+import qtmacs.file_io
+import qtmacs.type_check
+
+from qtmacs.base_applet import QtmacsApplet
+
+# Shorthands:
+type_check = qtmacs.type_check.type_check
+atomicWrite = qtmacs.file_io.atomicWrite
+
+# Version of the session file format.
+sessionVersion = 1
+
+# Applet signature of ``QtmacsPlaceholder``.
+placeholderSignature = '__QtmacsPlaceholder__'
+
+# Attributes of macro objects that hold query histories.
+historyAttributes = ('qteQueryHistory', 'qteSearchHistory')
+
+# Number of entries saved per history.
+historySize = 100
+
+
+@type_check
+def writeSession(fileName: str, session: dict):
+    """
+    Write ``session`` to ``fileName`` atomically.
+
+    |Args|
+
+    * ``fileName`` (**str**): name of the session file.
+    * ``session`` (**dict**): the session (see module documentation).
+
+    |Returns|
+
+    * **None**
+
+    |Raises|
+
+    * **OSError** if the file could not be written.
+    """
+    fileName = os.path.expanduser(fileName)
+    os.makedirs(os.path.dirname(fileName) or '.', exist_ok=True)
+    data = json.dumps(session, separators=(',', ':')).encode('utf-8')
+    atomicWrite(fileName, zlib.compress(data))
+
+
+@type_check
+def readSession(fileName: str):
+    """
+    Return the session stored in ``fileName``.
+
+    |Args|
+
+    * ``fileName`` (**str**): name of the session file.
+
+    |Returns|
+
+    * **dict**: the session (see module documentation).
+
+    |Raises|
+
+    * **OSError** if the file could not be read.
+    * **ValueError** if the file is not a valid session file.
+    """
+    with open(os.path.expanduser(fileName), 'rb') as f:
+        data = f.read()
+    try:
+        session = json.loads(zlib.decompress(data).decode('utf-8'))
+    except zlib.error as err:
+        raise ValueError(str(err))
+    if not isinstance(session, dict):
+        raise ValueError('not a session file')
+    if session.get('version') != sessionVersion:
+        raise ValueError('unsupported version {}'.format(
+            session.get('version')))
+    for key in ('windows', 'applets'):
+        if not isinstance(session.get(key), list):
+            raise ValueError('missing field {}'.format(key))
+    return session
+
+
+class QtmacsPlaceholder(QtmacsApplet):
+    """
+    Stand-in for an applet of a restored session.
+
+    The placeholder has no widgets and only remembers the name and
+    session state of the applet it represents. ``QtmacsMain`` replaces
+    it with the actual applet (see ``qteMaterialiseApplet``) before it
+    becomes visible.
+
+    |Args|
+
+    * ``appletID`` (**str**): ID of the represented applet.
+    * ``appletName`` (**str**): name of the represented applet.
+    * ``state`` (**dict**): session state of the represented applet.
+
+    |Raises|
+
+    * **QtmacsArgumentError** if at least one argument has an invalid type.
+    """
+    @type_check
+    def __init__(self, appletID: str, appletName: str, state: dict=None):
+        super().__init__(appletID)
+        self.qteSetAppletSignature(placeholderSignature)
+        self.qtePlaceholderName = appletName
+        self.qtePlaceholderState = state
+
+    def qteSessionState(self):
+        """
+        Return the session state of the represented applet.
+        """
+        return self.qtePlaceholderState
@@ -0,0 +1,202 @@
+# Copyright 2012, Oliver Nagy <olitheolix@gmail.com>
+#
+# This file is part of Qtmacs.
+#
+# Qtmacs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Qtmacs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Qtmacs. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Provide ``QtmacsStartupProfile`` to measure the duration and the
+number of imported modules of every phase during the start of Qtmacs.
+
+The constructor of ``QtmacsMain`` starts a new phase before every
+major step (eg. 'config' before it loads the global configuration
+file), and the profile is complete once the focus manager ran for the
+first time. At this point the profile emits ``sigFinished``. Qtmacs
+places the profile into ``qte_global.startup_profile``, and the
+``describe-startup`` macro displays it. Optionally, the entire
+startup is also profiled with ``cProfile``.
+
+Usage example (see also the ``--profile-startup`` option of
+``bin/qtmacs``)::
+
+    profile = qtmacs.startup_profile.QtmacsStartupProfile()
+    profile.sigFinished.connect(lambda: print(profile.qteReport()))
+    qtmacs.qtmacsmain.QtmacsMain(startupProfile=profile)
+
+"""
+
+import sys
+import time
+import cProfile
+import qtmacs.type_check
+
+from PyQt4 import QtCore
+
+# Shorthands:
+type_check = qtmacs.type_check.type_check
+
+
+class QtmacsStartupProfile(QtCore.QObject):
+    """
+    Record the duration and number of imports of the startup phases.
+
+    |Args|
+
+    * ``useCProfile`` (**bool**): whether to profile the startup
+      with ``cProfile`` as well.
+
+    |Raises|
+
+    * **QtmacsArgumentError** if at least one argument has an invalid type.
+    """
+    # Emitted once the last phase has ended.
+    sigFinished = QtCore.pyqtSignal()
+
+    @type_check
+    def __init__(self, useCProfile: bool=False):
+        super().__init__()
+
+        # List of completed phases as (name, seconds, imports)
+        # tuples, and the currently running phase as (name, start
+        # time, number of modules) tuple.
+        self.phases = []
+        self._qteCurrent = None
+        self.finished = False
+
+        # Time and number of modules at the start.
+        self._qteStart = time.perf_counter()
+        self._qteNumModules = len(sys.modules)
+
+        if useCProfile:
+            self._qteCProfile = cProfile.Profile()
+            self._qteCProfile.enable()
+        else:
+            self._qteCProfile = None
+
+    @type_check
+    def qteBegin(self, name: str):
+        """
+        End the current phase (if any) and begin phase ``name``.
+
+        Nothing happens once the profile is finished.
+
+        |Args|
+
+        * ``name`` (**str**): name of the new phase.
+
+        |Returns|
+
+        * **None**
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        if self.finished:
+            return
+        self.qteEnd()
+        self._qteCurrent = (name, time.perf_counter(), len(sys.modules))
+
+    def qteEnd(self):
+        """
+        End the current phase.
+        """
+        if self._qteCurrent is None:
+            return
+        name, start, numModules = self._qteCurrent
+        self.phases.append((name, time.perf_counter() - start,
+                            len(sys.modules) - numModules))
+        self._qteCurrent = None
+
+    def qteFinish(self):
+        """
+        End the current phase, stop ``cProfile``, and emit
+        ``sigFinished``.
+
+        Subsequent calls do nothing.
+        """
+        if self.finished:
+            return
+        self.qteEnd()
+        self._qteTotal = time.perf_counter() - self._qteStart
+        self._qteTotalImports = len(sys.modules) - self._qteNumModules
+        if self._qteCProfile is not None:
+            self._qteCProfile.disable()
+        self.finished = True
+        self.sigFinished.emit()
+
+    def qteTotal(self):
+        """
+        Return the total startup time in seconds (so far).
+        """
+        if self.finished:
+            return self._qteTotal
+        return time.perf_counter() - self._qteStart
+
+    def qteReport(self):
+        """
+        Return a plain text table of all phases.
+
+        |Args|
+
+        * **None**
+
+        |Returns|
+
+        * **str**: the report.
+
+        |Raises|
+
+        * **None**
+        """
+        if self.finished:
+            total, imports = self._qteTotal, self._qteTotalImports
+        else:
+            total = time.perf_counter() - self._qteStart
+            imports = len(sys.modules) - self._qteNumModules
+
+        width = max([len(_[0]) for _ in self.phases] + [len('total')])
+        line = '{:<' + str(width) + '}  {:>10}  {:>8}'
+        out = [line.format('phase', 'ms', 'imports')]
+        for name, duration, numImports in self.phases:
+            out.append(line.format(name, '{:.1f}'.format(duration * 1000),
+                                   numImports))
+        out.append(line.format('total', '{:.1f}'.format(total * 1000),
+                               imports))
+        return '\n'.join(out)
+
+    @type_check
+    def qteDumpStats(self, fileName: str):
+        """
+        Save the ``cProfile`` statistics to ``fileName``.
+
+        The file can be inspected with the ``pstats`` module. Nothing
+        happens if the profile was created without ``cProfile``.
+
+        |Args|
+
+        * ``fileName`` (**str**): name of the statistics file.
+
+        |Returns|
+
+        * **bool**: **True** if the statistics were saved.
+
+        |Raises|
+
+        * **QtmacsArgumentError** if at least one argument has an invalid type.
+        """
+        if self._qteCProfile is None:
+            return False
+        self._qteCProfile.dump_stats(fileName)
+        return True
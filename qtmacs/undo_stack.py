@@ -349,13 +349,19 @@ class QtmacsUndoStack(QtCore.QObject):
             self.qtesigSavedState.emit(QtmacsMessage())
             self.saveState()
 
-    def saveState(self):
+    def saveState(self, index=None):
         """
         Treat the current state as the last unmodified one.
 
+        If ``index`` is not **None** then the state after the first
+        ``index`` commands on the stack is considered unmodified
+        instead, eg. because a background save completed only after
+        further modifications were made.
+
         |Args|
 
-        * **None**
+        * ``index`` (**int**): number of commands on the stack that
+          correspond to the unmodified state.
 
         |Returns|
 
@@ -365,4 +371,15 @@ class QtmacsUndoStack(QtCore.QObject):
 
         * **None**
         """
-        self._qteLastSavedUndoIndex = len(self._qteStack)
+        if index is None:
+            index = len(self._qteStack)
+        self._qteLastSavedUndoIndex = index
+
+    def __len__(self):
+        """
+        Return the number of commands on the stack.
+
+        This is the value to pass to ``saveState`` to mark the current
+        state as unmodified at a later point in time.
+        """
+        return len(self._qteStack)